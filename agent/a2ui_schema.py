@@ -24,6 +24,7 @@ A2UI_SCHEMA = {
                         "required": ["surfaceId", "contents"],
                         "properties": {
                             "surfaceId": {"type": "string"},
+                            "path": {"type": "string"},
                             "contents": {
                                 "anyOf": [{"type": "array"}, {"type": "object"}]
                             },
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
+import hmac
 import json
 import os
 import sys
 import time
 import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
-import jsonschema
-from fastapi import FastAPI
+import anyio
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
@@ -20,10 +24,13 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from agent.a2ui_schema import A2UI_SCHEMA
-from agent.runtime import RuntimeResponse, get_runtime
-
-TEMPLATES_DIR = Path(__file__).parent / "templates"
+from agent.bank_tools import get_bank_tools, reset_bank_tools
+from agent.geocode_cache import get_geocode_cache, reset_geocode_cache
+from agent.mcp_apps import geocode_flight_stats, get_map_server_clients
+from agent.runtime import RuntimeEvent, RuntimeResponse, TemplateHint, TextDelta, get_adk_sessions, get_runtime_pool, reset_runtime_pool
+from agent.surface_state import data_model_deltas, encode_data_updates, get_surface_states, reset_surface_states
+from agent.template_registry import TEMPLATES, TemplateRegistry, dumps_compact
+from agent.tool_cache import bypass_tool_cache, get_tool_cache, reset_tool_cache
 
 
 class ChatRequest(BaseModel):
@@ -45,28 +52,34 @@ class A2AStreamRequest(BaseModel):
     params: dict[str, Any] | None = None
 
 
-def _load_template(name: str) -> list[dict[str, Any]]:
-    with (TEMPLATES_DIR / name).open("r", encoding="utf-8") as f:
-        payload = json.load(f)
-    jsonschema.validate(instance=payload, schema=A2UI_SCHEMA)
-    return payload
+def _templates() -> TemplateRegistry:
+    # Development hook: pick up template edits without restarting the agent.
+    if os.getenv("A2UI_TEMPLATES_RELOAD", "").lower() in ("1", "true", "yes"):
+        TEMPLATES.reload()
+    return TEMPLATES
+
+
+def _run_runtime(message: str, context_id: str | None = None) -> RuntimeResponse:
+    with get_runtime_pool().acquire() as runtime:
+        return runtime.run(message, context_id=context_id)
+
+
+async def _arun_runtime(message: str, context_id: str | None = None) -> RuntimeResponse:
+    async with get_runtime_pool().aacquire() as runtime:
+        return await runtime.arun(message, context_id=context_id)
 
 
-def handle_query(message: str) -> ChatResponse:
-    runtime: RuntimeResponse = get_runtime().run(message)
-    a2ui = _load_template(runtime.template_name)
+async def _astream_runtime(message: str, context_id: str | None = None) -> AsyncIterator[RuntimeEvent]:
+    # The runtime stays leased until the stream is exhausted or closed.
+    async with get_runtime_pool().aacquire() as runtime:
+        async for event in runtime.astream(message, context_id=context_id):
+            yield event
+
+
+def handle_query(message: str, context_id: str | None = None) -> ChatResponse:
+    runtime = _run_runtime(message, context_id)
     surface_id = str(uuid.uuid4())
-    for item in a2ui:
-        for message_key in ("surfaceUpdate", "dataModelUpdate", "beginRendering"):
-            payload = item.get(message_key)
-            if isinstance(payload, dict):
-                payload["surfaceId"] = surface_id
-        update = item.get("dataModelUpdate")
-        if isinstance(update, dict):
-            # Pass data as a dict so DataModel uses its permissive Map path
-            # (_parseDataModelContents expects {key,valueString} format which
-            # is complex; the Map path sets _data = runtime.data directly).
-            update["contents"] = runtime.data
+    a2ui = _templates().render(runtime.template_name, surface_id, runtime.data)
     return ChatResponse(text=runtime.text, a2ui=a2ui, data=runtime.data)
 
 
@@ -111,40 +124,176 @@ def extract_a2a_user_text(payload: dict[str, Any]) -> str:
     raise ValueError("No text message found in A2A payload")
 
 
-def _message_envelope(parts: list[dict[str, Any]], request_id: str | int | None = None) -> dict[str, Any]:
-    envelope = {"kind": "message", "parts": parts}
+def extract_a2a_context_id(payload: dict[str, Any]) -> str | None:
+    """Return the conversation's A2A contextId, if the client sent one."""
+    candidates = [payload.get("message")]
+    params = payload.get("params")
+    if isinstance(params, dict):
+        candidates.extend([params.get("message"), params])
+    for candidate in candidates:
+        if isinstance(candidate, dict):
+            context_id = candidate.get("contextId")
+            if isinstance(context_id, str) and context_id.strip():
+                return context_id.strip()
+    return None
+
+
+@dataclass(frozen=True)
+class EncodedChatResponse:
+    """A chat response whose A2UI messages and data model are already JSON."""
+
+    text: str
+    a2ui: list[bytes]
+    data: bytes
+
+
+def _encode_runtime_response(
+    runtime: RuntimeResponse,
+    context_id: str | None = None,
+    surface_id: str | None = None,
+    include_surface: bool = True,
+) -> EncodedChatResponse:
+    """
+    Encode a runtime response's A2UI messages.
+
+    Within a conversation (``context_id``) a template shown before reuses
+    its surface and only gets dataModelUpdate deltas (see
+    agent.surface_state) and its beginRendering. ``surface_id`` is an id already announced with
+    the template's surfaceUpdate, which is then left out.
+    """
+    data_json = dumps_compact(runtime.data)
+    previous = None
+    if context_id:
+        surface_id, previous = get_surface_states().swap(
+            context_id, runtime.template_name, runtime.data, surface_id
+        )
+    if previous is not None:
+        # beginRendering re-shows the surface even when no data changed, so
+        # the reply is never empty.
+        a2ui = encode_data_updates(surface_id, data_model_deltas(previous, runtime.data), data_json)
+        a2ui += _templates().encode_begin_rendering(runtime.template_name, surface_id)
+    else:
+        a2ui = _templates().encode(
+            runtime.template_name, surface_id or str(uuid.uuid4()), data_json, include_surface=include_surface
+        )
+    return EncodedChatResponse(text=runtime.text, a2ui=a2ui, data=data_json)
+
+
+async def aencode_query(message: str, context_id: str | None = None) -> EncodedChatResponse:
+    """
+    Like handle_query, but splice the response from pre-encoded fragments.
+
+    The template's static parts come pre-serialized from the registry, so
+    only the surface id, the text and the data model are encoded here; the
+    data model is encoded once and shared by the a2ui and data fields.
+    Replies within a conversation update the surfaces it already shows
+    instead of creating new ones.
+    """
+    return _encode_runtime_response(await _arun_runtime(message, context_id), context_id)
+
+
+def _json_array(items: list[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+def _splice(obj: dict[str, Any], raw: dict[str, bytes], *, spaced: bool = False) -> bytes:
+    """Encode ``obj`` as a JSON object with already-encoded ``raw`` members appended."""
+    item_sep, key_sep = (", ", ": ") if spaced else (",", ":")
+    out = json.dumps(obj, ensure_ascii=False, separators=(item_sep, key_sep)).encode("utf-8")[:-1]
+    for key, value in raw.items():
+        if len(out) > 1:
+            out += item_sep.encode()
+        out += dumps_compact(key) + key_sep.encode() + value
+    return out + b"}"
+
+
+def _encode_chat(response: EncodedChatResponse) -> bytes:
+    return _splice({"text": response.text}, {"a2ui": _json_array(response.a2ui), "data": response.data})
+
+
+def _encode_a2ui_part(message: bytes) -> bytes:
+    return b'{"kind":"data","data":' + message + b',"metadata":{"mimeType":"application/json+a2ui"}}'
+
+
+def _encode_a2a_parts(response: EncodedChatResponse) -> list[bytes]:
+    parts: list[bytes] = []
+    if response.text.strip():
+        parts.append(dumps_compact({"kind": "text", "text": response.text}))
+    for message in response.a2ui:
+        parts.append(_encode_a2ui_part(message))
+    return parts
+
+
+async def _astream_parts(message: str, context_id: str | None = None) -> AsyncIterator[TextDelta | bytes]:
+    """
+    Stream a reply as text deltas and encoded A2A parts, each when ready.
+
+    On a TemplateHint the template's static surfaceUpdate is sent at once,
+    so the client can lay out the card while tools run; the reply then
+    sends only the dataModelUpdate and beginRendering for that surface id.
+    If the conversation already shows the template, nothing is sent early
+    and the reply updates that surface. If the reply ends up using another
+    template, it is sent in full.
+    """
+    surfaces: dict[str, str] = {}
+    async for event in _astream_runtime(message, context_id):
+        if isinstance(event, TextDelta):
+            yield event
+        elif isinstance(event, TemplateHint):
+            if event.template_name in surfaces:
+                continue
+            shown = get_surface_states().surface_id(context_id, event.template_name) if context_id else None
+            surfaces[event.template_name] = shown or str(uuid.uuid4())
+            if shown is None:
+                for update in _templates().encode_surface(event.template_name, surfaces[event.template_name]):
+                    yield _encode_a2ui_part(update)
+        else:
+            surface_id = surfaces.get(event.template_name)
+            response = _encode_runtime_response(event, context_id, surface_id, include_surface=surface_id is None)
+            for part in _encode_a2a_parts(response):
+                yield part
+
+
+def _encode_jsonrpc_result(request_id: str | int | None, result: bytes) -> bytes:
+    return _splice({"jsonrpc": "2.0", "id": request_id}, {"result": result})
+
+
+def _encode_message_envelope(parts: list[bytes], request_id: str | int | None = None) -> bytes:
+    envelope = _splice({"kind": "message"}, {"parts": _json_array(parts)})
     if request_id is None:
         return envelope
-    return {"jsonrpc": "2.0", "id": request_id, "result": envelope}
+    return _encode_jsonrpc_result(request_id, envelope)
 
 
-def _a2a_parts(response: ChatResponse) -> list[dict[str, Any]]:
-    return build_a2a_parts(response)
+def _encode_a2a_task(response: EncodedChatResponse, task_id: str, context_id: str) -> bytes:
+    status = _splice(
+        {"state": "completed", "timestamp": _timestamp()},
+        {"message": _encode_agent_message(_encode_a2a_parts(response))},
+    )
+    return _splice({"id": task_id, "contextId": context_id, "kind": "task"}, {"status": status})
 
 
-def _a2a_message(response: ChatResponse) -> dict[str, Any]:
-    return {
-        "kind": "message",
-        "role": "agent",
-        "messageId": str(uuid.uuid4()),
-        "parts": _a2a_parts(response),
-    }
+def _json_bytes_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
 
 
-def _a2a_task(response: ChatResponse, task_id: str, context_id: str) -> dict[str, Any]:
-    return {
-        "id": task_id,
-        "contextId": context_id,
-        "kind": "task",
-        "status": {
-            "state": "completed",
-            "timestamp": str(int(time.time() * 1000)),
-            "message": _a2a_message(response),
-        },
-    }
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runtimes are built and warmed once per process, not per request.
+    pool = get_runtime_pool()
+    # Warm-up may block (ADK agent construction), so keep it off the loop.
+    await anyio.to_thread.run_sync(pool.warm_up)
+    app.state.runtimes = pool
+    yield
+    reset_runtime_pool()
+    await reset_bank_tools()
+    await get_map_server_clients().aclose()
+    reset_geocode_cache()
+    reset_tool_cache()
+    reset_surface_states()
 
 
-app = FastAPI(title="AIBank Agent")
+app = FastAPI(title="AIBank Agent", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -155,7 +304,7 @@ app.add_middleware(
 
 
 @app.get("/health")
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {
         "status": "ok",
         "model": os.getenv("LLM_MODEL", "gpt-5-mini"),
@@ -163,39 +312,96 @@ def health() -> dict[str, str]:
     }
 
 
+@app.get("/metrics")
+async def metrics() -> dict[str, Any]:
+    stats: dict[str, Any] = {
+        "runtimes": get_runtime_pool().stats(),
+        "bankTools": get_bank_tools().stats(),
+        "toolCache": get_tool_cache().stats(),
+        "surfaces": get_surface_states().stats(),
+        "mapServer": get_map_server_clients().stats(),
+        "geocodeCache": get_geocode_cache().stats(),
+        "geocodeCoalescing": geocode_flight_stats(),
+    }
+    if os.getenv("AGENT_RUNTIME", "deterministic").lower() == "adk":
+        stats["sessions"] = get_adk_sessions().stats()
+    return stats
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest) -> ChatResponse:
-    return handle_query(req.message)
+async def chat(req: ChatRequest, request: Request) -> Response:
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        with bypass_tool_cache():
+            return _json_bytes_response(_encode_chat(await aencode_query(req.message)))
+    return _json_bytes_response(_encode_chat(await aencode_query(req.message)))
+
+
+class CacheInvalidateRequest(BaseModel):
+    customerId: str | None = None
+    accountId: str | None = None
+
+
+@app.post("/cache/invalidate")
+async def cache_invalidate(req: CacheInvalidateRequest, request: Request) -> dict[str, int]:
+    """
+    Drop cached bank tool results after the bank data changed elsewhere.
+
+    Off unless TOOL_CACHE_INVALIDATE_TOKEN is set; callers then send it as
+    ``Authorization: Bearer <token>``.
+    """
+    token = os.getenv("TOOL_CACHE_INVALIDATE_TOKEN", "")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid cache invalidation token")
+    return {"invalidated": get_tool_cache().invalidate(req.customerId, req.accountId)}
 
 
 @app.post("/a2a/message/stream")
-def a2a_message_stream(req: A2AStreamRequest) -> StreamingResponse:
+async def a2a_message_stream(req: A2AStreamRequest) -> StreamingResponse:
+    """
+    Stream a reply as NDJSON ``message_part`` events, each sent when ready.
+
+    The template's surfaceUpdate is sent as soon as the runtime knows it;
+    model text arrives as ``"partial": true`` text parts while it is
+    generated; the complete text part and the remaining A2UI messages follow.
+    """
     payload = req.model_dump()
     message = extract_a2a_user_text(payload)
-    response = handle_query(message)
-    parts = build_a2a_parts(response)
     request_id = payload.get("id")
-
-    def _iter_lines():
-        for part in parts:
-            event: dict[str, Any] = {"kind": "message_part", "part": part}
-            if request_id is not None:
-                event = {"jsonrpc": "2.0", "id": request_id, "result": event}
-            yield json.dumps(event) + "\n"
+    events = _astream_parts(message, extract_a2a_context_id(payload))
+    # Failures before the first event still surface as an HTTP error.
+    first = await events.__anext__()
+
+    def _line(part: bytes, partial: bool = False) -> bytes:
+        header: dict[str, Any] = {"kind": "message_part", "partial": True} if partial else {"kind": "message_part"}
+        event = _splice(header, {"part": part}, spaced=True)
+        if request_id is not None:
+            event = _splice({"jsonrpc": "2.0", "id": request_id}, {"result": event}, spaced=True)
+        return event + b"\n"
+
+    async def _iter_lines():
+        event: TextDelta | bytes | None = first
+        while event is not None:
+            if isinstance(event, TextDelta):
+                yield _line(dumps_compact({"kind": "text", "text": event.text}), partial=True)
+            else:
+                yield _line(event)
+            event = await anext(events, None)
 
     return StreamingResponse(_iter_lines(), media_type="application/x-ndjson")
 
 
 @app.post("/a2a/message")
-def a2a_message(req: A2AStreamRequest) -> dict[str, Any]:
+async def a2a_message(req: A2AStreamRequest) -> Response:
     payload = req.model_dump()
     message = extract_a2a_user_text(payload)
-    response = handle_query(message)
-    return _message_envelope(build_a2a_parts(response), payload.get("id"))
+    response = await aencode_query(message, extract_a2a_context_id(payload))
+    return _json_bytes_response(_encode_message_envelope(_encode_a2a_parts(response), payload.get("id")))
 
 
-@app.get("/a2a/agent-card")
-def a2a_agent_card() -> dict[str, Any]:
+def _agent_card() -> dict[str, Any]:
     return {
         "name": "aibank-agent",
         "description": "Mock banking assistant with A2UI output",
@@ -218,9 +424,14 @@ def a2a_agent_card() -> dict[str, Any]:
     }
 
 
+@app.get("/a2a/agent-card")
+async def a2a_agent_card() -> dict[str, Any]:
+    return _agent_card()
+
+
 @app.get("/.well-known/agent-card.json")
-def a2a_agent_card_well_known(request: Request) -> dict[str, Any]:
-    card = a2a_agent_card()
+async def a2a_agent_card_well_known(request: Request) -> dict[str, Any]:
+    card = _agent_card()
     card["url"] = str(request.base_url).rstrip("/")
     card["capabilities"]["streaming"] = True
     return card
@@ -258,19 +469,86 @@ async def a2a_rpc(req: Request):
             status_code=400,
         )
     
-    response = handle_query(text)
-
-    if method == "message/send":
-        task_id = str(uuid.uuid4())
-        context_id = str(uuid.uuid4())
-        return JSONResponse({"jsonrpc": "2.0", "id": request_id, "result": _a2a_task(response, task_id, context_id)})
+    # Turns of one conversation share a contextId, which keys the runtime's
+    # session; a new conversation gets a fresh one.
+    context_id = extract_a2a_context_id({"message": msg}) or str(uuid.uuid4())
+    task_id = str(uuid.uuid4())
 
     if method == "message/stream":
-        task_id = str(uuid.uuid4())
-        context_id = str(uuid.uuid4())
-        task = _a2a_task(response, task_id, context_id)
+        return StreamingResponse(
+            _stream_task(request_id, task_id, context_id, text), media_type="text/event-stream"
+        )
+
+    response = await aencode_query(text, context_id)
+    return _json_bytes_response(_encode_jsonrpc_result(request_id, _encode_a2a_task(response, task_id, context_id)))
+
+
+def _timestamp() -> str:
+    return str(int(time.time() * 1000))
+
+
+def _encode_agent_message(parts: list[bytes]) -> bytes:
+    return _splice(
+        {"kind": "message", "role": "agent", "messageId": str(uuid.uuid4())},
+        {"parts": _json_array(parts)},
+    )
+
+
+def _encode_status_update(
+    task_id: str, context_id: str, state: str, parts: list[bytes] | None = None, final: bool = False
+) -> bytes:
+    status = _splice(
+        {"state": state, "timestamp": _timestamp()},
+        {"message": _encode_agent_message(parts)} if parts else {},
+    )
+    return _splice(
+        {"taskId": task_id, "contextId": context_id, "kind": "status-update", "final": final},
+        {"status": status},
+    )
 
-        def _sse():
-            yield f"data: {json.dumps({'jsonrpc': '2.0', 'id': request_id, 'result': task})}\n\n"
 
-        return StreamingResponse(_sse(), media_type="text/event-stream")
+def _encode_text_chunk(task_id: str, context_id: str, text: str, append: bool, last: bool) -> bytes:
+    return dumps_compact({
+        "taskId": task_id,
+        "contextId": context_id,
+        "kind": "artifact-update",
+        "artifact": {"artifactId": f"{task_id}-text", "name": "response-text", "parts": [{"kind": "text", "text": text}]},
+        "append": append,
+        "lastChunk": last,
+    })
+
+
+async def _stream_task(request_id: str | int | None, task_id: str, context_id: str, text: str) -> AsyncIterator[bytes]:
+    """
+    SSE events of one ``message/stream`` task, sent as soon as each exists.
+
+    The task is announced as ``submitted`` and then ``working`` before the
+    runtime starts. Model text streams as ``artifact-update`` chunks while it
+    is generated. Every other part (the early surfaceUpdate, the full text,
+    then the remaining A2UI messages) is sent as its own ``working`` status
+    message. A final ``completed`` (or ``failed``) status closes the stream.
+    """
+
+    def sse(event: bytes) -> bytes:
+        return b"data: " + _encode_jsonrpc_result(request_id, event) + b"\n\n"
+
+    submitted = _splice({"state": "submitted", "timestamp": _timestamp()}, {})
+    yield sse(_splice({"id": task_id, "contextId": context_id, "kind": "task"}, {"status": submitted}))
+    yield sse(_encode_status_update(task_id, context_id, "working"))
+
+    streaming_text = False
+    try:
+        async for event in _astream_parts(text, context_id):
+            if isinstance(event, TextDelta):
+                yield sse(_encode_text_chunk(task_id, context_id, event.text, streaming_text, False))
+                streaming_text = True
+                continue
+            if streaming_text:
+                yield sse(_encode_text_chunk(task_id, context_id, "", True, True))
+                streaming_text = False
+            yield sse(_encode_status_update(task_id, context_id, "working", [event]))
+    except Exception as exc:
+        error = dumps_compact({"kind": "text", "text": f"Sorry, something went wrong: {exc}"})
+        yield sse(_encode_status_update(task_id, context_id, "failed", [error], final=True))
+        return
+    yield sse(_encode_status_update(task_id, context_id, "completed", final=True))
@@ -0,0 +1,392 @@
+"""
+Transports for calling the bank tools.
+
+The runtime calls the bank tools through one of three interchangeable
+transports, chosen with ``BANK_TOOLS_TRANSPORT``:
+
+- ``inprocess`` (default): ``mcp_server.server.call_tool`` in this process.
+- ``stdio``: a pool of long-lived ``python -m mcp_server.server`` worker
+  processes. Calls carry request ids and are pipelined over each worker's
+  pipe, so one worker serves many concurrent calls and replies may arrive in
+  any order.
+- ``http``: MCP JSON-RPC ``tools/call`` over streamable HTTP to
+  ``BANK_MCP_URL`` (``python -m mcp_server.mcp_server --http``), on pooled
+  keep-alive clients (see ``agent.mcp_http``).
+
+Every transport has the ``call_tool`` signature and raises
+``mcp_server.server.ToolError`` for tool errors, so the runtime cannot tell
+them apart. Transport failures (dead worker, HTTP errors, timeouts) raise
+``ConnectionError`` or ``TimeoutError``.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import IO, Any, Iterator, Protocol
+
+import anyio
+import httpx
+
+from agent.mcp_http import McpHttpClients, McpHttpSettings
+from mcp_server.server import ToolError
+
+TRANSPORTS = ("inprocess", "stdio", "http")
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class ToolTransport(Protocol):
+    name: str
+
+    def call(self, name: str, **kwargs: Any) -> Any:
+        ...
+
+    async def acall(self, name: str, **kwargs: Any) -> Any:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class InProcessTransport:
+    """Calls the tools directly; they are CPU-only dictionary lookups."""
+
+    name = "inprocess"
+
+    def call(self, name: str, **kwargs: Any) -> Any:
+        from mcp_server import server
+
+        return server.call_tool(name, **kwargs)
+
+    async def acall(self, name: str, **kwargs: Any) -> Any:
+        # Inline rather than paying for a thread hop.
+        return self.call(name, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        return {"transport": self.name}
+
+    def close(self) -> None:
+        pass
+
+
+class _StdioWorker:
+    """
+    One worker process.
+
+    Requests are queued for a writer thread, so submitting never blocks on
+    the pipe; a reader thread resolves replies by request id.
+    """
+
+    def __init__(self, command: list[str]) -> None:
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            cwd=_REPO_ROOT,
+        )
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        self._closed = False
+        # (request id, line) to send; None stops the writer.
+        self._outbox: queue.SimpleQueue[tuple[int, str] | None] = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._write, args=(self._outbox,), name="bank-tools-stdio-writer", daemon=True
+        )
+        self._writer.start()
+        self._reader = threading.Thread(target=self._read, name="bank-tools-stdio", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return not self._closed
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, name: str, kwargs: dict[str, Any]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("Bank tool worker has exited")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        self._outbox.put((request_id, json.dumps({"id": request_id, "tool": name, "args": kwargs}) + "\n"))
+        return future
+
+    def _write(self, outbox: queue.SimpleQueue[tuple[int, str] | None]) -> None:
+        stdin: IO[str] = self._process.stdin  # type: ignore[assignment]
+        while True:
+            item = outbox.get()
+            if item is None:
+                return
+            request_id, line = item
+            try:
+                stdin.write(line)
+                # Requests queued meanwhile go out with the same flush.
+                if outbox.empty():
+                    stdin.flush()
+            except (OSError, ValueError):
+                # The reader fails the rest once the process is gone.
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                if future is not None:
+                    future.set_exception(ConnectionError("Bank tool worker has exited"))
+
+    def _read(self) -> None:
+        stdout: IO[str] = self._process.stdout  # type: ignore[assignment]
+        for line in stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                future = self._pending.pop(reply.get("id"), None) if isinstance(reply, dict) else None
+            if future is None:
+                continue
+            if reply.get("ok"):
+                future.set_result(reply.get("result"))
+            else:
+                future.set_exception(ToolError(reply.get("error", "Tool call failed")))
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        self._outbox.put(None)
+        for future in pending.values():
+            future.set_exception(ConnectionError("Bank tool worker has exited"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._outbox.put(None)
+        self._writer.join(timeout=5)
+        try:
+            self._process.stdin.close()  # type: ignore[union-attr]
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._reader.join(timeout=5)
+
+
+class StdioPoolTransport:
+    """
+    Pool of pipelining worker processes.
+
+    Workers start on first use; each call goes to the worker with the fewest
+    calls in flight, and a worker that has exited is replaced. Starting
+    workers blocks, so ``acall`` does it in a worker thread.
+    """
+
+    name = "stdio"
+
+    def __init__(self, size: int = 2, command: list[str] | None = None, timeout: float = 30.0) -> None:
+        self._size = max(1, size)
+        self._command = command or [sys.executable, "-m", "mcp_server.server"]
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        # Serializes starting workers, which happens outside ``_lock``.
+        self._start_lock = threading.Lock()
+        self._workers: list[_StdioWorker] = []
+        self._calls = 0
+        self._restarts = 0
+
+    def _pick(self) -> _StdioWorker | None:
+        """The least busy worker, or None if workers need starting first."""
+        with self._lock:
+            if len(self._workers) < self._size or not all(worker.alive for worker in self._workers):
+                return None
+            return min(self._workers, key=lambda w: w.pending)
+
+    def _start_workers(self) -> _StdioWorker:
+        """Replace exited workers and fill the pool, then pick a worker."""
+        with self._start_lock:
+            with self._lock:
+                exited = sum(not worker.alive for worker in self._workers)
+                missing = self._size - len(self._workers) + exited
+            started = [_StdioWorker(self._command) for _ in range(max(0, missing))]
+            with self._lock:
+                self._workers = [worker for worker in self._workers if worker.alive] + started
+                self._restarts += exited
+                return min(self._workers, key=lambda w: w.pending)
+
+    def _submit(self, worker: _StdioWorker, name: str, kwargs: dict[str, Any]) -> Future:
+        with self._lock:
+            self._calls += 1
+        return worker.submit(name, kwargs)
+
+    def call(self, name: str, **kwargs: Any) -> Any:
+        worker = self._pick() or self._start_workers()
+        try:
+            return self._submit(worker, name, kwargs).result(timeout=self._timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Bank tool {name} timed out") from None
+
+    async def acall(self, name: str, **kwargs: Any) -> Any:
+        worker = self._pick() or await anyio.to_thread.run_sync(self._start_workers)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self._submit(worker, name, kwargs)), self._timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Bank tool {name} timed out") from None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "transport": self.name,
+                "workers": len(self._workers),
+                "size": self._size,
+                "calls": self._calls,
+                "inFlight": sum(worker.pending for worker in self._workers),
+                "restarts": self._restarts,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+def _result_from_content(content: list[dict] | None) -> Any:
+    if content is None:
+        raise ConnectionError("Bank MCP server returned no result")
+    text = next((item.get("text") for item in content if item.get("type") == "text"), None)
+    if text is None:
+        raise ConnectionError("Bank MCP server returned no text content")
+    # mcp_server.mcp_server reports tool failures as text, not JSON.
+    for prefix in ("Error: ", "Unexpected error: "):
+        if text.startswith(prefix):
+            raise ToolError(text[len(prefix):])
+    return json.loads(text)
+
+
+@contextmanager
+def _bank_server_errors() -> Iterator[None]:
+    try:
+        yield
+    except httpx.HTTPStatusError as exc:
+        raise ConnectionError(f"Bank MCP server returned HTTP {exc.response.status_code}") from exc
+    except httpx.HTTPError as exc:
+        raise ConnectionError(f"Bank MCP server unavailable: {exc}") from exc
+
+
+class HttpMcpTransport:
+    """MCP ``tools/call`` over streamable HTTP on pooled keep-alive clients."""
+
+    name = "http"
+
+    def __init__(
+        self,
+        settings: McpHttpSettings,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if not settings.enabled:
+            raise ValueError("BANK_MCP_URL is required for the http bank tools transport")
+        self._url: str = settings.url  # type: ignore[assignment]
+        self._clients = McpHttpClients(lambda: settings, transport, async_transport)
+
+    def call(self, name: str, **kwargs: Any) -> Any:
+        with _bank_server_errors():
+            content = self._clients.call_tool(self._url, name, kwargs)
+        return _result_from_content(content)
+
+    async def acall(self, name: str, **kwargs: Any) -> Any:
+        with _bank_server_errors():
+            content = await self._clients.acall_tool(self._url, name, kwargs)
+        return _result_from_content(content)
+
+    def stats(self) -> dict[str, Any]:
+        return {"transport": self.name, **self._clients.stats()}
+
+    def close(self) -> None:
+        self._clients.close()
+
+    async def aclose(self) -> None:
+        await self._clients.aclose()
+
+
+def get_bank_mcp_settings() -> McpHttpSettings:
+    """
+    Load the ``http`` transport's bank MCP server settings from the environment.
+
+    Environment variables:
+    - BANK_MCP_URL: MCP endpoint (e.g. http://localhost:3002/mcp)
+    - BANK_MCP_MAX_CONNECTIONS: Connection pool size (default 20)
+    - BANK_MCP_MAX_KEEPALIVE: Idle keep-alive connections kept open (default 10)
+    - BANK_MCP_KEEPALIVE_EXPIRY: Seconds an idle connection is kept (default 30)
+    - BANK_MCP_CONNECT_TIMEOUT: Seconds to establish a connection (default 5)
+    - BANK_TOOLS_TIMEOUT: Seconds to wait for a tool result (default 30)
+    """
+    return McpHttpSettings(
+        url=os.environ.get("BANK_MCP_URL", "").strip() or None,
+        max_connections=int(os.environ.get("BANK_MCP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.environ.get("BANK_MCP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.environ.get("BANK_MCP_KEEPALIVE_EXPIRY", "30")),
+        connect_timeout=float(os.environ.get("BANK_MCP_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.environ.get("BANK_TOOLS_TIMEOUT", "30")),
+    )
+
+
+def transport_from_env() -> ToolTransport:
+    """
+    Build the transport selected by the environment.
+
+    Environment variables:
+    - BANK_TOOLS_TRANSPORT: ``inprocess`` (default), ``stdio`` or ``http``
+    - BANK_TOOLS_TIMEOUT: Seconds to wait for a tool result (default 30)
+    - BANK_TOOLS_STDIO_WORKERS: Worker processes for ``stdio`` (default 2)
+    - BANK_MCP_*: the ``http`` transport's server (see get_bank_mcp_settings)
+    """
+    kind = os.environ.get("BANK_TOOLS_TRANSPORT", "inprocess").strip().lower()
+    if kind == "inprocess":
+        return InProcessTransport()
+    if kind == "stdio":
+        return StdioPoolTransport(
+            size=int(os.environ.get("BANK_TOOLS_STDIO_WORKERS", "2")),
+            timeout=float(os.environ.get("BANK_TOOLS_TIMEOUT", "30")),
+        )
+    if kind == "http":
+        return HttpMcpTransport(get_bank_mcp_settings())
+    raise ValueError(f"Unknown bank tools transport: {kind!r} (expected one of {TRANSPORTS})")
+
+
+_TRANSPORT: ToolTransport | None = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def get_bank_tools() -> ToolTransport:
+    """Return the process-wide bank tools transport, created on first use."""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            _TRANSPORT = transport_from_env()
+        return _TRANSPORT
+
+
+async def reset_bank_tools() -> None:
+    """Close the process-wide transport; the next call builds a fresh one."""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        transport, _TRANSPORT = _TRANSPORT, None
+    if transport is None:
+        return
+    aclose = getattr(transport, "aclose", None)
+    if aclose is not None:
+        await aclose()
+    else:
+        transport.close()
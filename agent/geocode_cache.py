@@ -0,0 +1,283 @@
+"""
+Geocode result cache.
+
+Merchant names repeat constantly across transactions, so geocodes are cached
+per normalized query (case- and whitespace-insensitive) instead of asking the
+map server (and thus Nominatim) every time:
+
+- TTL: found places are kept for ``ttl_seconds``.
+- Negative caching: queries the map server answered with no usable place
+  ("Online Purchase" and the like) are kept for the shorter
+  ``negative_ttl_seconds``. Transport failures are never cached.
+- LRU: at most ``max_entries`` queries are kept in memory.
+- Persistence: with a ``path`` the cache is also kept in a SQLite file, so a
+  restarted or cold node starts warm instead of hammering the upstream.
+  Writes are queued to a background writer thread, and ``aget`` reads the
+  file from a worker thread, so disk I/O never runs on the event loop. The
+  file keeps at most ``max_disk_entries`` rows, dropping expired rows and
+  then those expiring soonest.
+
+Expiry uses wall-clock time so persisted entries stay meaningful across
+restarts.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import anyio
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS geocode (query TEXT PRIMARY KEY, result TEXT, expires_at REAL NOT NULL)"
+# The writer trims the file to max_disk_entries after this many writes.
+_PRUNE_EVERY = 256
+# Queued in place of a write to empty the table.
+_CLEAR = object()
+
+_Entry = tuple[dict[str, Any] | None, float]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+class GeocodeCache:
+    """LRU/TTL-bounded geocode results, optionally persisted to SQLite."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = 86400.0,
+        negative_ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        path: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._max_disk_entries = max(1, max_disk_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Guards the connection, which readers and the writer share.
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._writes: queue.SimpleQueue[Any] | None = None
+        self._writer: threading.Thread | None = None
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            with self._db:
+                self._db.execute(_SCHEMA)
+            self._prune()
+            self._writes = queue.SimpleQueue()
+            self._writer = threading.Thread(
+                target=self._write_behind, args=(self._writes,), name="geocode-cache-writer", daemon=True
+            )
+            self._writer.start()
+
+    @classmethod
+    def from_env(cls) -> "GeocodeCache":
+        """
+        Environment variables:
+        - GEOCODE_CACHE_TTL_SECONDS: lifetime of a found place (default 86400)
+        - GEOCODE_CACHE_NEGATIVE_TTL_SECONDS: lifetime of a "no such place" answer (default 3600)
+        - GEOCODE_CACHE_MAX_ENTRIES: queries kept in memory (default 1024)
+        - GEOCODE_CACHE_MAX_DISK_ENTRIES: queries kept in the SQLite file (default 100000)
+        - GEOCODE_CACHE_PATH: SQLite file to persist the cache to (unset = memory only)
+        """
+        return cls(
+            ttl_seconds=float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", "86400")),
+            negative_ttl_seconds=float(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "1024")),
+            max_disk_entries=int(os.getenv("GEOCODE_CACHE_MAX_DISK_ENTRIES", "100000")),
+            path=os.getenv("GEOCODE_CACHE_PATH") or None,
+        )
+
+    def _load(self, key: str) -> _Entry | None:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT result, expires_at FROM geocode WHERE query = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        result, expires_at = row
+        return (json.loads(result) if result is not None else None), expires_at
+
+    def _prune(self) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            with self._db:
+                self._db.execute("DELETE FROM geocode WHERE expires_at <= ?", (self._clock(),))
+                self._db.execute(
+                    "DELETE FROM geocode WHERE query IN "
+                    "(SELECT query FROM geocode ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self._max_disk_entries,),
+                )
+
+    def _write_behind(self, writes_queue: queue.SimpleQueue[Any]) -> None:
+        """Writer thread: apply queued writes, a batch per transaction."""
+        written = 0
+        while True:
+            batch = [writes_queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(writes_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            writes = batch[:-1] if stop else batch
+            try:
+                with self._db_lock:
+                    assert self._db is not None
+                    with self._db:
+                        for write in writes:
+                            if write is _CLEAR:
+                                self._db.execute("DELETE FROM geocode")
+                                continue
+                            key, result, expires_at = write
+                            self._db.execute(
+                                "INSERT OR REPLACE INTO geocode (query, result, expires_at) VALUES (?, ?, ?)",
+                                (key, json.dumps(result) if result is not None else None, expires_at),
+                            )
+                if written // _PRUNE_EVERY != (written + len(writes)) // _PRUNE_EVERY:
+                    self._prune()
+            except sqlite3.Error:
+                # Persistence is best effort; the in-memory cache still works.
+                pass
+            written += len(writes)
+            if stop:
+                return
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _answer(self, key: str, entry: _Entry | None, now: float) -> tuple[bool, dict[str, Any] | None]:
+        # Called with the lock held.
+        if entry is None or entry[1] <= now:
+            self._entries.pop(key, None)
+            self._misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        result = entry[0]
+        if result is None:
+            self._negative_hits += 1
+            return True, None
+        self._hits += 1
+        return True, dict(result)
+
+    def _from_memory(self, key: str, now: float) -> tuple[bool, dict[str, Any] | None] | None:
+        """Answer from memory, or None when the SQLite file must be read."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                return None
+            return self._answer(key, entry, now)
+
+    def _from_disk(self, key: str, entry: _Entry | None, now: float) -> tuple[bool, dict[str, Any] | None]:
+        with self._lock:
+            if entry is not None and entry[1] > now and key not in self._entries:
+                self._remember(key, entry)
+            return self._answer(key, self._entries.get(key), now)
+
+    def get(self, query: str) -> tuple[bool, dict[str, Any] | None]:
+        """
+        Look up a query.
+
+        Returns ``(True, result)`` on a hit, where ``result`` is None for a
+        cached negative answer, and ``(False, None)`` on a miss.
+        """
+        key = normalize_query(query)
+        now = self._clock()
+        answer = self._from_memory(key, now)
+        if answer is None:
+            answer = self._from_disk(key, self._load(key), now)
+        return answer
+
+    async def aget(self, query: str) -> tuple[bool, dict[str, Any] | None]:
+        """Async counterpart of get; the SQLite file is read in a worker thread."""
+        key = normalize_query(query)
+        now = self._clock()
+        answer = self._from_memory(key, now)
+        if answer is None:
+            answer = self._from_disk(key, await anyio.to_thread.run_sync(self._load, key), now)
+        return answer
+
+    def put(self, query: str, result: dict[str, Any] | None) -> None:
+        """Cache the map server's answer; None means "no such place"."""
+        key = normalize_query(query)
+        ttl = self._ttl if result is not None else self._negative_ttl
+        if ttl <= 0:
+            return
+        entry = (dict(result) if result is not None else None, self._clock() + ttl)
+        with self._lock:
+            self._remember(key, entry)
+            if self._writes is not None:
+                self._writes.put((key, *entry))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._writes is not None:
+                self._writes.put(_CLEAR)
+
+    def close(self) -> None:
+        """Flush queued writes and close the SQLite file."""
+        with self._lock:
+            writes, writer, self._writes, self._writer = self._writes, self._writer, None, None
+        if writes is not None and writer is not None:
+            writes.put(None)
+            writer.join()
+        with self._db_lock:
+            db, self._db = self._db, None
+        if db is not None:
+            db.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self._max_entries,
+                "hits": self._hits,
+                "negativeHits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "persistent": self._db is not None,
+            }
+
+
+_CACHE: GeocodeCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """Return the process-wide geocode cache, creating it on first use."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = GeocodeCache.from_env()
+        return _CACHE
+
+
+def reset_geocode_cache() -> None:
+    """Drop the process-wide cache; the next get_geocode_cache() starts fresh."""
+    global _CACHE
+    with _CACHE_LOCK:
+        cache, _CACHE = _CACHE, None
+    if cache is not None:
+        cache.close()
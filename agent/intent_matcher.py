@@ -0,0 +1,138 @@
+"""
+Compiled keyword matching for the deterministic runtime.
+
+Intent routing and merchant lookup both ask which words of a vocabulary
+occur in a message, with plain substring semantics (``"card" in message``).
+Testing the words one by one costs time proportional to the vocabulary.
+``KeywordMatcher`` instead compiles the vocabulary once into a trie-shaped
+regular expression that is tried at every position of the message inside a
+lookahead, so a single pass reports every occurring word. The cost per
+message then depends on the message and the trie's depth and fan-out, not
+on the number of words.
+
+At each position the trie matches only the longest word. Every word a
+longer word contains is bound to occur too, so the matcher folds the tags
+of contained words into the longer word's tags when it is built.
+
+Micro-benchmark against per-word ``in`` tests (from the repository root)::
+
+    python -m agent.intent_matcher --sizes 10 100 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from typing import Any, Generic, Hashable, Mapping, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+_Trie = dict[str, Any]
+# Marks the end of a word in a trie node; never a single character.
+_END = ""
+
+
+def _trie_pattern(node: _Trie) -> str:
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # Greedy, so the longest word starting at a position wins.
+    return f"(?:{body})?" if _END in node else body
+
+
+class KeywordMatcher(Generic[T]):
+    """Finds every keyword of a fixed vocabulary in a text in one pass."""
+
+    def __init__(self, keywords: Mapping[str, T]) -> None:
+        trie: _Trie = {}
+        for word in keywords:
+            if not word:
+                raise ValueError("Keywords must not be empty")
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[_END] = True
+        self._tags: dict[str, frozenset[T]] = {
+            word: frozenset(keywords[w] for w in self._words_in(trie, word)) for word in keywords
+        }
+        self._pattern = re.compile(f"(?=({_trie_pattern(trie)}))") if trie else None
+
+    @staticmethod
+    def _words_in(trie: _Trie, text: str) -> set[str]:
+        """Every vocabulary word occurring in ``text``, by walking the trie."""
+        found = set()
+        for start in range(len(text)):
+            node = trie
+            for end in range(start, len(text)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                if _END in node:
+                    found.add(text[start:end + 1])
+        return found
+
+    def find(self, text: str) -> set[T]:
+        """Tags of all keywords occurring in ``text`` (matched case-sensitively)."""
+        found: set[T] = set()
+        if self._pattern is None:
+            return found
+        for match in self._pattern.finditer(text):
+            found |= self._tags[match.group(1)]
+        return found
+
+
+def _random_words(rng: random.Random, count: int) -> list[str]:
+    words: set[str] = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))))
+    return sorted(words)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time KeywordMatcher against per-word substring tests.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="vocabulary sizes to time")
+    parser.add_argument("--messages", type=int, default=2000, help="messages matched per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    templates = [
+        "where did i shop at {} last week?",
+        "show me my {} transactions",
+        "how much did i spend on my credit card",
+        "show my accounts overview",
+    ]
+    print(f"{'words':>8} {'build ms':>10} {'matcher us/msg':>16} {'in-tests us/msg':>16}")
+    for size in args.sizes:
+        vocabulary = _random_words(rng, size)
+        messages = [rng.choice(templates).format(rng.choice(vocabulary)) for _ in range(args.messages)]
+
+        started = time.perf_counter()
+        matcher = KeywordMatcher({word: word for word in vocabulary})
+        built = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compiled = [matcher.find(message) for message in messages]
+        matched = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scanned = [{word for word in vocabulary if word in message} for message in messages]
+        tested = time.perf_counter() - started
+
+        if compiled != scanned:
+            print(f"mismatch at {size} words", file=sys.stderr)
+            return 1
+        print(
+            f"{size:>8} {built * 1e3:>10.1f} {matched / len(messages) * 1e6:>16.2f} "
+            f"{tested / len(messages) * 1e6:>16.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
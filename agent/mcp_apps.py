@@ -3,6 +3,7 @@ MCP-Apps configuration and client functions.
 
 This module provides:
 - Configuration loading for external MCP-App connections
+- Pooled keep-alive HTTP clients for the map server, owned by the app lifecycle
 - Client functions for calling the map-server MCP tools
 
 The map server is @modelcontextprotocol/server-map — an open-source CesiumJS +
@@ -12,9 +13,7 @@ and exposes two tools via MCP JSON-RPC:
   - show-map: displays a 3D CesiumJS globe (not used; we render in Flutter)
 
 Wire protocol notes:
-  - The server uses StreamableHTTP transport; the Accept header MUST include
-    both "application/json" and "text/event-stream" or the server returns 406.
-  - Responses are SSE-formatted: lines of "event: ...\ndata: <json>\n\n".
+  - The server uses StreamableHTTP transport, spoken by agent.mcp_http.
   - The geocode tool returns human-readable text content, not JSON:
       "1. Place Name, Address\n   Coordinates: lat, lon\n   Bounding box: ..."
 """
@@ -27,6 +26,10 @@ from typing import Any
 
 import httpx
 
+from agent.geocode_cache import get_geocode_cache, normalize_query
+from agent.mcp_http import McpHttpClients, McpHttpSettings
+from agent.single_flight import AsyncSingleFlight, SingleFlight
+
 _COORDS_RE = re.compile(r"Coordinates:\s*([-\d.]+),\s*([-\d.]+)")
 _FIRST_NAME_RE = re.compile(r"^\d+\.\s+(.+?)(?:\s{2,}|\n|$)", re.MULTILINE)
 _BBOX_RE = re.compile(r"Bounding box: W:([-\d.]+), S:([-\d.]+), E:([-\d.]+), N:([-\d.]+)")
@@ -37,6 +40,11 @@ class McpAppsConfig:
     """Configuration for MCP-App connections."""
 
     map_server_url: str | None
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
 
     @property
     def map_server_enabled(self) -> bool:
@@ -52,6 +60,11 @@ def get_mcp_apps_config() -> McpAppsConfig:
     - MAP_SERVER_URL: Full MCP endpoint URL for the map server
                       (e.g., http://localhost:3001/mcp)
                       Leave unset to disable the map server integration.
+    - MAP_SERVER_MAX_CONNECTIONS: Connection pool size (default 20)
+    - MAP_SERVER_MAX_KEEPALIVE: Idle keep-alive connections kept open (default 10)
+    - MAP_SERVER_KEEPALIVE_EXPIRY: Seconds an idle connection is kept (default 30)
+    - MAP_SERVER_CONNECT_TIMEOUT: Seconds to establish a connection (default 5)
+    - MAP_SERVER_READ_TIMEOUT: Seconds to wait for response data (default 30)
 
     Returns:
         McpAppsConfig with loaded settings
@@ -63,7 +76,49 @@ def get_mcp_apps_config() -> McpAppsConfig:
     else:
         url = url.strip()
 
-    return McpAppsConfig(map_server_url=url)
+    return McpAppsConfig(
+        map_server_url=url,
+        max_connections=int(os.environ.get("MAP_SERVER_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.environ.get("MAP_SERVER_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.environ.get("MAP_SERVER_KEEPALIVE_EXPIRY", "30")),
+        connect_timeout=float(os.environ.get("MAP_SERVER_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.environ.get("MAP_SERVER_READ_TIMEOUT", "30")),
+    )
+
+
+class MapServerClients(McpHttpClients):
+    """
+    Shared HTTP clients for the map server.
+
+    Pool limits and timeouts come from McpAppsConfig (see get_mcp_apps_config).
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        super().__init__(_map_server_settings, transport, async_transport)
+
+
+def _map_server_settings() -> McpHttpSettings:
+    config = get_mcp_apps_config()
+    return McpHttpSettings(
+        url=config.map_server_url,
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+        connect_timeout=config.connect_timeout,
+        read_timeout=config.read_timeout,
+    )
+
+
+_CLIENTS = MapServerClients()
+
+
+def get_map_server_clients() -> MapServerClients:
+    """Return the process-wide map server clients."""
+    return _CLIENTS
 
 
 def call_map_server_tool(tool_name: str, **kwargs: Any) -> list[dict] | None:
@@ -71,9 +126,11 @@ def call_map_server_tool(tool_name: str, **kwargs: Any) -> list[dict] | None:
     Call a tool on the map-server via MCP JSON-RPC over HTTP.
 
     The map-server uses StreamableHTTPServerTransport at /mcp. The Accept header
-    must include both application/json and text/event-stream; the server always
-    responds in SSE format. We parse the first "data:" line as the JSON-RPC
-    response and return the result.content list.
+    must include both application/json and text/event-stream; the server
+    normally responds in SSE format. Requests go through the shared keep-alive
+    client from get_map_server_clients(). The SSE stream is parsed as it
+    arrives and reading stops as soon as the JSON-RPC response to our request
+    has been received; its result.content list is returned.
 
     Args:
         tool_name: MCP tool name ('geocode' or 'show-map')
@@ -89,123 +146,38 @@ def call_map_server_tool(tool_name: str, **kwargs: Any) -> list[dict] | None:
         return None
 
     try:
-        import json as _json
-
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": kwargs,
-            },
-        }
-
-        response = httpx.post(
-            config.map_server_url,
-            json=payload,
-            headers={
-                "Content-Type": "application/json",
-                # Both required — server returns 406 without text/event-stream
-                "Accept": "application/json, text/event-stream",
-            },
-            timeout=30.0,
-        )
-
-        if response.status_code != 200:
-            return None
-
-        # Response is SSE: parse "data: <json>" lines
-        for line in response.text.splitlines():
-            line = line.strip()
-            if not line.startswith("data:"):
-                continue
-            try:
-                data = _json.loads(line[len("data:"):].strip())
-            except ValueError:
-                continue
-            result = data.get("result", {})
-            content = result.get("content")
-            if isinstance(content, list):
-                return content
-
-        return None
-
+        return get_map_server_clients().call_tool(config.map_server_url, tool_name, kwargs)
     except Exception:
         return None
 
 
-def geocode_merchant(query: str) -> dict[str, Any] | None:
+async def acall_map_server_tool(tool_name: str, **kwargs: Any) -> list[dict] | None:
     """
-    Geocode a merchant name to get location coordinates.
+    Async counterpart of call_map_server_tool.
 
-    Calls the map-server's 'geocode' tool, which uses OpenStreetMap Nominatim.
-    Results are returned as formatted human-readable text:
-        "1. Place Name, Address
-           Coordinates: lat, lon
-           Bounding box: W:x, S:y, E:z, N:w"
-
-    We extract the first result's coordinates using a regex on the text.
-
-    Args:
-        query: Merchant name or address to geocode
-
-    Returns:
-        Dict with 'latitude', 'longitude', 'label' if successful, else None.
-        Returns None if:
-        - Map server is not configured
-        - Geocode call fails or times out
-        - Response contains no coordinate data
-        - Coordinates are out of valid range
+    Awaits the map server instead of blocking the event loop; same return
+    values and failure behaviour.
     """
-    content = call_map_server_tool("geocode", query=query)
+    config = get_mcp_apps_config()
 
-    if not content:
+    if not config.map_server_enabled:
         return None
 
-    for item in content:
-        if not isinstance(item, dict) or item.get("type") != "text":
-            continue
-
-        text = item.get("text", "")
-
-        m = _COORDS_RE.search(text)
-        if not m:
-            continue
-
-        try:
-            lat = float(m.group(1))
-            lon = float(m.group(2))
-        except ValueError:
-            continue
-
-        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-            continue
-
-        name_m = _FIRST_NAME_RE.search(text)
-        label = name_m.group(1).strip() if name_m else query
-
-        return {"latitude": lat, "longitude": lon, "label": label}
-
-    return None
+    try:
+        return await get_map_server_clients().acall_tool(config.map_server_url, tool_name, kwargs)
+    except Exception:
+        return None
 
 
-def geocode_with_bbox(query: str) -> dict[str, Any] | None:
+def _parse_geocode(content: list[dict] | None, query: str) -> dict[str, Any] | None:
     """
-    Geocode a merchant name to get location coordinates and bounding box.
+    Extract the first valid result from geocode tool content.
 
-    Like geocode_merchant but also returns the bounding box for use with the
-    map server's show-map tool (west/south/east/north in decimal degrees).
-
-    Args:
-        query: Merchant name or address to geocode
-
-    Returns:
-        Dict with 'latitude', 'longitude', 'label', 'west', 'south', 'east',
-        'north' if successful, else None.
+    Returns a dict with 'latitude', 'longitude', 'label', 'west', 'south',
+    'east', 'north', or None if no text item has in-range coordinates.
+    Without a "Bounding box:" line the box falls back to ±0.01° around the
+    point.
     """
-    content = call_map_server_tool("geocode", query=query)
-
     if not content:
         return None
 
@@ -254,3 +226,102 @@ def geocode_with_bbox(query: str) -> dict[str, Any] | None:
         }
 
     return None
+
+
+def _point_only(result: dict[str, Any] | None) -> dict[str, Any] | None:
+    if result is None:
+        return None
+    return {"latitude": result["latitude"], "longitude": result["longitude"], "label": result["label"]}
+
+
+def geocode_merchant(query: str) -> dict[str, Any] | None:
+    """
+    Geocode a merchant name to get location coordinates.
+
+    Calls the map-server's 'geocode' tool, which uses OpenStreetMap Nominatim.
+    Results are returned as formatted human-readable text:
+        "1. Place Name, Address
+           Coordinates: lat, lon
+           Bounding box: W:x, S:y, E:z, N:w"
+
+    We extract the first result's coordinates using a regex on the text.
+
+    Args:
+        query: Merchant name or address to geocode
+
+    Returns:
+        Dict with 'latitude', 'longitude', 'label' if successful, else None.
+        Returns None if:
+        - Map server is not configured
+        - Geocode call fails or times out
+        - Response contains no coordinate data
+        - Coordinates are out of valid range
+    """
+    return _point_only(geocode_with_bbox(query))
+
+
+def _cached_geocode(query: str, content: list[dict] | None) -> dict[str, Any] | None:
+    result = _parse_geocode(content, query)
+    # None content means the map server was unreachable or disabled; only a
+    # real answer (including "no such place") is worth remembering.
+    if content is not None:
+        get_geocode_cache().put(query, result)
+    return result
+
+
+# Concurrent lookups of one merchant (e.g. many users tapping the same
+# transaction) share a single in-flight map server request.
+_GEOCODE_FLIGHTS = SingleFlight()
+_AGEOCODE_FLIGHTS = AsyncSingleFlight()
+
+
+def geocode_flight_stats() -> dict[str, Any]:
+    """Coalescing counters for the sync and async geocode paths."""
+    return {"sync": _GEOCODE_FLIGHTS.stats(), "async": _AGEOCODE_FLIGHTS.stats()}
+
+
+def _copy(result: dict[str, Any] | None) -> dict[str, Any] | None:
+    # Coalesced callers share the leader's result; give each its own dict.
+    return dict(result) if result is not None else None
+
+
+def geocode_with_bbox(query: str) -> dict[str, Any] | None:
+    """
+    Geocode a merchant name to get location coordinates and bounding box.
+
+    Like geocode_merchant but also returns the bounding box for use with the
+    map server's show-map tool (west/south/east/north in decimal degrees).
+    Answers are served from the geocode cache when possible, and concurrent
+    lookups of the same query share one map server request.
+
+    Args:
+        query: Merchant name or address to geocode
+
+    Returns:
+        Dict with 'latitude', 'longitude', 'label', 'west', 'south', 'east',
+        'north' if successful, else None.
+    """
+    def lookup() -> dict[str, Any] | None:
+        # Re-checked here: a call that just finished may have filled the cache.
+        hit, result = get_geocode_cache().get(query)
+        if hit:
+            return result
+        return _cached_geocode(query, call_map_server_tool("geocode", query=query))
+
+    return _copy(_GEOCODE_FLIGHTS.do(normalize_query(query), lookup))
+
+
+async def ageocode_merchant(query: str) -> dict[str, Any] | None:
+    """Async counterpart of geocode_merchant."""
+    return _point_only(await ageocode_with_bbox(query))
+
+
+async def ageocode_with_bbox(query: str) -> dict[str, Any] | None:
+    """Async counterpart of geocode_with_bbox."""
+    async def lookup() -> dict[str, Any] | None:
+        hit, result = await get_geocode_cache().aget(query)
+        if hit:
+            return result
+        return _cached_geocode(query, await acall_map_server_tool("geocode", query=query))
+
+    return _copy(await _AGEOCODE_FLIGHTS.do(normalize_query(query), lookup))
@@ -0,0 +1,308 @@
+"""
+MCP ``tools/call`` over streamable HTTP on pooled keep-alive clients.
+
+Used for every MCP server the agent reaches over HTTP: the map server (see
+``agent.mcp_apps``) and the bank tools ``http`` transport (see
+``agent.bank_tools``). Each gets its own ``McpHttpClients`` with its own
+``McpHttpSettings``.
+
+Wire protocol notes:
+  - The Accept header MUST include both "application/json" and
+    "text/event-stream" or a StreamableHTTP server returns 406.
+  - Replies are either one JSON-RPC message ("application/json") or an SSE
+    stream of them: lines of "event: ...\ndata: <json>\n\n". The stream is
+    parsed as it arrives and reading stops at the response to our request.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import httpx
+
+_MCP_HEADERS = {
+    "Content-Type": "application/json",
+    # Both required — server returns 406 without text/event-stream
+    "Accept": "application/json, text/event-stream",
+}
+
+# Each tool call is its own HTTP exchange, so a fixed JSON-RPC id suffices to
+# pick our response out of the stream.
+_REQUEST_ID = 1
+
+
+@dataclass(frozen=True)
+class McpHttpSettings:
+    """Endpoint and connection pool settings for one MCP server."""
+
+    url: str | None
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+
+    @property
+    def enabled(self) -> bool:
+        """The server is enabled if its URL is set and non-empty."""
+        return bool(self.url and self.url.strip())
+
+
+def tool_call_payload(tool_name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    """The JSON-RPC ``tools/call`` request for one tool call."""
+    return {
+        "jsonrpc": "2.0",
+        "id": _REQUEST_ID,
+        "method": "tools/call",
+        "params": {
+            "name": tool_name,
+            "arguments": arguments,
+        },
+    }
+
+
+def _content_from_message(data: Any) -> tuple[bool, list[dict] | None]:
+    """
+    Inspect one JSON-RPC message from the server.
+
+    Returns ``(done, content)``: done is True once the response to our request
+    has been seen, with content being its result.content list (or None for an
+    error or a result without content). Notifications and other messages are
+    skipped.
+    """
+    if not isinstance(data, dict) or data.get("id", _REQUEST_ID) != _REQUEST_ID:
+        return False, None
+    if "result" not in data and "error" not in data:
+        return False, None
+    result = data.get("result")
+    content = result.get("content") if isinstance(result, dict) else None
+    return True, content if isinstance(content, list) else None
+
+
+class SseToolResultReader:
+    """
+    Incremental SSE parser that stops at our JSON-RPC response.
+
+    Lines are fed one at a time as they arrive. ``data:`` lines accumulate
+    until the blank line that ends an event (multi-line data is joined with
+    newlines, per the SSE spec); each complete event is decoded as JSON-RPC.
+    ``feed`` returns ``(done, content)`` so the caller can stop reading the
+    stream as soon as our result has arrived.
+    """
+
+    def __init__(self) -> None:
+        self._data: list[str] = []
+
+    def feed(self, line: str) -> tuple[bool, list[dict] | None]:
+        line = line.rstrip("\r\n")
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return False, None
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return False, None
+
+    def finish(self) -> list[dict] | None:
+        """Dispatch a final event left unterminated by the end of the stream."""
+        return self._dispatch()[1]
+
+    def _dispatch(self) -> tuple[bool, list[dict] | None]:
+        if not self._data:
+            return False, None
+        payload, self._data = "\n".join(self._data), []
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return False, None
+        return _content_from_message(data)
+
+
+def _is_json(response: httpx.Response) -> bool:
+    return response.headers.get("content-type", "").startswith("application/json")
+
+
+def _content_from_json(body: bytes) -> list[dict] | None:
+    try:
+        return _content_from_message(json.loads(body))[1]
+    except ValueError:
+        return None
+
+
+def _check_status(response: httpx.Response) -> None:
+    if response.status_code != 200:
+        raise httpx.HTTPStatusError(
+            f"MCP server returned HTTP {response.status_code}", request=response.request, response=response
+        )
+
+
+def _pool_stats(client: httpx.Client | httpx.AsyncClient | None) -> dict[str, int]:
+    # httpx does not expose its connection pool publicly; report what the
+    # default transport's httpcore pool shows and degrade to zeros otherwise.
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", None) or [])
+    idle = 0
+    for connection in connections:
+        try:
+            idle += bool(connection.is_idle())
+        except Exception:
+            pass
+    return {"connections": len(connections), "idleConnections": idle}
+
+
+class McpHttpClients:
+    """
+    Shared HTTP clients for one MCP server.
+
+    One blocking and one async client, created on first use with the pool
+    limits and per-phase timeouts from ``settings()``, and reused for every
+    call so tool calls ride on kept-alive connections instead of paying a
+    TCP/TLS handshake each. The async client is bound to the event loop it
+    was created on and is rebuilt if used from a different loop.
+    """
+
+    def __init__(
+        self,
+        settings: Callable[[], McpHttpSettings],
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._settings = settings
+        self._transport = transport
+        self._async_transport = async_transport
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    def _client_options(self) -> dict[str, Any]:
+        settings = self._settings()
+        return {
+            "limits": httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(
+                connect=settings.connect_timeout,
+                read=settings.read_timeout,
+                write=settings.read_timeout,
+                pool=settings.connect_timeout,
+            ),
+            "headers": _MCP_HEADERS,
+        }
+
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(transport=self._transport, **self._client_options())
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async_client is None or self._async_loop is not loop:
+                # A client from a finished loop holds dead connections; it is
+                # dropped rather than closed since its loop is gone.
+                self._async_client = httpx.AsyncClient(transport=self._async_transport, **self._client_options())
+                self._async_loop = loop
+            return self._async_client
+
+    def _begin(self) -> None:
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _end(self, ok: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not ok:
+                self._errors += 1
+
+    def call_tool(self, url: str, tool_name: str, arguments: dict[str, Any]) -> list[dict] | None:
+        """
+        Call a tool on the server at ``url``.
+
+        Returns the result.content list of the JSON-RPC response, or None if
+        the response has no content (including JSON-RPC errors). Raises
+        ``httpx.HTTPError`` if the request fails or the reply is not HTTP 200.
+        """
+        self._begin()
+        ok = False
+        try:
+            with self.client().stream("POST", url, json=tool_call_payload(tool_name, arguments)) as response:
+                _check_status(response)
+                ok = True
+                if _is_json(response):
+                    return _content_from_json(response.read())
+                reader = SseToolResultReader()
+                for line in response.iter_lines():
+                    done, content = reader.feed(line)
+                    if done:
+                        return content
+                return reader.finish()
+        except httpx.HTTPError:
+            ok = False
+            raise
+        finally:
+            self._end(ok)
+
+    async def acall_tool(self, url: str, tool_name: str, arguments: dict[str, Any]) -> list[dict] | None:
+        """Async counterpart of call_tool."""
+        self._begin()
+        ok = False
+        try:
+            async with self.async_client().stream(
+                "POST", url, json=tool_call_payload(tool_name, arguments)
+            ) as response:
+                _check_status(response)
+                ok = True
+                if _is_json(response):
+                    return _content_from_json(await response.aread())
+                reader = SseToolResultReader()
+                async for line in response.aiter_lines():
+                    done, content = reader.feed(line)
+                    if done:
+                        return content
+                return reader.finish()
+        except httpx.HTTPError:
+            ok = False
+            raise
+        finally:
+            self._end(ok)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = {
+                "requests": self._requests,
+                "errors": self._errors,
+                "inFlight": self._in_flight,
+                "peakInFlight": self._peak_in_flight,
+            }
+            client, async_client = self._client, self._async_client
+        stats["sync"] = _pool_stats(client)
+        stats["async"] = _pool_stats(async_client)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        with self._lock:
+            client, self._async_client = self._async_client, None
+            loop, self._async_loop = self._async_loop, None
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.aclose()
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import functools
 import json
 import os
+import re
+import threading
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
-from typing import Any, Protocol
+from typing import Any, AsyncIterator, Callable, Generator, Iterator, Protocol, Union
 
-from mcp_server.server import call_tool
-from agent.mcp_apps import geocode_with_bbox, get_mcp_apps_config
+import anyio
+
+from agent.bank_tools import get_bank_tools
+from agent.intent_matcher import KeywordMatcher
+from agent.mcp_apps import ageocode_with_bbox, geocode_with_bbox, get_mcp_apps_config
+from agent.sessions import SessionStore
+from agent.tool_cache import get_tool_cache
 
 
 @dataclass(frozen=True)
@@ -16,34 +25,223 @@ class RuntimeResponse:
     data: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class TextDelta:
+    """Streamed piece of the response text, ahead of the final RuntimeResponse."""
+
+    text: str
+
+
+@dataclass(frozen=True)
+class TemplateHint:
+    """
+    The template the response will most likely use, known before its data.
+
+    Lets the caller send the template's static surface while tools run. The
+    final response may still use another template (e.g. a fallback).
+    """
+
+    template_name: str
+
+
+# What ``astream`` yields: any number of progress events, then the response.
+RuntimeEvent = Union[TextDelta, TemplateHint, RuntimeResponse]
+
+
 class AgentRuntime(Protocol):
-    def run(self, message: str) -> RuntimeResponse:
+    # Whether one instance may serve concurrent requests. Runtimes that are
+    # not thread-safe are handed out exclusively by RuntimePool.
+    thread_safe: bool
+
+    def warm_up(self) -> None:
+        ...
+
+    def run(self, message: str, context_id: str | None = None) -> RuntimeResponse:
+        ...
+
+    async def arun(self, message: str, context_id: str | None = None) -> RuntimeResponse:
+        ...
+
+    def astream(self, message: str, context_id: str | None = None) -> AsyncIterator[RuntimeEvent]:
         ...
 
 
+def call_tool(name: str, **kwargs: Any) -> Any:
+    """
+    Call a bank tool through the configured transport (see agent.bank_tools),
+    reusing a cached result when there is one (see agent.tool_cache).
+
+    In-process tools are not cached: the lookup itself is cheaper than
+    building a cache key and copying a hit.
+    """
+    tools = get_bank_tools()
+    if tools.name == "inprocess":
+        return tools.call(name, **kwargs)
+    cache = get_tool_cache()
+    generation = cache.generation
+    hit, result = cache.get(name, kwargs)
+    if hit:
+        return result
+    result = tools.call(name, **kwargs)
+    cache.put(name, kwargs, result, generation)
+    return result
+
+
+async def acall_tool(name: str, **kwargs: Any) -> Any:
+    """
+    Async counterpart of call_tool.
+
+    In-process tools are CPU-only dictionary lookups, so they are called
+    inline rather than paying for a thread hop; remote transports are awaited.
+    """
+    tools = get_bank_tools()
+    if tools.name == "inprocess":
+        return tools.call(name, **kwargs)
+    cache = get_tool_cache()
+    generation = cache.generation
+    hit, result = cache.get(name, kwargs)
+    if hit:
+        return result
+    result = await tools.acall(name, **kwargs)
+    cache.put(name, kwargs, result, generation)
+    return result
+
+
+class _ToolCall:
+    """I/O step: call a bank tool."""
+
+    def __init__(self, name: str, **kwargs: Any) -> None:
+        self.name = name
+        self.kwargs = kwargs
+
+
+@dataclass(frozen=True)
+class _Geocode:
+    """I/O step: geocode a merchant on the map server."""
+
+    query: str
+
+
+Steps = Generator["_ToolCall | _Geocode | TemplateHint", Any, RuntimeResponse]
+
+# Keyword -> signal; _intent turns the signals present in a message into an
+# intent. Keywords match as substrings of the lowercased message.
+_INTENT_MATCHER = KeywordMatcher({
+    "where": "location",
+    "location": "location",
+    "map": "location",
+    "show me": "show_me",
+    "shopped": "spending",
+    "spent": "spending",
+    "purchase": "spending",
+    "mortgage": "mortgage",
+    "credit": "credit",
+    "card": "credit",
+    "savings": "savings",
+    "transaction": "transactions",
+    "detail": "account_detail",
+    "all account": "overview",
+    "my account": "overview",
+    "accounts": "overview",
+    "overview": "overview",
+    "account": "account",
+})
+
+# Single-signal intents, by precedence.
+_INTENT_ORDER = (
+    ("mortgage", "mortgage"),
+    ("credit", "credit"),
+    ("savings", "savings"),
+    ("transactions", "transactions"),
+    ("account_detail", "account_detail"),
+    ("overview", "overview"),
+    ("account", "account_detail"),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _merchant_matcher(descriptions: tuple[str, ...]) -> KeywordMatcher[int]:
+    """Matcher from the description words (longer than 3 characters) to the first transaction using them."""
+    first_use: dict[str, int] = {}
+    for index, description in enumerate(descriptions):
+        for word in description.lower().split():
+            if len(word) > 3:
+                first_use.setdefault(word, index)
+    return KeywordMatcher(first_use)
+
+
 class DeterministicRuntime:
+    """
+    Keyword-routed runtime over the bank tools.
+
+    The routing logic (``_steps``) never performs I/O itself; it yields
+    _ToolCall/_Geocode steps and is resumed with their results. ``run``
+    drives it with blocking calls and ``astream`` (and so ``arun``) with
+    awaitable ones, so both share a single implementation. Once the intent
+    is known it also yields a TemplateHint, which ``astream`` passes on.
+    """
+
+    thread_safe = True
+
+    def warm_up(self) -> None:
+        """Nothing to prepare; the runtime is stateless."""
+
+    def run(self, message: str, context_id: str | None = None) -> RuntimeResponse:
+        steps = self._steps(message)
+        reply: Any = None
+        error: Exception | None = None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            reply, error = None, None
+            if isinstance(step, TemplateHint):
+                continue
+            try:
+                if isinstance(step, _Geocode):
+                    reply = geocode_with_bbox(step.query)
+                else:
+                    reply = call_tool(step.name, **step.kwargs)
+            except Exception as exc:
+                error = exc
+
+    async def arun(self, message: str, context_id: str | None = None) -> RuntimeResponse:
+        async for event in self.astream(message, context_id):
+            pass
+        return event
+
+    async def astream(self, message: str, context_id: str | None = None) -> AsyncIterator[RuntimeEvent]:
+        """Like arun, but yields a TemplateHint before the tools are called."""
+        steps = self._steps(message)
+        reply: Any = None
+        error: Exception | None = None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as stop:
+                yield stop.value
+                return
+            reply, error = None, None
+            if isinstance(step, TemplateHint):
+                yield step
+                continue
+            try:
+                if isinstance(step, _Geocode):
+                    reply = await ageocode_with_bbox(step.query)
+                else:
+                    reply = await acall_tool(step.name, **step.kwargs)
+            except Exception as exc:
+                error = exc
+
     def _intent(self, message: str) -> str:
-        m = message.lower()
-        # Check for transaction location intent first (more specific)
-        location_keywords = ["where", "location", "map"]
-        if any(kw in m for kw in location_keywords):
+        signals = _INTENT_MATCHER.find(message.lower())
+        # Transaction location is the most specific intent, so it goes first.
+        if "location" in signals or ("show_me" in signals and "spending" in signals):
             return "transaction_location"
-        if "show me" in m and ("shopped" in m or "spent" in m or "purchase" in m):
-            return "transaction_location"
-        if "mortgage" in m:
-            return "mortgage"
-        if "credit" in m or "card" in m:
-            return "credit"
-        if "savings" in m:
-            return "savings"
-        if "transaction" in m:
-            return "transactions"
-        if "detail" in m or "show details" in m:
-            return "account_detail"
-        if any(w in m for w in ["all account", "my account", "accounts", "overview"]):
-            return "overview"
-        if "account" in m:
-            return "account_detail"
+        for signal, intent in _INTENT_ORDER:
+            if signal in signals:
+                return intent
         return "overview"
 
     def _extract_merchant(
@@ -52,21 +250,17 @@ class DeterministicRuntime:
         """
         Find a transaction matching a merchant mentioned in the user's message.
 
-        Returns tuple of (transaction, merchant_name) or None if no match.
-        If multiple matches, returns the most recent (first in list).
+        A transaction matches when a word of its description longer than 3
+        characters occurs in the message. Returns tuple of (transaction,
+        merchant_name) or None if no match. If multiple matches, returns the
+        most recent (first in list).
         """
-        m = message.lower()
-
-        for tx in transactions:
-            description = tx.get("description", "")
-            # Extract words from description for matching
-            desc_words = description.lower().split()
-            # Check if any significant word from description appears in message
-            for word in desc_words:
-                if len(word) > 3 and word in m:  # Skip short words
-                    return (tx, description)
-
-        return None
+        descriptions = tuple(tx.get("description", "") for tx in transactions)
+        matches = _merchant_matcher(descriptions).find(message.lower())
+        if not matches:
+            return None
+        tx = transactions[min(matches)]
+        return (tx, descriptions[min(matches)])
 
     def _net_worth(self, accounts: list[dict[str, Any]]) -> str:
         total = 0.0
@@ -171,7 +365,11 @@ class DeterministicRuntime:
             "rateDisplay": f"Interest rate: {savings.get('interestRate', '')}%",
         }
 
-    def run(self, message: str) -> RuntimeResponse:
+    def _steps(self, message: str) -> Steps:
+        """
+        Route a message; yields _ToolCall/_Geocode for every I/O step and a
+        TemplateHint as soon as the reply's template is known.
+        """
         # Handle UI action events (button taps from A2UI components)
         if "useraction" in message.lower():
             try:
@@ -191,7 +389,8 @@ class DeterministicRuntime:
                 action_name = action.get("userAction", {}).get("name", "")
 
                 if action_name == "backToOverview":
-                    accounts = call_tool("get_accounts")
+                    yield TemplateHint("account_overview.json")
+                    accounts = yield _ToolCall("get_accounts")
                     net_worth = self._net_worth(accounts)
                     return RuntimeResponse(
                         text="Here is an overview of all your accounts.",
@@ -215,20 +414,21 @@ class DeterministicRuntime:
                         if isinstance(ctx.get("amountDisplay"), str):
                             transaction["amountDisplay"] = ctx["amountDisplay"]
                     elif transaction_id:
-                        accounts = call_tool("get_accounts")
+                        accounts = yield _ToolCall("get_accounts")
                         current_account = next(
                             (a for a in accounts if a["type"] == "current"),
                             accounts[0] if accounts else None
                         )
                         if current_account:
-                            transactions = call_tool("get_transactions", account_id=current_account["id"], limit=20)
+                            transactions = yield _ToolCall("get_transactions", account_id=current_account["id"], limit=20)
                             transaction = next((tx for tx in transactions if str(tx.get("id")) == transaction_id), None)
                             if transaction:
                                 description = str(transaction.get("description", "")).strip()
 
                     if description:
-                        bbox = geocode_with_bbox(description)
+                        bbox = yield _Geocode(description)
                         if bbox is not None:
+                            yield TemplateHint("transaction_location.json")
                             config = get_mcp_apps_config()
                             return RuntimeResponse(
                                 text=f"Here is where your {description} transaction occurred.",
@@ -250,12 +450,13 @@ class DeterministicRuntime:
                                 },
                             )
 
-                    return self.run("show my transactions")
+                    return (yield from self._steps("show my transactions"))
 
                 account_id = ctx.get("accountId")
                 if account_id:
-                    detail = call_tool("get_account_detail", account_id=account_id)
-                    transactions = call_tool("get_transactions", account_id=account_id, limit=10)
+                    yield TemplateHint("account_detail.json")
+                    detail = yield _ToolCall("get_account_detail", account_id=account_id)
+                    transactions = yield _ToolCall("get_transactions", account_id=account_id, limit=10)
                     data = self._format_detail_data(detail, transactions)
                     return RuntimeResponse(
                         text="",
@@ -268,7 +469,7 @@ class DeterministicRuntime:
         intent = self._intent(message)
         if intent == "transaction_location":
             # Get transactions from current account
-            accounts = call_tool("get_accounts")
+            accounts = yield _ToolCall("get_accounts")
             current_account = next(
                 (a for a in accounts if a["type"] == "current"),
                 accounts[0] if accounts else None
@@ -280,10 +481,17 @@ class DeterministicRuntime:
                     data={"accounts": self._list_to_map([]), "netWorth": "0.00", "headerText": "Accounts", "accountCount": "0 accounts"},
                 )
 
-            transactions = call_tool("get_transactions", account_id=current_account["id"], limit=20)
-
-            # Try to extract merchant from message
-            merchant_result = self._extract_merchant(message, transactions)
+            # The bank indexes merchants over the whole history; without that
+            # tool (older servers) the latest transactions are searched here.
+            try:
+                match = yield _ToolCall("find_merchant_transaction", account_id=current_account["id"], query=message)
+            except ValueError:
+                match = None
+            if isinstance(match, dict):
+                merchant_result = (match, str(match.get("description", "")))
+            else:
+                transactions = yield _ToolCall("get_transactions", account_id=current_account["id"], limit=20)
+                merchant_result = self._extract_merchant(message, transactions)
 
             if merchant_result is None:
                 # No specific merchant found, show general text
@@ -300,8 +508,9 @@ class DeterministicRuntime:
 
             tx, merchant_name = merchant_result
 
-            # Geocode the merchant
-            bbox = geocode_with_bbox(merchant_name)
+            # The map card is only hinted once geocoding succeeds: a hint for
+            # a template the reply then does not use leaves an orphan surface.
+            bbox = yield _Geocode(merchant_name)
 
             if bbox is None:
                 # Geocoding failed
@@ -317,6 +526,7 @@ class DeterministicRuntime:
                 )
 
             # Success - return transaction with frame data for MCP App iframe
+            yield TemplateHint("transaction_location.json")
             config = get_mcp_apps_config()
             return RuntimeResponse(
                 text=f"Here is where your {merchant_name} transaction occurred.",
@@ -339,8 +549,10 @@ class DeterministicRuntime:
             )
 
         if intent == "mortgage":
-            account = next(a for a in call_tool("get_accounts") if a["type"] == "mortgage")
-            mortgage = call_tool("get_mortgage_summary", account_id=account["id"])
+            yield TemplateHint("mortgage_summary.json")
+            accounts = yield _ToolCall("get_accounts")
+            account = next(a for a in accounts if a["type"] == "mortgage")
+            mortgage = yield _ToolCall("get_mortgage_summary", account_id=account["id"])
             data = self._format_mortgage_data(mortgage)
             return RuntimeResponse(
                 text="Here is your mortgage summary.",
@@ -348,8 +560,10 @@ class DeterministicRuntime:
                 data=data,
             )
         if intent == "credit":
-            account = next(a for a in call_tool("get_accounts") if a["type"] == "credit")
-            credit = call_tool("get_credit_card_statement", account_id=account["id"])
+            yield TemplateHint("credit_card_statement.json")
+            accounts = yield _ToolCall("get_accounts")
+            account = next(a for a in accounts if a["type"] == "credit")
+            credit = yield _ToolCall("get_credit_card_statement", account_id=account["id"])
             data = self._format_credit_data(credit)
             return RuntimeResponse(
                 text="Here is your credit card statement.",
@@ -357,8 +571,10 @@ class DeterministicRuntime:
                 data=data,
             )
         if intent == "savings":
-            account = next(a for a in call_tool("get_accounts") if a["type"] == "savings")
-            savings = call_tool("get_account_detail", account_id=account["id"])
+            yield TemplateHint("savings_summary.json")
+            accounts = yield _ToolCall("get_accounts")
+            account = next(a for a in accounts if a["type"] == "savings")
+            savings = yield _ToolCall("get_account_detail", account_id=account["id"])
             data = self._format_savings_data(savings)
             return RuntimeResponse(
                 text="Here is your savings account summary.",
@@ -366,13 +582,14 @@ class DeterministicRuntime:
                 data=data,
             )
         if intent == "transactions":
-            all_accounts = call_tool("get_accounts")
+            yield TemplateHint("transaction_list.json")
+            all_accounts = yield _ToolCall("get_accounts")
             # Try to match by account name mentioned in the message
             account = next(
                 (a for a in all_accounts if a["name"].lower() in message.lower()),
                 next((a for a in all_accounts if a["type"] == "current"), all_accounts[0])
             )
-            txs = call_tool("get_transactions", account_id=account["id"], limit=10)
+            txs = yield _ToolCall("get_transactions", account_id=account["id"], limit=10)
             self._format_transactions(txs)
             return RuntimeResponse(
                 text=f"Here are the latest transactions for {account['name']}.",
@@ -384,13 +601,14 @@ class DeterministicRuntime:
                 },
             )
         if intent == "account_detail":
-            all_accounts = call_tool("get_accounts")
+            yield TemplateHint("account_detail.json")
+            all_accounts = yield _ToolCall("get_accounts")
             account = next(
                 (a for a in all_accounts if a["name"].lower() in message.lower()),
                 next((a for a in all_accounts if a["type"] == "current"), all_accounts[0])
             )
-            detail = call_tool("get_account_detail", account_id=account["id"])
-            transactions = call_tool("get_transactions", account_id=account["id"], limit=10)
+            detail = yield _ToolCall("get_account_detail", account_id=account["id"])
+            transactions = yield _ToolCall("get_transactions", account_id=account["id"], limit=10)
             data = self._format_detail_data(detail, transactions)
             return RuntimeResponse(
                 text="",
@@ -398,7 +616,8 @@ class DeterministicRuntime:
                 data=data,
             )
 
-        accounts = call_tool("get_accounts")
+        yield TemplateHint("account_overview.json")
+        accounts = yield _ToolCall("get_accounts")
         net_worth = self._net_worth(accounts)
         return RuntimeResponse(
             text="Here is an overview of all your accounts.",
@@ -407,43 +626,111 @@ class DeterministicRuntime:
         )
 
 
-class ADKRuntime:
+# The model is told to answer {"text": ..., "template_name": ..., "data": ...};
+# with text as the first key its value can be shown before the JSON completes.
+_TEXT_FIELD_START = re.compile(r'\s*(?:```(?:json)?\s*)?\{\s*"text"\s*:\s*"')
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\u[0-9a-fA-F]{4}|\\[^u])*')
+_HIGH_SURROGATE_TAIL = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+_TEMPLATE_NAME_FIELD = re.compile(r'"template_name"\s*:\s*"([^"\\]*)"')
+
+_ADK_TEMPLATES = frozenset({
+    "account_overview.json",
+    "account_detail.json",
+    "transaction_list.json",
+    "mortgage_summary.json",
+    "credit_card_statement.json",
+    "savings_summary.json",
+    "transaction_location.json",
+})
+
+
+class _StreamedTextField:
+    """Incrementally decodes the leading "text" string of a streamed JSON object."""
+
     def __init__(self) -> None:
+        self._buffer = ""
+        self._start: int | None = None
+        self._consumed = 0
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add model output; returns the newly complete characters of the text."""
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._start is None:
+            match = _TEXT_FIELD_START.match(self._buffer)
+            if match is None:
+                return ""
+            self._start = match.end()
+        raw = self._buffer[self._start + self._consumed:]
+        body = _STRING_BODY.match(raw).group(0)
+        if len(body) < len(raw) and raw[len(body)] == '"':
+            self._done = True
+        elif _HIGH_SURROGATE_TAIL.search(body):
+            # Wait for the low half of the pair.
+            body = body[:-6]
+        self._consumed += len(body)
+        return json.loads(f'"{body}"', strict=False) if body else ""
+
+    def template_name(self) -> str | None:
+        """The object's "template_name" value, once it has been streamed."""
+        match = _TEMPLATE_NAME_FIELD.search(self._buffer)
+        return match.group(1) if match else None
+
+
+class ADKRuntime:
+    # Runner and session service are stateful per invocation.
+    thread_safe = False
+
+    def __init__(self, sessions: SessionStore | None = None) -> None:
         self._model = os.getenv("LLM_MODEL", "gpt-5-mini")
         self._runner = None
+        # Conversation key for turns that arrive without an A2A contextId;
+        # they share one session, bounded by the store like any other.
         self._session_id = os.getenv("ADK_SESSION_ID", "aibank-default-session")
         self._user_id = os.getenv("ADK_USER_ID", "aibank-user")
         self._app_name = os.getenv("ADK_APP_NAME", "aibank-agent")
+        # Per-conversation sessions; shared between pooled runtimes so any
+        # instance can continue any conversation.
+        self._sessions = sessions or SessionStore.from_env()
 
     @staticmethod
-    def _tool_get_accounts() -> list[dict[str, Any]]:
+    async def _tool_get_accounts() -> list[dict[str, Any]]:
         """Get all accounts for the customer."""
-        return call_tool("get_accounts")
+        return await acall_tool("get_accounts")
 
     @staticmethod
-    def _tool_get_account_detail(account_id: str) -> dict[str, Any]:
+    async def _tool_get_account_detail(account_id: str) -> dict[str, Any]:
         """Get detailed information for one account by id."""
-        return call_tool("get_account_detail", account_id=account_id)
+        return await acall_tool("get_account_detail", account_id=account_id)
 
     @staticmethod
-    def _tool_get_transactions(account_id: str, limit: int = 10) -> list[dict[str, Any]]:
+    async def _tool_get_transactions(account_id: str, limit: int = 10) -> list[dict[str, Any]]:
         """Get transactions for an account, newest first."""
-        return call_tool("get_transactions", account_id=account_id, limit=limit)
+        return await acall_tool("get_transactions", account_id=account_id, limit=limit)
 
     @staticmethod
-    def _tool_get_mortgage_summary(account_id: str) -> dict[str, Any]:
+    async def _tool_get_mortgage_summary(account_id: str) -> dict[str, Any]:
         """Get mortgage summary for a mortgage account."""
-        return call_tool("get_mortgage_summary", account_id=account_id)
+        return await acall_tool("get_mortgage_summary", account_id=account_id)
 
     @staticmethod
-    def _tool_get_credit_card_statement(account_id: str) -> dict[str, Any]:
+    async def _tool_get_credit_card_statement(account_id: str) -> dict[str, Any]:
         """Get credit card statement for a credit account."""
-        return call_tool("get_credit_card_statement", account_id=account_id)
+        return await acall_tool("get_credit_card_statement", account_id=account_id)
+
+    def _session_service(self) -> Any:
+        """The store's ADK session service, binding an in-memory one if it has none."""
+        if self._sessions.service is None:
+            from google.adk.sessions import InMemorySessionService
+
+            self._sessions.bind(InMemorySessionService())
+        return self._sessions.service
 
     def _build_runner(self):
         from google.adk.agents.llm_agent import LlmAgent
         from google.adk.runners import Runner
-        from google.adk.sessions import InMemorySessionService
 
         instruction = """
 You are a banking assistant for mock data.
@@ -467,13 +754,12 @@ Do not include markdown fences.
                 self._tool_get_credit_card_statement,
             ],
         )
-        session_service = InMemorySessionService()
-        session_service.create_session(
-            app_name=self._app_name,
-            user_id=self._user_id,
-            session_id=self._session_id,
-        )
-        self._runner = Runner(app_name=self._app_name, agent=agent, session_service=session_service)
+        self._runner = Runner(app_name=self._app_name, agent=agent, session_service=self._session_service())
+
+    def warm_up(self) -> None:
+        """Build the LlmAgent, Runner and session service ahead of traffic."""
+        if self._runner is None:
+            self._build_runner()
 
     def _extract_final_text(self, events: list[Any]) -> str:
         for event in reversed(events):
@@ -483,18 +769,82 @@ Do not include markdown fences.
                     return text
         raise RuntimeError("ADK runtime produced no final text response")
 
-    def run(self, message: str) -> RuntimeResponse:
+    def run(self, message: str, context_id: str | None = None) -> RuntimeResponse:
         if self._runner is None:
             self._build_runner()
 
         from google.genai import types
 
+        context_id = context_id or self._session_id
+        self._session_service()
+        session_id = self._sessions.resolve(context_id)
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        try:
+            events = list(self._runner.run(user_id=self._user_id, session_id=session_id, new_message=content))
+        except Exception as exc:
+            raise RuntimeError(f"ADK runtime execution failed: {exc}") from exc
+        # The user message is stored in the session alongside the events.
+        self._sessions.record_turn(context_id, len(events) + 1)
+        return self._parse_response(events)
+
+    async def _events(self, message: str, context_id: str | None, run_config: Any = None) -> AsyncIterator[Any]:
+        """Run one turn, yielding ADK events as they arrive."""
+        if self._runner is None:
+            await anyio.to_thread.run_sync(self._build_runner)
+
+        from google.genai import types
+
+        context_id = context_id or self._session_id
+        self._session_service()
+        # Session bookkeeping may drive the ADK service's own coroutines to
+        # completion, which cannot happen on this event loop.
+        session_id = await anyio.to_thread.run_sync(self._sessions.resolve, context_id)
         content = types.Content(role="user", parts=[types.Part(text=message)])
+        options = {"run_config": run_config} if run_config is not None else {}
+        stored = 0
         try:
-            events = list(self._runner.run(user_id=self._user_id, session_id=self._session_id, new_message=content))
+            async for event in self._runner.run_async(
+                user_id=self._user_id, session_id=session_id, new_message=content, **options
+            ):
+                # Partial (streamed) events are not stored in the session.
+                stored += not getattr(event, "partial", False)
+                yield event
         except Exception as exc:
             raise RuntimeError(f"ADK runtime execution failed: {exc}") from exc
+        self._sessions.record_turn(context_id, stored + 1)
+
+    async def arun(self, message: str, context_id: str | None = None) -> RuntimeResponse:
+        return self._parse_response([event async for event in self._events(message, context_id)])
 
+    async def astream(self, message: str, context_id: str | None = None) -> AsyncIterator[RuntimeEvent]:
+        """
+        Like arun, but with the model's output streamed.
+
+        The model answers with a JSON object; the characters of its ``text``
+        field are yielded as TextDelta events while the rest is generated, and
+        a TemplateHint as soon as ``template_name`` is out (ahead of ``data``).
+        """
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+
+        field = _StreamedTextField()
+        hinted = False
+        final: list[Any] = []
+        async for event in self._events(message, context_id, RunConfig(streaming_mode=StreamingMode.SSE)):
+            if not getattr(event, "partial", False):
+                final.append(event)
+                continue
+            parts = event.content.parts if event.content else None
+            delta = field.feed("".join(part.text or "" for part in parts or ()))
+            if delta:
+                yield TextDelta(delta)
+            if not hinted:
+                template_name = field.template_name()
+                if template_name in _ADK_TEMPLATES:
+                    hinted = True
+                    yield TemplateHint(template_name)
+        yield self._parse_response(final)
+
+    def _parse_response(self, events: list[Any]) -> RuntimeResponse:
         final_text = self._extract_final_text(events)
         try:
             payload = json.loads(final_text)
@@ -502,16 +852,7 @@ Do not include markdown fences.
             raise RuntimeError("ADK runtime did not return valid JSON output") from exc
 
         template_name = payload.get("template_name")
-        allowed = {
-            "account_overview.json",
-            "account_detail.json",
-            "transaction_list.json",
-            "mortgage_summary.json",
-            "credit_card_statement.json",
-            "savings_summary.json",
-            "transaction_location.json",
-        }
-        if template_name not in allowed:
+        if template_name not in _ADK_TEMPLATES:
             raise RuntimeError(f"ADK runtime returned unsupported template: {template_name}")
 
         text = str(payload.get("text", "")).strip()
@@ -522,8 +863,149 @@ Do not include markdown fences.
         return RuntimeResponse(text=text or "Here is your banking update.", template_name=template_name, data=data)
 
 
+_ADK_SESSIONS: SessionStore | None = None
+_ADK_SESSIONS_LOCK = threading.Lock()
+
+
+def get_adk_sessions() -> SessionStore:
+    """Return the process-wide ADK session store."""
+    global _ADK_SESSIONS
+    with _ADK_SESSIONS_LOCK:
+        if _ADK_SESSIONS is None:
+            _ADK_SESSIONS = SessionStore.from_env()
+        return _ADK_SESSIONS
+
+
 def get_runtime() -> AgentRuntime:
     runtime = os.getenv("AGENT_RUNTIME", "deterministic").lower()
     if runtime == "adk":
-        return ADKRuntime()
+        return ADKRuntime(sessions=get_adk_sessions())
     return DeterministicRuntime()
+
+
+class RuntimePool:
+    """
+    Process-wide owner of agent runtimes.
+
+    A thread-safe runtime is created once and shared by every request. For
+    runtimes that are not thread-safe each request gets exclusive use of an
+    instance; idle instances are kept for reuse, up to ``size`` of them. The
+    pool never blocks: under a burst larger than ``size`` extra instances are
+    created and discarded on release.
+    """
+
+    def __init__(self, factory: Callable[[], AgentRuntime] = get_runtime, size: int = 4) -> None:
+        self._factory = factory
+        self._size = max(1, size)
+        self._lock = threading.Lock()
+        self._idle: list[AgentRuntime] = []
+        self._shared: AgentRuntime | None = None
+        self._thread_safe: bool | None = None
+        self._created = 0
+
+    def _create(self) -> AgentRuntime:
+        runtime = self._factory()
+        runtime.warm_up()
+        with self._lock:
+            self._created += 1
+            if self._thread_safe is None:
+                self._thread_safe = bool(getattr(runtime, "thread_safe", False))
+        return runtime
+
+    def warm_up(self) -> None:
+        """Create and warm the shared runtime, or fill the idle pool."""
+        if self._shared is not None or self._idle:
+            return
+        runtime = self._create()
+        if self._thread_safe:
+            self._shared = runtime
+            return
+        warmed = [runtime] + [self._create() for _ in range(self._size - 1)]
+        with self._lock:
+            self._idle.extend(warmed)
+
+    def _checkout(self) -> tuple[AgentRuntime | None, bool]:
+        """The shared or an idle runtime, if any, and whether it is leased."""
+        if self._shared is not None:
+            return self._shared, False
+        with self._lock:
+            runtime = self._idle.pop() if self._idle else None
+        return runtime, runtime is not None
+
+    def _adopt(self, runtime: AgentRuntime) -> tuple[AgentRuntime, bool]:
+        """Take a newly created runtime into use; a thread-safe one becomes shared."""
+        if not self._thread_safe:
+            return runtime, True
+        with self._lock:
+            if self._shared is None:
+                self._shared = runtime
+            return self._shared, False
+
+    def _release(self, runtime: AgentRuntime) -> None:
+        with self._lock:
+            if len(self._idle) < self._size:
+                self._idle.append(runtime)
+
+    @contextmanager
+    def acquire(self) -> Iterator[AgentRuntime]:
+        runtime, leased = self._checkout()
+        if runtime is None:
+            runtime, leased = self._adopt(self._create())
+        try:
+            yield runtime
+        finally:
+            if leased:
+                self._release(runtime)
+
+    @asynccontextmanager
+    async def aacquire(self) -> AsyncIterator[AgentRuntime]:
+        """
+        Async counterpart of acquire for use on the event loop.
+
+        Creating a runtime can block (ADK agent construction), so a runtime
+        missing from the pool is created in a worker thread.
+        """
+        runtime, leased = self._checkout()
+        if runtime is None:
+            runtime, leased = self._adopt(await anyio.to_thread.run_sync(self._create))
+        try:
+            yield runtime
+        finally:
+            if leased:
+                self._release(runtime)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "threadSafe": self._thread_safe,
+                "created": self._created,
+                "idle": len(self._idle),
+                "size": self._size,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._idle.clear()
+            self._shared = None
+
+
+_POOL: RuntimePool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_runtime_pool() -> RuntimePool:
+    """Return the process-wide runtime pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = RuntimePool(size=int(os.getenv("AGENT_RUNTIME_POOL_SIZE", "4")))
+        return _POOL
+
+
+def reset_runtime_pool() -> None:
+    """Drop the process-wide pool; the next get_runtime_pool() starts fresh."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,233 @@
+"""
+Bounded ADK session store.
+
+Each A2A conversation (``contextId``) gets its own ADK session instead of all
+traffic sharing one ever-growing session. The store bounds memory and prompt
+size in three ways:
+
+- LRU: at most ``max_sessions`` conversations are kept; the least recently
+  used is evicted when a new one arrives.
+- TTL: conversations idle for longer than ``ttl_seconds`` are dropped.
+- Turn limit: after ``max_turns`` turns a conversation's history is truncated
+  by rotating it onto a fresh ADK session, which starts with the old
+  session's state and the events of its last ``keep_turns`` turns.
+
+Evicted and rotated sessions are deleted from the ADK session service.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+def call_session_service(service: Any, method: str, **kwargs: Any) -> Any:
+    """
+    Call an ADK session service method from synchronous code.
+
+    Recent ADK releases only expose coroutine methods; older ones (and test
+    doubles) are synchronous. Must not be called from a running event loop.
+    """
+    result = getattr(service, method)(**kwargs)
+    if inspect.isawaitable(result):
+        return asyncio.run(_await(result))
+    return result
+
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+
+@dataclass
+class SessionEntry:
+    session_id: str
+    created_at: float
+    last_used: float
+    turns: int = 0
+    events: int = 0
+
+
+class SessionStore:
+    """LRU/TTL-bounded mapping from A2A context ids to ADK sessions."""
+
+    def __init__(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800.0,
+        max_turns: int = 20,
+        keep_turns: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.app_name = app_name
+        self.user_id = user_id
+        self._max_sessions = max(1, max_sessions)
+        self._ttl = ttl_seconds
+        self._max_turns = max(1, max_turns)
+        # At least one turn must go, or every turn would rotate again.
+        self._keep_turns = min(max(0, keep_turns), self._max_turns - 1)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, SessionEntry] = OrderedDict()
+        self._service: Any = None
+        self._evicted_lru = 0
+        self._evicted_ttl = 0
+        self._rotations = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """
+        Environment variables:
+        - ADK_APP_NAME / ADK_USER_ID: identity used for every ADK session
+        - ADK_MAX_SESSIONS: conversations kept in memory (default 1000)
+        - ADK_SESSION_TTL_SECONDS: idle time before a conversation is dropped (default 1800)
+        - ADK_SESSION_MAX_TURNS: turns kept before history is truncated (default 20)
+        - ADK_SESSION_KEEP_TURNS: recent turns carried over when it is (default 4)
+        """
+        return cls(
+            app_name=os.getenv("ADK_APP_NAME", "aibank-agent"),
+            user_id=os.getenv("ADK_USER_ID", "aibank-user"),
+            max_sessions=int(os.getenv("ADK_MAX_SESSIONS", "1000")),
+            ttl_seconds=float(os.getenv("ADK_SESSION_TTL_SECONDS", "1800")),
+            max_turns=int(os.getenv("ADK_SESSION_MAX_TURNS", "20")),
+            keep_turns=int(os.getenv("ADK_SESSION_KEEP_TURNS", "4")),
+        )
+
+    @property
+    def service(self) -> Any:
+        return self._service
+
+    def bind(self, service: Any) -> Any:
+        """Attach the ADK session service; the first one bound is kept."""
+        with self._lock:
+            if self._service is None:
+                self._service = service
+            return self._service
+
+    def _recent_history(self, entry: SessionEntry) -> tuple[dict[str, Any], list[Any], int]:
+        """The state of a session and the events of its last ``keep_turns`` turns."""
+        try:
+            session = call_session_service(
+                self._service, "get_session",
+                app_name=self.app_name, user_id=self.user_id, session_id=entry.session_id,
+            )
+        except Exception:
+            # Carrying history over is best effort; don't fail the turn.
+            session = None
+        if session is None or not self._keep_turns:
+            return {}, [], 0
+        events = list(session.events)
+        # Keep whole turns, so the history never opens mid-turn (e.g. with a
+        # tool response whose call was cut off).
+        starts = [i for i, event in enumerate(events) if getattr(event, "author", None) == "user"]
+        kept = starts[-self._keep_turns:]
+        return dict(session.state), events[kept[0]:] if kept else [], len(kept)
+
+    def _create(self, rotated: SessionEntry | None = None) -> SessionEntry:
+        session_id = f"ctx-{uuid.uuid4()}"
+        state, events, turns = self._recent_history(rotated) if rotated is not None else ({}, [], 0)
+        session = call_session_service(
+            self._service, "create_session",
+            app_name=self.app_name, user_id=self.user_id, session_id=session_id,
+            **({"state": state} if state else {}),
+        )
+        for event in events:
+            call_session_service(self._service, "append_event", session=session, event=event)
+        now = self._clock()
+        return SessionEntry(session_id=session_id, created_at=now, last_used=now, turns=turns, events=len(events))
+
+    def _delete(self, entries: list[SessionEntry]) -> None:
+        for entry in entries:
+            try:
+                call_session_service(
+                    self._service, "delete_session",
+                    app_name=self.app_name, user_id=self.user_id, session_id=entry.session_id,
+                )
+            except Exception:
+                # The session is unreachable either way; don't fail the turn.
+                pass
+
+    def _expire(self, now: float) -> list[SessionEntry]:
+        expired: list[SessionEntry] = []
+        while self._entries:
+            context_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= self._ttl:
+                break
+            del self._entries[context_id]
+            expired.append(entry)
+        self._evicted_ttl += len(expired)
+        return expired
+
+    def resolve(self, context_id: str) -> str:
+        """Return the ADK session id for a conversation, creating it if needed."""
+        if self._service is None:
+            raise RuntimeError("SessionStore has no session service bound")
+        now = self._clock()
+        with self._lock:
+            dropped = self._expire(now)
+            entry = self._entries.get(context_id)
+            rotated: SessionEntry | None = None
+            if entry is not None and entry.turns >= self._max_turns:
+                del self._entries[context_id]
+                rotated, entry = entry, None
+                self._rotations += 1
+            if entry is not None:
+                entry.last_used = now
+                self._entries.move_to_end(context_id)
+        self._delete(dropped)
+        if entry is not None:
+            return entry.session_id
+
+        entry = self._create(rotated)
+        unused: list[SessionEntry] = []
+        with self._lock:
+            winner = self._entries.get(context_id)
+            if winner is not None:
+                # A concurrent resolve() created the conversation first.
+                winner.last_used = now
+                self._entries.move_to_end(context_id)
+                unused.append(entry)
+                entry = winner
+            else:
+                self._entries[context_id] = entry
+                while len(self._entries) > self._max_sessions:
+                    unused.append(self._entries.popitem(last=False)[1])
+                    self._evicted_lru += 1
+        if rotated is not None:
+            # Deleted only now: the new session was seeded from it.
+            unused.append(rotated)
+        self._delete(unused)
+        return entry.session_id
+
+    def record_turn(self, context_id: str, events: int) -> None:
+        """Account one completed turn and the events it added to the session."""
+        with self._lock:
+            entry = self._entries.get(context_id)
+            if entry is not None:
+                entry.turns += 1
+                entry.events += events
+                entry.last_used = self._clock()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+            evicted_lru, evicted_ttl, rotations = self._evicted_lru, self._evicted_ttl, self._rotations
+        events = [e.events for e in entries]
+        return {
+            "sessions": len(entries),
+            "maxSessions": self._max_sessions,
+            "turns": sum(e.turns for e in entries),
+            "events": sum(events),
+            "maxSessionEvents": max(events, default=0),
+            "evictedLru": evicted_lru,
+            "evictedTtl": evicted_ttl,
+            "rotations": rotations,
+        }
@@ -0,0 +1,121 @@
+"""
+Request coalescing ("single-flight").
+
+Concurrent calls for the same key share one execution: the first caller runs
+the function, everyone arriving while it is in flight waits for and receives
+its result (or exception). Nothing is remembered once the call completes;
+caching is a separate concern (see ``agent.geocode_cache``).
+
+``AsyncSingleFlight`` coordinates tasks on one event loop; it serves the
+HTTP endpoints, which all drive runtimes asynchronously. ``SingleFlight``
+coordinates threads for the blocking entry points (``Runtime.run``,
+``handle_query`` and ``geocode_with_bbox`` called from scripts or worker
+threads).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight: dict[Any, Any] = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"calls": self._calls, "coalesced": self._coalesced, "inFlight": len(self._in_flight)}
+
+
+class SingleFlight(_Counters):
+    """Coalesces concurrent calls across threads."""
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self._calls += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight(_Counters):
+    """
+    Coalesces concurrent awaits on the same event loop.
+
+    The shared call runs as its own task, so a cancelled caller (the first
+    one included) only stops waiting for it; the call itself is cancelled
+    once no caller is left waiting.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Tasks belong to one loop, so in-flight calls are tracked per loop.
+        self._loops: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[Hashable, _AsyncCall]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._loops.setdefault(loop, {})
+            call = calls.get(key)
+            if call is None:
+                call = calls[key] = _AsyncCall(loop.create_task(fn()))
+                self._in_flight[(id(loop), key)] = call
+                call.task.add_done_callback(lambda _: self._forget(calls, (id(loop), key), key, call))
+                self._calls += 1
+            else:
+                self._coalesced += 1
+            call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                orphaned = call.waiters == 0
+            if orphaned and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, calls: dict[Hashable, _AsyncCall], flight_key: Any, key: Hashable, call: _AsyncCall) -> None:
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+                del self._in_flight[flight_key]
@@ -0,0 +1,196 @@
+"""
+Per-conversation A2UI surface state, for incremental data model updates.
+
+Without it every reply creates a new surface (new id, full component tree,
+full data model), even when a conversation re-shows the same card: back to
+the overview, the same account tapped again, a refreshed transaction list.
+Instead, for each A2A ``contextId`` the agent remembers the surface it made
+for each template and the data model it last sent there. When the template
+is shown again the reply reuses that surface id and only sends
+``dataModelUpdate`` messages for what changed. Each one names an object by
+its JSON-pointer ``path`` and carries, as its ``contents`` object, the keys
+of that object to set:
+
+- A2UI has no delete operation, so an object that lost keys is set whole
+  under its parent (or, for the top level, the whole model is sent).
+- If the changed paths would encode larger than the whole data model, one
+  full dataModelUpdate is sent instead.
+- No dataModelUpdate is sent if the data did not change.
+
+Either way the reply ends with the template's ``beginRendering``, so the
+client shows the surface again.
+
+Conversations are kept LRU-bounded; a forgotten conversation simply gets a
+new surface on its next reply.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from agent.template_registry import dumps_compact
+
+
+_MISSING = object()
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _collect(old: dict[str, Any], new: dict[str, Any], path: str, out: dict[str, dict[str, Any]]) -> None:
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict) and not previous.keys() - value.keys():
+            _collect(previous, value, f"{path}/{_escape(str(key))}", out)
+        else:
+            out.setdefault(path or "/", {})[key] = value
+
+
+def data_model_deltas(old: dict[str, Any], new: dict[str, Any]) -> dict[str, dict[str, Any]] | None:
+    """
+    Return the changes from ``old`` to ``new`` as ``{path: {key: value}}``.
+
+    Each entry sets the given keys of the object at a JSON-pointer ``path``
+    (``"/"`` for the top level). Objects are compared key by key; a value
+    that is not an object, and an object that lost keys, is set whole. None
+    when the top level lost keys, which only a full model can express.
+    """
+    if old.keys() - new.keys():
+        return None
+    deltas: dict[str, dict[str, Any]] = {}
+    _collect(old, new, "", deltas)
+    return deltas
+
+
+def encode_data_updates(
+    surface_id: str, deltas: dict[str, dict[str, Any]] | None, data_json: bytes
+) -> list[bytes]:
+    """
+    Encode ``deltas`` as dataModelUpdate messages for one surface.
+
+    ``data_json`` is the whole new data model; it is sent instead when the
+    deltas are None or no smaller.
+    """
+    if deltas == {}:
+        return []
+    sid = dumps_compact(surface_id)
+    full = b'{"dataModelUpdate":{"surfaceId":' + sid + b',"contents":' + data_json + b"}}"
+    if deltas is None:
+        return [full]
+    updates = [
+        b'{"dataModelUpdate":{"surfaceId":' + sid + b',"path":' + dumps_compact(path)
+        + b',"contents":' + dumps_compact(values) + b"}}"
+        for path, values in deltas.items()
+    ]
+    if sum(len(update) for update in updates) >= len(full):
+        return [full]
+    return updates
+
+
+@dataclass(frozen=True)
+class _Surface:
+    surface_id: str
+    # Treated as read-only: it is the data model of a reply already sent.
+    data: dict[str, Any]
+
+
+class SurfaceStates:
+    """LRU-bounded record of the surfaces shown in each conversation."""
+
+    def __init__(self, *, max_contexts: int = 1024, enabled: bool = True) -> None:
+        self._max_contexts = max(1, max_contexts)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._contexts: OrderedDict[str, dict[str, _Surface]] = OrderedDict()
+        self._created = 0
+        self._reused = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SurfaceStates":
+        """
+        Environment variables:
+        - A2UI_DATA_DELTAS: set to ``false`` to always send new surfaces (default true)
+        - A2UI_SURFACE_STATE_MAX_CONTEXTS: conversations remembered (default 1024)
+        """
+        return cls(
+            max_contexts=int(os.getenv("A2UI_SURFACE_STATE_MAX_CONTEXTS", "1024")),
+            enabled=os.getenv("A2UI_DATA_DELTAS", "true").lower() not in ("0", "false", "no"),
+        )
+
+    def surface_id(self, context_id: str, template_name: str) -> str | None:
+        """The id of the conversation's surface for a template, if it has one."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            surface = self._contexts.get(context_id, {}).get(template_name)
+            return surface.surface_id if surface is not None else None
+
+    def swap(
+        self, context_id: str, template_name: str, data: dict[str, Any], surface_id: str | None = None
+    ) -> tuple[str, dict[str, Any] | None]:
+        """
+        Record ``data`` as the conversation's data model for a template.
+
+        Returns the surface id to use and the data model previously sent to
+        it, or None when the surface is new. A given ``surface_id`` (one
+        already announced to the client) that differs from the recorded one
+        replaces it as a new surface.
+        """
+        if not self.enabled:
+            return surface_id or str(uuid.uuid4()), None
+        with self._lock:
+            surfaces = self._contexts.get(context_id)
+            if surfaces is None:
+                surfaces = self._contexts[context_id] = {}
+                while len(self._contexts) > self._max_contexts:
+                    self._contexts.popitem(last=False)
+                    self._evictions += 1
+            self._contexts.move_to_end(context_id)
+            current = surfaces.get(template_name)
+            if current is not None and surface_id in (None, current.surface_id):
+                surfaces[template_name] = _Surface(current.surface_id, data)
+                self._reused += 1
+                return current.surface_id, current.data
+            surface_id = surface_id or str(uuid.uuid4())
+            surfaces[template_name] = _Surface(surface_id, data)
+            self._created += 1
+            return surface_id, None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "contexts": len(self._contexts),
+                "maxContexts": self._max_contexts,
+                "surfacesCreated": self._created,
+                "surfacesReused": self._reused,
+                "evictions": self._evictions,
+            }
+
+
+_STATES: SurfaceStates | None = None
+_STATES_LOCK = threading.Lock()
+
+
+def get_surface_states() -> SurfaceStates:
+    """Return the process-wide surface state, creating it on first use."""
+    global _STATES
+    with _STATES_LOCK:
+        if _STATES is None:
+            _STATES = SurfaceStates.from_env()
+        return _STATES
+
+
+def reset_surface_states() -> None:
+    """Forget every conversation's surfaces."""
+    global _STATES
+    with _STATES_LOCK:
+        _STATES = None
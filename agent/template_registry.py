@@ -0,0 +1,192 @@
+"""
+A2UI template registry.
+
+All templates under ``agent/templates/`` are read and validated against
+``A2UI_SCHEMA`` once, when the registry is created. A malformed template
+therefore fails agent startup instead of the first request that uses it.
+
+Rendering is copy-on-write: the parsed component trees are shared by every
+response and must be treated as read-only. Only the small per-request
+envelope (surface id, data model) is built fresh for each render.
+
+For the HTTP endpoints the static parts of every message are additionally
+kept pre-encoded as bytes, so a response only serializes its dynamic parts
+(see ``TemplateRegistry.encode``). Since a template's surfaceUpdate does not
+depend on the data, it can also be encoded on its own and sent ahead of the
+rest of the reply (``encode_surface``).
+"""
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import jsonschema
+
+from agent.a2ui_schema import A2UI_SCHEMA
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+SURFACE_MESSAGE_KEYS = ("surfaceUpdate", "dataModelUpdate", "beginRendering")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def dumps_compact(value: Any) -> bytes:
+    """Encode a value the way the agent puts JSON on the wire."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _message_fragments(item: dict[str, Any]) -> tuple[bytes, bytes, bool]:
+    """
+    Split one template message into the bytes around its dynamic parts.
+
+    Returns ``(head, tail, has_contents)``; the encoded message is
+    ``head + surface_id + tail`` or, for a dataModelUpdate,
+    ``head + surface_id + b',"contents":' + data + tail``.
+    """
+    if len(item) != 1:
+        return dumps_compact(item), b"", False
+    key, payload = next(iter(item.items()))
+    if key not in SURFACE_MESSAGE_KEYS or not isinstance(payload, dict):
+        return dumps_compact(item), b"", False
+    has_contents = key == "dataModelUpdate"
+    dynamic = {"surfaceId", "contents"} if has_contents else {"surfaceId"}
+    static = dumps_compact({k: v for k, v in payload.items() if k not in dynamic})
+    head = b'{' + dumps_compact(key) + b':{"surfaceId":'
+    tail = (b"," + static[1:] if len(static) > 2 else b"}") + b"}"
+    return head, tail, has_contents
+
+
+class TemplateRegistry:
+    """Loads, validates and caches every A2UI template in a directory."""
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR) -> None:
+        self._templates_dir = templates_dir
+        self._lock = threading.Lock()
+        self._parsed: dict[str, list[dict[str, Any]]] = {}
+        self._encoded: dict[str, str] = {}
+        self._fragments: dict[str, list[tuple[bytes, bytes, bool]]] = {}
+        self._is_surface: dict[str, list[bool]] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Re-read and re-validate all templates from disk.
+
+        Intended for development, where templates are edited while the agent
+        is running. The swap is atomic: on any invalid template the previous
+        set is kept and TemplateError is raised.
+        """
+        parsed: dict[str, list[dict[str, Any]]] = {}
+        encoded: dict[str, str] = {}
+        fragments: dict[str, list[tuple[bytes, bytes, bool]]] = {}
+        is_surface: dict[str, list[bool]] = {}
+        for path in sorted(self._templates_dir.glob("*.json")):
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+                jsonschema.validate(instance=payload, schema=A2UI_SCHEMA)
+            except (ValueError, jsonschema.ValidationError) as exc:
+                raise TemplateError(f"Invalid A2UI template {path.name}: {exc}") from exc
+            parsed[path.name] = payload
+            encoded[path.name] = json.dumps(payload, separators=(",", ":"))
+            fragments[path.name] = [_message_fragments(item) for item in payload]
+            is_surface[path.name] = [list(item) == ["surfaceUpdate"] for item in payload]
+        with self._lock:
+            self._parsed = parsed
+            self._encoded = encoded
+            self._fragments = fragments
+            self._is_surface = is_surface
+
+    def names(self) -> list[str]:
+        return sorted(self._encoded)
+
+    def _messages(self, name: str) -> list[dict[str, Any]]:
+        try:
+            return self._parsed[name]
+        except KeyError:
+            raise TemplateError(f"Unknown A2UI template: {name}") from None
+
+    def get(self, name: str) -> list[dict[str, Any]]:
+        """Return a fresh, caller-owned deep copy of the named template."""
+        self._messages(name)
+        # Decoding the compact cached form is considerably cheaper than both
+        # the original disk read + schema validation and copy.deepcopy.
+        return json.loads(self._encoded[name])
+
+    def render(self, name: str, surface_id: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Build the A2UI messages for one response.
+
+        Each message and its payload dict are new objects carrying the given
+        surface id; a dataModelUpdate's contents is replaced by ``data``.
+        Everything else (notably surfaceUpdate.components) is shared with the
+        registry, so callers must not mutate below the payload level.
+        """
+        rendered: list[dict[str, Any]] = []
+        for item in self._messages(name):
+            message: dict[str, Any] = {}
+            for key, payload in item.items():
+                if key in SURFACE_MESSAGE_KEYS and isinstance(payload, dict):
+                    payload = {**payload, "surfaceId": surface_id}
+                    if key == "dataModelUpdate":
+                        # Pass data as a dict so DataModel uses its permissive
+                        # Map path (_parseDataModelContents expects
+                        # {key,valueString} format which is complex; the Map
+                        # path sets _data = runtime.data directly).
+                        payload["contents"] = data
+                message[key] = payload
+            rendered.append(message)
+        return rendered
+
+    def encode(
+        self, name: str, surface_id: str, data_json: bytes, *, include_surface: bool = True
+    ) -> list[bytes]:
+        """
+        Encode the A2UI messages for one response straight to JSON bytes.
+
+        Equivalent to ``[dumps_compact(m) for m in render(...)]`` but only the
+        surface id is serialized here; ``data_json`` is the caller's already
+        encoded data model, so it can be reused elsewhere in the payload.
+        With ``include_surface=False`` the surfaceUpdate messages are left
+        out, for a surface already sent by ``encode_surface``.
+        """
+        self._messages(name)
+        sid = dumps_compact(surface_id)
+        encoded: list[bytes] = []
+        for (head, tail, has_contents), is_surface in zip(self._fragments[name], self._is_surface[name]):
+            if is_surface and not include_surface:
+                continue
+            if not tail:
+                encoded.append(head)
+            elif has_contents:
+                encoded.append(head + sid + b',"contents":' + data_json + tail)
+            else:
+                encoded.append(head + sid + tail)
+        return encoded
+
+    def encode_surface(self, name: str, surface_id: str) -> list[bytes]:
+        """Encode only the template's surfaceUpdate messages, which need no data."""
+        self._messages(name)
+        sid = dumps_compact(surface_id)
+        return [
+            head + sid + tail
+            for (head, tail, _), is_surface in zip(self._fragments[name], self._is_surface[name])
+            if is_surface
+        ]
+
+    def encode_begin_rendering(self, name: str, surface_id: str) -> list[bytes]:
+        """Encode only the template's beginRendering messages, to re-show a surface."""
+        messages = self._messages(name)
+        sid = dumps_compact(surface_id)
+        return [
+            head + sid + tail
+            for item, (head, tail, _) in zip(messages, self._fragments[name])
+            if list(item) == ["beginRendering"]
+        ]
+
+
+TEMPLATES = TemplateRegistry()
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 
 from agent.agent import app, build_a2a_parts, extract_a2a_user_text, handle_query
@@ -93,3 +95,86 @@ def test_a2a_agent_card_has_a2ui_extension():
     body = res.json()
     ext = body["capabilities"]["extensions"][0]
     assert ext["uri"] == "https://a2ui.org/a2a-extension/a2ui/v0.8"
+
+
+def test_stream_endpoint_sends_partial_text_before_the_full_reply():
+    from unittest.mock import patch
+
+    from agent.runtime import DeterministicRuntime, TextDelta
+
+    async def fake_stream(message, context_id=None):
+        yield TextDelta('Here are ')
+        yield TextDelta('your accounts')
+        yield DeterministicRuntime().run(message)
+
+    with patch('agent.agent._astream_runtime', fake_stream):
+        res = TestClient(app).post('/a2a/message/stream', json={'message': 'show my accounts'})
+    events = [json.loads(line) for line in res.text.splitlines() if line.strip()]
+    assert all(event['kind'] == 'message_part' for event in events)
+    assert [e['part']['text'] for e in events if e.get('partial')] == ['Here are ', 'your accounts']
+    assert not events[2].get('partial') and events[2]['part']['kind'] == 'text'
+    assert all(e['part']['kind'] == 'data' for e in events[3:])
+
+
+def _sse_events(text):
+    return [json.loads(line[len('data: '):]) for line in text.splitlines() if line.startswith('data: ')]
+
+
+def test_jsonrpc_message_stream_sends_task_lifecycle_events():
+    client = TestClient(app)
+    res = client.post('/', json={
+        "jsonrpc": "2.0",
+        "id": 7,
+        "method": "message/stream",
+        "params": {"message": {"parts": [{"kind": "text", "text": "show my accounts"}]}},
+    })
+    assert res.headers['content-type'].startswith('text/event-stream')
+    events = [event['result'] for event in _sse_events(res.text)]
+    assert events[0]['kind'] == 'task' and events[0]['status']['state'] == 'submitted'
+    assert [e['status']['state'] for e in events[1:]] == ['working'] * (len(events) - 2) + ['completed']
+    assert 'message' not in events[1]['status']
+    replies = [e['status']['message']['parts'] for e in events[2:-1]]
+    assert all(len(parts) == 1 for parts in replies)
+    # The card's static surface goes first, then the text and the data.
+    assert list(replies[0][0]['data']) == ['surfaceUpdate']
+    assert replies[1][0]['kind'] == 'text'
+    assert [list(parts[0]['data']) for parts in replies[2:]] == [['dataModelUpdate'], ['beginRendering']]
+    assert events[-1]['final'] is True and not any(e['final'] for e in events[1:-1])
+    assert {e['taskId'] for e in events[1:]} == {events[0]['id']}
+
+
+def test_jsonrpc_message_stream_reports_failures_as_failed_status():
+    from unittest.mock import patch
+
+    async def broken(message, context_id=None):
+        raise RuntimeError('model unavailable')
+        yield
+
+    with patch('agent.agent._astream_runtime', broken):
+        res = TestClient(app).post('/', json={
+            "jsonrpc": "2.0",
+            "id": 8,
+            "method": "message/stream",
+            "params": {"message": {"parts": [{"kind": "text", "text": "hi"}]}},
+        })
+    last = _sse_events(res.text)[-1]['result']
+    assert last['status']['state'] == 'failed' and last['final'] is True
+
+
+def test_stream_resends_the_full_template_when_the_hint_was_wrong():
+    from unittest.mock import patch
+
+    from agent.runtime import DeterministicRuntime, TemplateHint
+
+    async def fallback(message, context_id=None):
+        yield TemplateHint('transaction_location.json')
+        yield DeterministicRuntime().run('show my transactions')
+
+    with patch('agent.agent._astream_runtime', fallback):
+        res = TestClient(app).post('/a2a/message/stream', json={'message': 'where was my coffee'})
+    data = [json.loads(line)['part'].get('data') for line in res.text.splitlines() if line.strip()]
+    surfaces = [d for d in data if d and 'surfaceUpdate' in d]
+    assert len(surfaces) == 2
+    begin = next(d for d in data if d and 'beginRendering' in d)
+    assert begin['beginRendering']['surfaceId'] == surfaces[1]['surfaceUpdate']['surfaceId']
+    assert surfaces[0]['surfaceUpdate']['surfaceId'] != begin['beginRendering']['surfaceId']
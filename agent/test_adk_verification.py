@@ -11,8 +11,11 @@ AND it registers all MCP tools as ADK tools
 AND it can execute queries with tool invocation
 AND it streams A2UI JSON output
 """
+import inspect
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+
+import anyio
 
 from agent.runtime import ADKRuntime, get_runtime
 
@@ -86,6 +89,21 @@ def test_adk_runtime_tools_have_docstrings():
         assert len(tool.__doc__.strip()) > 10, f"{tool.__name__} docstring too short"
 
 
+def test_adk_runtime_tools_do_not_block_the_event_loop():
+    """
+    Scenario: ADK Tools Are Awaited
+    GIVEN the ADK runtime runs turns on the server's event loop
+    WHEN the LLM calls a banking tool
+    THEN the tool is a coroutine that awaits the bank tool transport
+    """
+    runtime = ADKRuntime()
+
+    assert inspect.iscoroutinefunction(runtime._tool_get_accounts)
+    with patch("agent.runtime.acall_tool", new=AsyncMock(return_value=[{"id": "acc_1"}])) as acall:
+        assert anyio.run(runtime._tool_get_transactions, "acc_1", 5) == [{"id": "acc_1"}]
+    acall.assert_awaited_once_with("get_transactions", account_id="acc_1", limit=5)
+
+
 def test_adk_runtime_session_configuration():
     """
     Scenario: ADK Runtime Configures Session
@@ -147,12 +165,9 @@ def test_adk_runtime_build_runner_creates_agent():
                 assert 'tools' in call_kwargs
                 assert len(call_kwargs['tools']) == 5
                 
-                # Verify session was created
-                mock_session.create_session.assert_called_once_with(
-                    app_name='aibank-agent',
-                    user_id='aibank-user',
-                    session_id='aibank-default-session'
-                )
+                # Sessions are created per conversation on first use
+                assert runtime._sessions.service is mock_session
+                mock_session.create_session.assert_not_called()
 
 
 def test_adk_runtime_instruction_includes_json_format():
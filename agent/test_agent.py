@@ -36,3 +36,37 @@ def test_handle_query_assigns_unique_surface_id_per_response():
     assert len(set(second_ids.values())) == 1
     assert first_ids["surfaceUpdate"] != second_ids["surfaceUpdate"]
     assert next(item["dataModelUpdate"] for item in first.a2ui if "dataModelUpdate" in item)["contents"] == first.data
+
+
+def test_aencode_query_matches_handle_query_payload():
+    import json
+
+    import anyio
+
+    from agent.agent import aencode_query
+
+    expected = handle_query('show my mortgage')
+    encoded = anyio.run(aencode_query, 'show my mortgage')
+    messages = [json.loads(m) for m in encoded.a2ui]
+    surface_id = messages[0]['surfaceUpdate']['surfaceId']
+    for message in expected.a2ui:
+        for payload in message.values():
+            payload['surfaceId'] = surface_id
+
+    assert encoded.text == expected.text
+    assert json.loads(encoded.data) == expected.data
+    assert messages == expected.a2ui
+
+
+def test_chat_endpoint_returns_spliced_json():
+    from fastapi.testclient import TestClient
+
+    from agent.agent import app
+
+    res = TestClient(app).post('/chat', json={'message': 'show my accounts'})
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/json'
+    body = res.json()
+    assert set(body) == {'text', 'a2ui', 'data'}
+    update = next(item['dataModelUpdate'] for item in body['a2ui'] if 'dataModelUpdate' in item)
+    assert update['contents'] == body['data']
@@ -304,15 +304,15 @@ def test_edge_case_llm_generates_invalid_a2ui():
     Note: With deterministic runtime, templates are pre-validated.
     With ADK runtime, this would test the validation layer.
     """
-    # All templates are pre-validated in _load_template
+    # All templates are pre-validated by the template registry
     # So this test verifies the validation mechanism exists
-    from agent.agent import _load_template
+    from agent.template_registry import TEMPLATES
     
     # WHEN we load a template
-    template = _load_template("account_overview.json")
+    template = TEMPLATES.get("account_overview.json")
     
     # THEN it has been validated
-    # (If it wasn't valid, _load_template would have raised)
+    # (If it wasn't valid, TEMPLATES.get would have raised)
     assert template is not None
     jsonschema.validate(instance=template, schema=A2UI_SCHEMA)
 
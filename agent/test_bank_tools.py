@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+from unittest.mock import patch
+
+import anyio
+import httpx
+import pytest
+
+from agent.bank_tools import (
+    HttpMcpTransport,
+    InProcessTransport,
+    get_bank_mcp_settings,
+    StdioPoolTransport,
+    transport_from_env,
+)
+from agent.mcp_http import McpHttpSettings
+from agent.runtime import DeterministicRuntime
+from agent.tool_cache import bypass_tool_cache
+from mcp_server.server import ToolError, call_tool
+
+
+def test_transport_is_selected_from_env():
+    with patch.dict(os.environ):
+        os.environ.pop('BANK_TOOLS_TRANSPORT', None)
+        assert isinstance(transport_from_env(), InProcessTransport)
+    with patch.dict(os.environ, {'BANK_TOOLS_TRANSPORT': 'stdio', 'BANK_TOOLS_STDIO_WORKERS': '3'}):
+        transport = transport_from_env()
+        assert isinstance(transport, StdioPoolTransport)
+        assert transport.stats()['size'] == 3
+    with patch.dict(os.environ, {'BANK_TOOLS_TRANSPORT': 'http', 'BANK_MCP_URL': 'http://bank:3002/mcp'}):
+        assert isinstance(transport_from_env(), HttpMcpTransport)
+    with patch.dict(os.environ, {'BANK_TOOLS_TRANSPORT': 'http', 'BANK_MCP_URL': ''}):
+        with pytest.raises(ValueError):
+            transport_from_env()
+    with patch.dict(os.environ, {'BANK_TOOLS_TRANSPORT': 'carrier-pigeon'}):
+        with pytest.raises(ValueError):
+            transport_from_env()
+
+
+def test_bank_mcp_settings_are_separate_from_the_map_server():
+    env = {'BANK_MCP_URL': ' http://bank:3002/mcp ', 'BANK_MCP_MAX_CONNECTIONS': '4',
+           'MAP_SERVER_MAX_CONNECTIONS': '7', 'BANK_TOOLS_TIMEOUT': '9'}
+    with patch.dict(os.environ, env):
+        settings = get_bank_mcp_settings()
+    assert (settings.url, settings.max_connections, settings.read_timeout) == ('http://bank:3002/mcp', 4, 9.0)
+
+
+@pytest.fixture(scope='module')
+def stdio_tools():
+    transport = StdioPoolTransport(size=2, timeout=10)
+    yield transport
+    transport.close()
+
+
+def test_stdio_pool_matches_in_process_results(stdio_tools):
+    assert stdio_tools.call('get_accounts') == call_tool('get_accounts')
+    assert stdio_tools.call('get_transactions', account_id='acc_current_001', limit=3) == call_tool(
+        'get_transactions', account_id='acc_current_001', limit=3
+    )
+    with pytest.raises(ToolError, match='Account not found'):
+        stdio_tools.call('get_account_detail', account_id='missing')
+
+
+def test_stdio_pool_pipelines_concurrent_async_calls(stdio_tools):
+    ids = [a['id'] for a in call_tool('get_accounts')]
+
+    async def main():
+        return await asyncio.gather(*(stdio_tools.acall('get_account_detail', account_id=i) for i in ids * 5))
+
+    details = anyio.run(main)
+    assert [d['id'] for d in details] == ids * 5
+    stats = stdio_tools.stats()
+    assert stats['workers'] == 2 and stats['inFlight'] == 0
+
+
+def test_stdio_pool_replaces_exited_worker(stdio_tools):
+    stdio_tools.call('get_accounts')
+    for worker in stdio_tools._workers:
+        worker._process.kill()
+        worker._reader.join(timeout=5)
+    restarts = stdio_tools.stats()['restarts']
+    assert stdio_tools.call('get_accounts') == call_tool('get_accounts')
+    assert stdio_tools.stats()['restarts'] == restarts + 2
+
+
+
+def test_stdio_pool_starts_workers_off_the_event_loop():
+    import subprocess
+    import threading
+
+    popen = subprocess.Popen
+    threads = []
+
+    def recording_popen(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return popen(*args, **kwargs)
+
+    transport = StdioPoolTransport(size=2, timeout=10)
+
+    async def main():
+        return threading.get_ident(), await transport.acall('get_accounts')
+
+    try:
+        with patch('agent.bank_tools.subprocess.Popen', recording_popen):
+            loop_thread, accounts = anyio.run(main)
+    finally:
+        transport.close()
+    assert accounts == call_tool('get_accounts')
+    assert len(threads) == 2 and loop_thread not in threads
+
+def _bank_server(handler):
+    """HttpMcpTransport whose requests are answered by ``handler(tool, args)``."""
+
+    def respond(request):
+        payload = json.loads(request.content)
+        status, text, sse = handler(payload['params']['name'], payload['params']['arguments'])
+        body = {'jsonrpc': '2.0', 'id': payload['id'], 'result': {'content': [{'type': 'text', 'text': text}]}}
+        if sse:
+            return httpx.Response(status, text=f'event: message\ndata: {json.dumps(body)}\n\n',
+                                  headers={'content-type': 'text/event-stream'})
+        return httpx.Response(status, json=body)
+
+    mock = httpx.MockTransport(respond)
+    return HttpMcpTransport(McpHttpSettings(url='http://bank/mcp'), transport=mock, async_transport=mock)
+
+
+def test_http_transport_decodes_json_and_sse_replies():
+    def handler(tool, args):
+        if tool == 'get_account_detail':
+            return 200, 'Error: Account not found', False
+        return 200, json.dumps(call_tool(tool, **args)), tool == 'get_transactions'
+
+    tools = _bank_server(handler)
+    assert tools.call('get_accounts') == call_tool('get_accounts')
+    assert tools.call('get_transactions', account_id='acc_current_001', limit=2) == call_tool(
+        'get_transactions', account_id='acc_current_001', limit=2
+    )
+    assert anyio.run(lambda: tools.acall('get_accounts')) == call_tool('get_accounts')
+    with pytest.raises(ToolError, match='Account not found'):
+        tools.call('get_account_detail', account_id='missing')
+    assert tools.stats()['requests'] == 4 and tools.stats()['errors'] == 0
+
+
+def test_http_transport_raises_connection_error_on_server_failure():
+    tools = _bank_server(lambda tool, args: (503, '', False))
+    with pytest.raises(ConnectionError):
+        tools.call('get_accounts')
+    with pytest.raises(ConnectionError):
+        anyio.run(lambda: tools.acall('get_accounts'))
+    assert tools.stats()['errors'] == 2
+
+
+def test_runtime_gives_same_answers_over_stdio(stdio_tools):
+    runtime = DeterministicRuntime()
+    expected = [runtime.run(message) for message in ('show my accounts', 'show my mortgage')]
+    calls = stdio_tools.stats()['calls']
+    with patch('agent.runtime.get_bank_tools', return_value=stdio_tools), bypass_tool_cache():
+        assert [runtime.run(m) for m in ('show my accounts', 'show my mortgage')] == expected
+        assert [anyio.run(runtime.arun, m) for m in ('show my accounts', 'show my mortgage')] == expected
+    assert stdio_tools.stats()['calls'] == calls + 6
@@ -0,0 +1,133 @@
+"""Tests for the geocode result cache."""
+import sqlite3
+import threading
+
+import anyio
+
+from agent.geocode_cache import GeocodeCache, normalize_query
+
+_PLACE = {"latitude": 51.5, "longitude": -0.1, "label": "Tesco Extra"}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_queries_are_normalized():
+    cache = GeocodeCache()
+    cache.put("  Tesco   Superstore ", _PLACE)
+
+    assert normalize_query("TESCO superstore") == "tesco superstore"
+    assert cache.get("tesco superstore") == (True, _PLACE)
+    assert cache.get("Sainsbury's") == (False, None)
+
+
+def test_hits_return_caller_owned_copies():
+    cache = GeocodeCache()
+    cache.put("Tesco", _PLACE)
+    _, first = cache.get("Tesco")
+    first["label"] = "changed"
+
+    assert cache.get("Tesco")[1]["label"] == "Tesco Extra"
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = GeocodeCache(ttl_seconds=60, clock=clock)
+    cache.put("Tesco", _PLACE)
+    clock.now += 61
+
+    assert cache.get("Tesco") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_negative_answers_use_their_own_ttl():
+    clock = _Clock()
+    cache = GeocodeCache(ttl_seconds=600, negative_ttl_seconds=60, clock=clock)
+    cache.put("Online Purchase", None)
+
+    assert cache.get("Online Purchase") == (True, None)
+    assert cache.stats()["negativeHits"] == 1
+    clock.now += 61
+    assert cache.get("Online Purchase") == (False, None)
+
+
+def test_least_recently_used_query_is_evicted():
+    cache = GeocodeCache(max_entries=2)
+    cache.put("a", _PLACE)
+    cache.put("b", _PLACE)
+    cache.get("a")
+    cache.put("c", _PLACE)
+
+    assert cache.get("a")[0]
+    assert not cache.get("b")[0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "geocode.sqlite")
+    cache = GeocodeCache(path=path)
+    cache.put("Tesco", _PLACE)
+    cache.put("Online Purchase", None)
+    cache.close()
+
+    restarted = GeocodeCache(path=path)
+    assert restarted.get("tesco") == (True, _PLACE)
+    assert restarted.get("online purchase") == (True, None)
+    assert restarted.stats()["persistent"] is True
+
+
+def test_sqlite_store_drops_expired_rows(tmp_path):
+    path = str(tmp_path / "geocode.sqlite")
+    clock = _Clock()
+    cache = GeocodeCache(ttl_seconds=60, path=path, clock=clock)
+    cache.put("Tesco", _PLACE)
+    cache.close()
+
+    clock.now += 61
+    assert GeocodeCache(path=path, clock=clock).get("Tesco") == (False, None)
+
+
+def test_sqlite_store_keeps_at_most_max_disk_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.geocode_cache._PRUNE_EVERY", 1)
+    path = str(tmp_path / "geocode.sqlite")
+    clock = _Clock()
+    cache = GeocodeCache(max_disk_entries=2, path=path, clock=clock)
+    for query in ("a", "b", "c"):
+        cache.put(query, _PLACE)
+        clock.now += 1
+    cache.close()
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM geocode").fetchone() == (2,)
+
+    restarted = GeocodeCache(max_disk_entries=2, path=path, clock=clock)
+    assert [restarted.get(query)[0] for query in ("a", "b", "c")] == [False, True, True]
+
+
+def test_async_lookups_read_the_sqlite_store_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "geocode.sqlite")
+    cache = GeocodeCache(path=path)
+    cache.put("Tesco", _PLACE)
+    cache.close()
+
+    restarted = GeocodeCache(path=path)
+    loads = []
+    load = restarted._load
+
+    def recording_load(key):
+        loads.append(threading.get_ident())
+        return load(key)
+
+    restarted._load = recording_load
+
+    async def main():
+        return await restarted.aget("tesco"), threading.get_ident()
+
+    answer, loop_thread = anyio.run(main)
+    assert answer == (True, _PLACE)
+    assert loads and loop_thread not in loads
+    restarted.close()
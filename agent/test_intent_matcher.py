@@ -0,0 +1,86 @@
+"""Tests for the compiled keyword matcher and the runtime's use of it."""
+import itertools
+import random
+
+import pytest
+
+from agent.intent_matcher import KeywordMatcher, main
+from agent.runtime import DeterministicRuntime
+
+
+def test_finds_overlapping_and_contained_keywords():
+    matcher = KeywordMatcher({"account": "a", "accounts": "b", "all account": "c", "count": "d", "map": "e"})
+    assert matcher.find("all accounts") == {"a", "b", "c", "d"}
+    assert matcher.find("my account") == {"a", "d"}
+    assert matcher.find("bitmap") == {"e"}
+    assert matcher.find("nothing here") == set()
+    assert KeywordMatcher({}).find("anything") == set()
+
+
+def test_escapes_regex_metacharacters():
+    matcher = KeywordMatcher({"a.b": 1, "(x)": 2, "c++": 3})
+    assert matcher.find("a.b (x) c++") == {1, 2, 3}
+    assert matcher.find("axb x c+") == set()
+
+
+def test_matches_substring_tests_on_random_vocabularies():
+    rng = random.Random(3)
+    for _ in range(50):
+        vocabulary = {"".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(rng.randint(1, 12))}
+        matcher = KeywordMatcher({word: word for word in vocabulary})
+        for _ in range(20):
+            text = "".join(rng.choices("abc ", k=rng.randint(0, 15)))
+            assert matcher.find(text) == {word for word in vocabulary if word in text}
+
+
+def _reference_intent(message):
+    m = message.lower()
+    if any(kw in m for kw in ["where", "location", "map"]):
+        return "transaction_location"
+    if "show me" in m and ("shopped" in m or "spent" in m or "purchase" in m):
+        return "transaction_location"
+    for words, intent in [
+        (["mortgage"], "mortgage"),
+        (["credit", "card"], "credit"),
+        (["savings"], "savings"),
+        (["transaction"], "transactions"),
+        (["detail"], "account_detail"),
+        (["all account", "my account", "accounts", "overview"], "overview"),
+        (["account"], "account_detail"),
+    ]:
+        if any(w in m for w in words):
+            return intent
+    return "overview"
+
+
+def test_intent_matches_the_keyword_cascade():
+    runtime = DeterministicRuntime()
+    phrases = ["show me", "shopped", "where", "mortgage", "credit", "savings", "transactions",
+               "details", "all accounts", "my account", "account", "overview", "hello", "bitmap"]
+    for first, second in itertools.product(phrases, repeat=2):
+        message = f"{first.upper()} then {second}"
+        assert runtime._intent(message) == _reference_intent(message), message
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("where did I go to Tesco", "tx_2"),
+    ("where was my coffee shop purchase", "tx_1"),
+    ("where did I buy a newspaper", None),
+])
+def test_extract_merchant_returns_the_most_recent_match(message, expected):
+    transactions = [
+        {"id": "tx_1", "description": "Corner Coffee Shop"},
+        {"id": "tx_2", "description": "TESCO Superstore"},
+        {"id": "tx_3", "description": "Tesco Express"},
+        {"id": "tx_4", "description": "Shell"},
+    ]
+    result = DeterministicRuntime()._extract_merchant(message, transactions)
+    if expected is None:
+        assert result is None
+    else:
+        assert result[0]["id"] == expected and result[1] == result[0]["description"]
+
+
+def test_benchmark_runs(capsys):
+    assert main(["--sizes", "5", "50", "--messages", "20"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 3
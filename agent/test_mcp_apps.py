@@ -9,7 +9,9 @@ Wire protocol:
 """
 import json
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+
+import httpx
 import pytest
 
 
@@ -37,12 +39,32 @@ def _geocode_content(lat: str = "51.5074", lon: str = "-0.1278", name: str = "Lo
     return [{"type": "text", "text": _geocode_text(lat, lon, name)}]
 
 
-def _mock_http_response(content: list) -> MagicMock:
-    """Build a mock httpx response that returns SSE body."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.text = _sse_response(content)
-    return mock_response
+@pytest.fixture(autouse=True)
+def _fresh_geocode_cache():
+    """Geocodes are cached process-wide; keep tests independent of each other."""
+    from agent.geocode_cache import reset_geocode_cache
+
+    reset_geocode_cache()
+    yield
+    reset_geocode_cache()
+
+
+def _map_server(handler):
+    """Route the shared map-server clients through an in-memory transport."""
+    from agent.mcp_apps import MapServerClients
+
+    transport = httpx.MockTransport(handler)
+    clients = MapServerClients(transport=transport, async_transport=transport)
+    return patch('agent.mcp_apps._CLIENTS', clients)
+
+
+def _sse_handler(content: list, requests: list | None = None):
+    """Build a transport handler answering every request with an SSE body."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(request)
+        return httpx.Response(200, text=_sse_response(content), headers={"content-type": "text/event-stream"})
+    return handler
 
 
 # =============================================================================
@@ -110,11 +132,8 @@ def test_call_map_server_tool_success():
     AND the Accept header includes both application/json and text/event-stream
     """
     with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
-        with patch('agent.mcp_apps.httpx') as mock_httpx:
-            mock_httpx.post.return_value = _mock_http_response(
-                _geocode_content()
-            )
-
+        requests = []
+        with _map_server(_sse_handler(_geocode_content(), requests)):
             from agent.mcp_apps import call_map_server_tool
             result = call_map_server_tool('geocode', query='London')
 
@@ -122,14 +141,15 @@ def test_call_map_server_tool_success():
             assert isinstance(result, list)
             assert result[0]['type'] == 'text'
 
-            call_args = mock_httpx.post.call_args
-            payload = call_args[1]['json']
+            request = requests[0]
+            assert str(request.url) == 'http://localhost:3001/mcp'
+            payload = json.loads(request.content)
             assert payload['jsonrpc'] == '2.0'
             assert payload['method'] == 'tools/call'
             assert payload['params']['name'] == 'geocode'
             assert payload['params']['arguments']['query'] == 'London'
 
-            headers = call_args[1]['headers']
+            headers = request.headers
             assert 'text/event-stream' in headers['Accept']
             assert 'application/json' in headers['Accept']
 
@@ -142,14 +162,16 @@ def test_call_map_server_tool_connection_error():
     THEN the function returns None (graceful failure)
     AND does not raise an exception
     """
-    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
-        with patch('agent.mcp_apps.httpx') as mock_httpx:
-            mock_httpx.post.side_effect = Exception("Connection refused")
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
 
-            from agent.mcp_apps import call_map_server_tool
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(refuse):
+            from agent.mcp_apps import call_map_server_tool, get_map_server_clients
             result = call_map_server_tool('geocode', query='London')
 
             assert result is None
+            assert get_map_server_clients().stats()['errors'] == 1
 
 
 def test_call_map_server_tool_not_configured():
@@ -168,11 +190,7 @@ def test_call_map_server_tool_not_configured():
 def test_call_map_server_tool_http_error():
     """Edge case: HTTP 500 error from MCP server"""
     with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
-        with patch('agent.mcp_apps.httpx') as mock_httpx:
-            mock_response = MagicMock()
-            mock_response.status_code = 500
-            mock_httpx.post.return_value = mock_response
-
+        with _map_server(lambda request: httpx.Response(500)):
             from agent.mcp_apps import call_map_server_tool
             result = call_map_server_tool('geocode', query='London')
 
@@ -182,12 +200,7 @@ def test_call_map_server_tool_http_error():
 def test_call_map_server_tool_invalid_sse():
     """Edge case: Response is not valid SSE / JSON"""
     with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
-        with patch('agent.mcp_apps.httpx') as mock_httpx:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.text = "not sse format at all"
-            mock_httpx.post.return_value = mock_response
-
+        with _map_server(lambda request: httpx.Response(200, text="not sse format at all")):
             from agent.mcp_apps import call_map_server_tool
             result = call_map_server_tool('geocode', query='London')
 
@@ -391,3 +404,282 @@ def test_geocode_with_bbox_invalid_coords():
             result = geocode_with_bbox('Invalid Place')
 
             assert result is None
+
+
+# =============================================================================
+# Requirement: Non-blocking map server calls
+# =============================================================================
+
+def test_acall_map_server_tool_success():
+    """
+    Scenario: Async geocode does not block the event loop
+    GIVEN the map server is configured
+    WHEN acall_map_server_tool is awaited
+    THEN the request is sent with the async HTTP client and the content parsed
+    """
+    import anyio
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        requests = []
+        with _map_server(_sse_handler(_geocode_content(), requests)):
+            from agent.mcp_apps import ageocode_with_bbox
+            result = anyio.run(ageocode_with_bbox, 'London')
+
+            assert result is not None
+            assert result['label'] == 'London, UK'
+            assert json.loads(requests[0].content)['params']['arguments'] == {'query': 'London'}
+
+
+def test_acall_map_server_tool_connection_error():
+    import anyio
+
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(refuse):
+            from agent.mcp_apps import acall_map_server_tool
+            assert anyio.run(acall_map_server_tool, 'geocode') is None
+
+
+# =============================================================================
+# Requirement: Pooled keep-alive map server client
+# =============================================================================
+
+def test_map_server_client_is_reused_across_calls():
+    """
+    Scenario: Geocodes reuse one pooled client
+    GIVEN the map server is configured
+    WHEN several tools calls are made
+    THEN they share one HTTP client and are counted in the pool metrics
+    """
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(_sse_handler(_geocode_content())):
+            from agent.mcp_apps import call_map_server_tool, get_map_server_clients
+            clients = get_map_server_clients()
+            call_map_server_tool('geocode', query='London')
+            client = clients.client()
+            call_map_server_tool('geocode', query='Bristol')
+
+            assert clients.client() is client
+            stats = clients.stats()
+            assert stats['requests'] == 2
+            assert stats['errors'] == 0
+            assert stats['inFlight'] == 0
+            assert stats['peakInFlight'] == 1
+
+
+def test_map_server_client_uses_configured_limits_and_timeouts():
+    env = {
+        'MAP_SERVER_URL': 'http://localhost:3001/mcp',
+        'MAP_SERVER_MAX_CONNECTIONS': '7',
+        'MAP_SERVER_MAX_KEEPALIVE': '3',
+        'MAP_SERVER_CONNECT_TIMEOUT': '1.5',
+        'MAP_SERVER_READ_TIMEOUT': '12',
+    }
+    with patch.dict(os.environ, env):
+        from agent.mcp_apps import MapServerClients, get_mcp_apps_config
+        config = get_mcp_apps_config()
+        assert (config.max_connections, config.max_keepalive_connections) == (7, 3)
+
+        with patch('agent.mcp_apps.httpx.Client') as client_class:
+            MapServerClients().client()
+        options = client_class.call_args[1]
+        assert options['timeout'].connect == 1.5
+        assert options['timeout'].read == 12.0
+        assert options['limits'].max_connections == 7
+        assert options['limits'].max_keepalive_connections == 3
+
+
+# =============================================================================
+# Requirement: Geocode result cache
+# =============================================================================
+
+def test_geocode_repeated_merchant_is_served_from_cache():
+    """
+    Scenario: Repeated merchant geocodes hit the cache
+    GIVEN a merchant has been geocoded once
+    WHEN the same merchant (in any case/spacing) is geocoded again
+    THEN the map server is not called a second time
+    """
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with patch('agent.mcp_apps.call_map_server_tool') as mock_call:
+            mock_call.return_value = _geocode_content()
+
+            from agent.mcp_apps import geocode_merchant, geocode_with_bbox
+            first = geocode_with_bbox('Tesco Superstore')
+            assert geocode_with_bbox('tesco  superstore') == first
+            assert geocode_merchant('Tesco Superstore')['label'] == first['label']
+            assert mock_call.call_count == 1
+
+
+def test_geocode_no_such_place_is_cached_but_failures_are_not():
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with patch('agent.mcp_apps.call_map_server_tool') as mock_call:
+            from agent.mcp_apps import geocode_with_bbox
+
+            mock_call.return_value = [{"type": "text", "text": "No results found."}]
+            assert geocode_with_bbox('Online Purchase') is None
+            assert geocode_with_bbox('Online Purchase') is None
+            assert mock_call.call_count == 1
+
+            mock_call.return_value = None
+            assert geocode_with_bbox('Tesco Superstore') is None
+            mock_call.return_value = _geocode_content()
+            assert geocode_with_bbox('Tesco Superstore') is not None
+            assert mock_call.call_count == 3
+
+
+def test_async_geocode_shares_the_cache():
+    import anyio
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with patch('agent.mcp_apps.call_map_server_tool') as mock_call:
+            mock_call.return_value = _geocode_content()
+
+            from agent.mcp_apps import ageocode_with_bbox, geocode_with_bbox
+            expected = geocode_with_bbox('London')
+            assert anyio.run(ageocode_with_bbox, 'London') == expected
+
+
+# =============================================================================
+# Requirement: Coalesce concurrent identical geocodes
+# =============================================================================
+
+def test_concurrent_geocodes_of_one_merchant_share_a_request():
+    """
+    Scenario: Burst of users selecting the same merchant
+    GIVEN several threads geocode the same merchant at once
+    WHEN the first map server request is still in flight
+    THEN the others wait for it instead of sending their own
+    AND every caller gets its own copy of the result
+    """
+    import threading
+
+    release = threading.Event()
+    calls = []
+
+    def slow_call(tool_name, **kwargs):
+        calls.append(kwargs['query'])
+        release.wait(timeout=5)
+        return _geocode_content()
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with patch('agent.mcp_apps.call_map_server_tool', side_effect=slow_call):
+            from agent.mcp_apps import geocode_flight_stats, geocode_with_bbox
+
+            results = []
+            threads = [
+                threading.Thread(target=lambda q=q: results.append(geocode_with_bbox(q)))
+                for q in ['Tesco Superstore', 'tesco superstore', 'TESCO  Superstore', 'Tesco Superstore']
+            ]
+            for thread in threads:
+                thread.start()
+            threading.Timer(0.2, release.set).start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+            assert len(calls) == 1
+            assert len(results) == 4
+            assert all(r == results[0] for r in results)
+            assert len({id(r) for r in results}) == 4
+            assert geocode_flight_stats()['sync']['inFlight'] == 0
+
+
+# =============================================================================
+# Requirement: Streaming SSE parsing with early exit
+# =============================================================================
+
+def _feed(lines):
+    from agent.mcp_http import SseToolResultReader
+
+    reader = SseToolResultReader()
+    for line in lines:
+        done, content = reader.feed(line)
+        if done:
+            return content
+    return reader.finish()
+
+
+def test_sse_reader_joins_multi_line_data_fields():
+    data = json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": _geocode_content()}}, indent=2)
+    lines = ["event: message"] + [f"data: {part}" for part in data.splitlines()] + [""]
+
+    assert _feed(lines) == _geocode_content()
+
+
+def test_sse_reader_skips_notifications_and_comments():
+    notification = {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}}
+    other = {"jsonrpc": "2.0", "id": 7, "result": {"content": [{"type": "text", "text": "other"}]}}
+    ours = {"jsonrpc": "2.0", "id": 1, "result": {"content": _geocode_content()}}
+    lines = [
+        ": keep-alive", "",
+        f"data: {json.dumps(notification)}", "",
+        f"data: {json.dumps(other)}", "",
+        f"data: {json.dumps(ours)}", "",
+    ]
+
+    assert _feed(lines) == _geocode_content()
+
+
+def test_sse_reader_handles_unterminated_final_event_and_errors():
+    ours = {"jsonrpc": "2.0", "id": 1, "result": {"content": _geocode_content()}}
+    assert _feed([f"data:{json.dumps(ours)}"]) == _geocode_content()
+
+    error = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32602, "message": "bad"}}
+    assert _feed([f"data: {json.dumps(error)}", ""]) is None
+
+
+def test_call_map_server_tool_stops_reading_after_result():
+    """
+    Scenario: Slow or long SSE stream
+    GIVEN the map server sends our result and keeps the stream open
+    WHEN the tool is called
+    THEN the result is returned without reading the rest of the stream
+    """
+    consumed = []
+
+    def body():
+        yield _sse_response(_geocode_content()).encode()
+        for i in range(100):
+            consumed.append(i)
+            yield b": padding\n\n"
+
+    def handler(request):
+        return httpx.Response(200, content=body(), headers={"content-type": "text/event-stream"})
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(handler):
+            from agent.mcp_apps import call_map_server_tool
+            assert call_map_server_tool('geocode', query='London') == _geocode_content()
+            assert len(consumed) < 100
+
+
+def test_acall_map_server_tool_stops_reading_after_result():
+    import anyio
+
+    consumed = []
+
+    async def body():
+        yield _sse_response(_geocode_content()).encode()
+        for i in range(100):
+            consumed.append(i)
+            yield b": padding\n\n"
+
+    def handler(request):
+        return httpx.Response(200, content=body(), headers={"content-type": "text/event-stream"})
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(handler):
+            from agent.mcp_apps import acall_map_server_tool
+            assert anyio.run(acall_map_server_tool, 'geocode') == _geocode_content()
+            assert len(consumed) < 100
+
+
+def test_call_map_server_tool_accepts_plain_json_response():
+    payload = {"jsonrpc": "2.0", "id": 1, "result": {"content": _geocode_content()}}
+
+    with patch.dict(os.environ, {'MAP_SERVER_URL': 'http://localhost:3001/mcp'}):
+        with _map_server(lambda request: httpx.Response(200, json=payload)):
+            from agent.mcp_apps import call_map_server_tool
+            assert call_map_server_tool('geocode', query='London') == _geocode_content()
@@ -7,6 +7,8 @@ BDD scenarios covering:
 - Error/timeout handling
 - Streaming behavior
 """
+import json
+
 from agent.runtime import ADKRuntime, DeterministicRuntime, get_runtime
 
 
@@ -276,3 +278,207 @@ def test_deterministic_runtime_handles_transactions_query():
     tx = result.data['transactions']['0']
     assert 'amountDisplay' in tx
     assert 'formattedDate' in tx
+
+
+class _CountingRuntime:
+    created = 0
+
+    def __init__(self, thread_safe: bool):
+        type(self).created += 1
+        self.thread_safe = thread_safe
+        self.warmed = False
+
+    def warm_up(self):
+        self.warmed = True
+
+    def run(self, message):
+        raise NotImplementedError
+
+
+def test_runtime_pool_shares_thread_safe_runtime():
+    from agent.runtime import RuntimePool
+
+    pool = RuntimePool(lambda: _CountingRuntime(thread_safe=True), size=4)
+    pool.warm_up()
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is second
+        assert first.warmed
+    assert pool.stats()['created'] == 1
+
+
+def test_runtime_pool_gives_exclusive_non_thread_safe_runtimes():
+    from agent.runtime import RuntimePool
+
+    pool = RuntimePool(lambda: _CountingRuntime(thread_safe=False), size=2)
+    pool.warm_up()
+    assert pool.stats()['idle'] == 2
+
+    with pool.acquire() as first, pool.acquire() as second, pool.acquire() as third:
+        assert len({id(first), id(second), id(third)}) == 3
+        assert all(r.warmed for r in (first, second, third))
+    # The burst instance beyond the pool size is discarded on release.
+    assert pool.stats() == {'threadSafe': False, 'created': 3, 'idle': 2, 'size': 2}
+
+    with pool.acquire():
+        pass
+    assert pool.stats()['created'] == 3
+
+
+def test_runtime_pool_creates_runtimes_off_the_event_loop():
+    import threading
+
+    import anyio
+
+    from agent.runtime import RuntimePool
+
+    created_on = []
+
+    def factory():
+        created_on.append(threading.get_ident())
+        return _CountingRuntime(thread_safe=False)
+
+    pool = RuntimePool(factory, size=1)
+
+    async def main():
+        async with pool.aacquire() as first, pool.aacquire() as second:
+            assert first is not second
+        return threading.get_ident()
+
+    loop_thread = anyio.run(main)
+    assert len(created_on) == 2 and loop_thread not in created_on
+    assert pool.stats()['idle'] == 1
+
+
+def test_runtime_pool_is_process_wide(monkeypatch):
+    from agent.runtime import get_runtime_pool, reset_runtime_pool
+
+    monkeypatch.delenv('AGENT_RUNTIME', raising=False)
+    reset_runtime_pool()
+    try:
+        pool = get_runtime_pool()
+        assert get_runtime_pool() is pool
+        with pool.acquire() as runtime:
+            assert isinstance(runtime, DeterministicRuntime)
+    finally:
+        reset_runtime_pool()
+
+
+# Async runtime interface
+
+
+def test_deterministic_arun_matches_run():
+    import anyio
+
+    runtime = DeterministicRuntime()
+    for message in ('show my accounts', 'what is my mortgage balance?', 'show my transactions'):
+        expected = runtime.run(message)
+        actual = anyio.run(runtime.arun, message)
+        assert actual.template_name == expected.template_name
+        assert actual.data == expected.data
+
+
+def test_deterministic_arun_uses_async_geocoding():
+    import anyio
+    from unittest.mock import AsyncMock, patch
+
+    bbox = {"latitude": 51.5, "longitude": -0.1, "label": "Tesco", "west": -0.2, "south": 51.4, "east": 0.0, "north": 51.6}
+    with patch('agent.runtime.ageocode_with_bbox', new=AsyncMock(return_value=bbox)) as mock_geocode:
+        with patch('agent.runtime.geocode_with_bbox') as blocking_geocode:
+            result = anyio.run(DeterministicRuntime().arun, 'where did I shop at Tesco?')
+
+    assert result.template_name == 'transaction_location.json'
+    mock_geocode.assert_awaited_once_with('Tesco Superstore')
+    blocking_geocode.assert_not_called()
+
+
+def test_tool_errors_reach_action_fallback_in_both_drivers():
+    import anyio
+
+    action = json.dumps({"userAction": {"name": "selectAccount", "context": {"accountId": "missing"}}})
+    runtime = DeterministicRuntime()
+    # get_account_detail raises ToolError, which the action handler swallows
+    # before falling back to intent routing (the current account's detail).
+    for result in (runtime.run(action), anyio.run(runtime.arun, action)):
+        assert result.template_name == 'account_detail.json'
+        assert result.data['id'] == 'acc_current_001'
+
+
+class _FakeAsyncRunner:
+    def __init__(self, text):
+        self._text = text
+
+    async def run_async(self, **kwargs):
+        yield _FakeEvent(self._text)
+
+
+def test_adk_runtime_arun_parses_valid_json():
+    import anyio
+
+    runtime = ADKRuntime()
+    runtime._runner = _FakeAsyncRunner('{"text":"ok","template_name":"savings_summary.json","data":{"balance":"1.00"}}')
+    result = anyio.run(runtime.arun, 'show my savings')
+    assert result.template_name == 'savings_summary.json'
+    assert result.data == {"balance": "1.00"}
+
+
+class _FakeStreamingRunner:
+    """Streams ``text`` in ``size``-character partial events, then the whole."""
+
+    def __init__(self, text, size):
+        self._text = text
+        self._size = size
+        self.kwargs = None
+
+    async def run_async(self, **kwargs):
+        self.kwargs = kwargs
+        for start in range(0, len(self._text), self._size):
+            chunk = _FakeEvent(self._text[start:start + self._size], is_final=False)
+            chunk.partial = True
+            yield chunk
+        yield _FakeEvent(self._text)
+
+
+def test_adk_runtime_astream_yields_text_deltas_then_response():
+    import anyio
+    from agent.runtime import TemplateHint, TextDelta
+
+    text = '{"text": "Your savings \\u00e9 \\ud83d\\ude00 \\"pot\\"", "template_name": "savings_summary.json", "data": {"balance": "1.00"}}'
+    for size in (1, 2, 5):
+        runtime = ADKRuntime()
+        runtime._runner = _FakeStreamingRunner(text, size)
+
+        async def collect():
+            return [event async for event in runtime.astream('show my savings')]
+
+        events = anyio.run(collect)
+        deltas = [event.text for event in events[:-1] if isinstance(event, TextDelta)]
+        assert ''.join(deltas) == 'Your savings é 😀 "pot"'
+        # The template is announced once, before the data is streamed.
+        hints = [i for i, event in enumerate(events) if isinstance(event, TemplateHint)]
+        assert len(hints) == 1 and events[hints[0]].template_name == 'savings_summary.json'
+        assert hints[0] < len(events) - 1
+        assert events[-1].template_name == 'savings_summary.json'
+        assert events[-1].text == 'Your savings é 😀 "pot"'
+        assert runtime._runner.kwargs['run_config'].streaming_mode.value == 'sse'
+
+
+def test_deterministic_astream_hints_the_template_before_calling_tools():
+    import anyio
+    from unittest.mock import patch
+
+    from agent.runtime import TemplateHint, call_tool
+
+    runtime = DeterministicRuntime()
+    called = []
+
+    async def recording_acall_tool(name, **kwargs):
+        called.append(name)
+        return call_tool(name, **kwargs)
+
+    async def collect():
+        return [(event, list(called)) async for event in runtime.astream('show my mortgage')]
+
+    with patch('agent.runtime.acall_tool', recording_acall_tool):
+        events = anyio.run(collect)
+    assert events[0] == (TemplateHint('mortgage_summary.json'), [])
+    assert [event for event, _ in events[1:]] == [runtime.run('show my mortgage')]
@@ -0,0 +1,203 @@
+"""Tests for the bounded per-conversation ADK session store."""
+import pytest
+
+from agent.runtime import ADKRuntime
+from agent.sessions import SessionStore, call_session_service
+
+
+class _FakeSessionService:
+    def __init__(self):
+        self.sessions = set()
+
+    def create_session(self, *, app_name, user_id, session_id):
+        self.sessions.add(session_id)
+
+    def delete_session(self, *, app_name, user_id, session_id):
+        self.sessions.discard(session_id)
+
+
+class _AsyncSessionService(_FakeSessionService):
+    async def create_session(self, **kwargs):
+        super().create_session(**kwargs)
+
+    async def delete_session(self, **kwargs):
+        super().delete_session(**kwargs)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _store(service=None, **kwargs):
+    store = SessionStore(app_name="app", user_id="user", **kwargs)
+    store.bind(service or _FakeSessionService())
+    return store
+
+
+def test_same_context_reuses_session_and_contexts_are_isolated():
+    store = _store()
+    first = store.resolve("ctx-a")
+    assert store.resolve("ctx-a") == first
+    assert store.resolve("ctx-b") != first
+    assert store.service.sessions == {first, store.resolve("ctx-b")}
+
+
+def test_least_recently_used_context_is_evicted():
+    store = _store(max_sessions=2)
+    a = store.resolve("a")
+    store.resolve("b")
+    store.resolve("a")
+    store.resolve("c")
+
+    assert store.resolve("a") == a
+    assert store.stats()["evictedLru"] == 1
+    assert len(store.service.sessions) == 2
+
+
+def test_idle_context_expires_after_ttl():
+    clock = _Clock()
+    store = _store(ttl_seconds=60, clock=clock)
+    first = store.resolve("a")
+    clock.now = 61
+    second = store.resolve("a")
+
+    assert second != first
+    assert first not in store.service.sessions
+    assert store.stats()["evictedTtl"] == 1
+
+
+def test_history_is_truncated_after_turn_limit():
+    store = _store(max_turns=2)
+    first = store.resolve("a")
+    store.record_turn("a", events=3)
+    assert store.resolve("a") == first
+    store.record_turn("a", events=5)
+
+    stats = store.stats()
+    assert stats["turns"] == 2
+    assert stats["events"] == 8
+    assert stats["maxSessionEvents"] == 8
+
+    assert store.resolve("a") != first
+    assert store.stats()["rotations"] == 1
+    assert first not in store.service.sessions
+
+
+def test_rotation_carries_recent_turns_into_the_new_session():
+    pytest.importorskip("google.adk")
+    from google.adk.events import Event
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    def get(session_id):
+        return call_session_service(store.service, "get_session", app_name="app", user_id="user", session_id=session_id)
+
+    store = _store(service=InMemorySessionService(), max_turns=3, keep_turns=2)
+    first = store.resolve("a")
+    session = get(first)
+    for turn in range(3):
+        for author in ("user", "aibank_agent"):
+            event = Event(author=author, content=types.Content(parts=[types.Part(text=f"{author} {turn}")]))
+            call_session_service(store.service, "append_event", session=session, event=event)
+        store.record_turn("a", events=2)
+
+    second = store.resolve("a")
+    assert second != first
+    assert [e.content.parts[0].text for e in get(second).events] == ["user 1", "aibank_agent 1", "user 2", "aibank_agent 2"]
+    assert store.stats()["turns"] == 2
+    assert get(first) is None
+
+
+def test_async_session_service_is_supported():
+    store = _store(service=_AsyncSessionService(), max_sessions=1)
+    first = store.resolve("a")
+    assert first in store.service.sessions
+    store.resolve("b")
+    assert first not in store.service.sessions
+
+
+def test_resolve_requires_bound_service():
+    store = SessionStore(app_name="app", user_id="user")
+    with pytest.raises(RuntimeError):
+        store.resolve("a")
+
+
+class _FinalEvent:
+    def __init__(self, text):
+        self.content = type("Content", (), {"parts": [type("Part", (), {"text": text})()]})()
+
+    def is_final_response(self):
+        return True
+
+
+class _RecordingRunner:
+    def __init__(self):
+        self.session_ids = []
+
+    def run(self, *, user_id, session_id, new_message):
+        self.session_ids.append(session_id)
+        yield _FinalEvent('{"text":"ok","template_name":"account_overview.json","data":{}}')
+
+
+def test_adk_runtime_keys_sessions_by_context_id():
+    store = _store()
+    runtime = ADKRuntime(sessions=store)
+    runtime._runner = _RecordingRunner()
+
+    runtime.run("hello", context_id="ctx-1")
+    runtime.run("again", context_id="ctx-1")
+    runtime.run("other", context_id="ctx-2")
+    runtime.run("no context")
+
+    ids = runtime._runner.session_ids
+    assert ids[0] == ids[1] == store.resolve("ctx-1")
+    assert ids[2] == store.resolve("ctx-2") != ids[0]
+    # Turns without a context share one conversation, bounded like the rest.
+    assert ids[3] == store.resolve("aibank-default-session") not in ids[:3]
+    assert store.stats()["turns"] == 4
+
+
+def test_concurrent_creation_of_a_context_keeps_one_session():
+    service = _FakeSessionService()
+    store = _store(service=service)
+    create = service.create_session
+
+    def create_while_racing(**kwargs):
+        create(**kwargs)
+        if len(service.sessions) == 1:
+            # Another request resolves the same new context meanwhile.
+            store.resolve("a")
+
+    service.create_session = create_while_racing
+    session_id = store.resolve("a")
+    assert session_id == store.resolve("a")
+    assert service.sessions == {session_id}
+
+
+def test_jsonrpc_echoes_client_context_id():
+    from fastapi.testclient import TestClient
+
+    from agent.agent import app
+
+    res = TestClient(app).post("/", json={
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "message/send",
+        "params": {"message": {"contextId": "ctx-42", "parts": [{"kind": "text", "text": "show my accounts"}]}},
+    })
+    assert res.status_code == 200
+    assert res.json()["result"]["contextId"] == "ctx-42"
+
+
+def test_metrics_reports_sessions_in_adk_mode(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from agent.agent import app
+
+    monkeypatch.setenv("AGENT_RUNTIME", "adk")
+    body = TestClient(app).get("/metrics").json()
+    assert {"sessions", "maxSessions", "events", "evictedLru"} <= set(body["sessions"])
@@ -0,0 +1,171 @@
+"""Tests for request coalescing."""
+import threading
+
+import anyio
+import pytest
+
+from agent.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results = [None] * callers
+    arrived = threading.Barrier(callers)
+
+    def caller(i):
+        arrived.wait()
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"label": "Tesco"}
+
+    # Let the leader start, then hold it until the others are waiting on it.
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _run_concurrently(flight, "tesco", fn, callers=8)
+
+    assert len(calls) == 1
+    assert all(r == {"label": "Tesco"} for r in results)
+    stats = flight.stats()
+    assert stats == {"calls": 1, "coalesced": 7, "inFlight": 0}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(timeout=5)
+        raise ValueError("upstream down")
+
+    threading.Timer(0.2, release.set).start()
+    results = _run_concurrently(flight, "tesco", fail, callers=4)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.do("tesco", lambda: "ok") == "ok"
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_concurrent_tasks_share_one_await():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await anyio.sleep(0.05)
+        return "Tesco"
+
+    async def main():
+        results = []
+
+        async def caller():
+            results.append(await flight.do("tesco", fn))
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(5):
+                tg.start_soon(caller)
+        return results
+
+    assert anyio.run(main) == ["Tesco"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "inFlight": 0}
+
+
+def test_async_errors_propagate_to_all_waiters():
+    flight = AsyncSingleFlight()
+
+    async def fail():
+        await anyio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def main():
+        errors = []
+
+        async def caller():
+            with pytest.raises(ValueError):
+                await flight.do("tesco", fail)
+            errors.append(1)
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):
+                tg.start_soon(caller)
+        return errors
+
+    assert len(anyio.run(main)) == 3
+
+
+def test_cancelling_the_first_caller_leaves_the_call_to_the_others():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await anyio.sleep(0.05)
+        return "Tesco"
+
+    async def main():
+        results = []
+
+        async def waiter():
+            results.append(await flight.do("tesco", fn))
+
+        leader_scope = anyio.CancelScope()
+
+        async def leader():
+            with leader_scope:
+                results.append(await flight.do("tesco", fn))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(leader)
+            await anyio.sleep(0.01)
+            tg.start_soon(waiter)
+            await anyio.sleep(0.01)
+            leader_scope.cancel()
+        return results
+
+    assert anyio.run(main) == ["Tesco"]
+    assert len(calls) == 1
+    assert flight.stats()["inFlight"] == 0
+
+
+def test_the_call_is_cancelled_once_every_caller_is():
+    flight = AsyncSingleFlight()
+    finished = []
+
+    async def fn():
+        await anyio.sleep(1)
+        finished.append(1)
+
+    async def main():
+        with anyio.move_on_after(0.02):
+            async with anyio.create_task_group() as tg:
+                for _ in range(2):
+                    tg.start_soon(flight.do, "tesco", fn)
+        await anyio.sleep(0.01)
+
+    anyio.run(main)
+    assert finished == []
+    assert flight.stats()["inFlight"] == 0
@@ -0,0 +1,170 @@
+"""Tests for per-conversation surfaces and incremental data model updates."""
+import json
+
+import jsonschema
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.a2ui_schema import A2UI_SCHEMA
+from agent.surface_state import (
+    SurfaceStates,
+    data_model_deltas,
+    encode_data_updates,
+    reset_surface_states,
+)
+
+_OVERVIEW = {
+    "headerText": "Net Worth: £100.00",
+    "accounts": {"0": {"id": "acc_1", "balance": "10.00"}, "1": {"id": "acc/2", "balance": "90.00"}},
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_surface_states():
+    reset_surface_states()
+    yield
+    reset_surface_states()
+
+
+def _validated(messages):
+    decoded = [json.loads(message) for message in messages]
+    for message in decoded:
+        jsonschema.validate(instance=[message], schema=A2UI_SCHEMA)
+    return decoded
+
+
+def test_deltas_group_changed_keys_under_their_parent_path():
+    new = {
+        "headerText": "Net Worth: £110.00",
+        "accounts": {"0": {"id": "acc_1", "balance": "20.00"}, "1": {"id": "acc/2", "balance": "90.00"}},
+    }
+    assert data_model_deltas(_OVERVIEW, _OVERVIEW) == {}
+    assert data_model_deltas(_OVERVIEW, new) == {
+        "/": {"headerText": "Net Worth: £110.00"},
+        "/accounts/0": {"balance": "20.00"},
+    }
+
+    renamed = {**_OVERVIEW, "accounts": {**_OVERVIEW["accounts"], "0": {"id": "a/b", "balance": "10.00"}}}
+    nested = {**renamed, "accounts": {**renamed["accounts"], "x/y": {"id": "acc_3"}}}
+    assert data_model_deltas(renamed, nested) == {"/accounts": {"x/y": {"id": "acc_3"}}}
+    assert data_model_deltas({"a/b": {"c": "1"}}, {"a/b": {"c": "2"}}) == {"/a~1b": {"c": "2"}}
+
+
+def test_objects_that_lose_keys_are_set_whole():
+    shorter = {**_OVERVIEW, "accounts": {"0": _OVERVIEW["accounts"]["0"]}}
+    assert data_model_deltas(_OVERVIEW, shorter) == {"/": {"accounts": shorter["accounts"]}}
+    assert data_model_deltas(_OVERVIEW, {"headerText": "x"}) is None
+
+
+def test_updates_are_schema_valid_and_fall_back_to_the_full_model():
+    data = {"a": "1", "b": {"c": "2", "d": "3"}, "e": "some longer text to keep deltas smaller"}
+    data_json = json.dumps(data).encode()
+    (update,) = _validated(encode_data_updates("s1", {"/b": {"c": "2"}}, data_json))
+    assert update == {"dataModelUpdate": {"surfaceId": "s1", "path": "/b", "contents": {"c": "2"}}}
+
+    for deltas in ({"/": {"a": "1"}, "/b": {"c": "2", "d": "3"}}, None):
+        full = _validated(encode_data_updates("s1", deltas, data_json))
+        assert full == [{"dataModelUpdate": {"surfaceId": "s1", "contents": data}}]
+    assert encode_data_updates("s1", {}, data_json) == []
+
+
+def test_swap_reuses_surfaces_per_context_and_template():
+    states = SurfaceStates(max_contexts=2)
+    surface_id, previous = states.swap("ctx1", "account_overview.json", {"v": 1})
+    assert previous is None
+    assert states.swap("ctx1", "account_overview.json", {"v": 2}) == (surface_id, {"v": 1})
+    assert states.swap("ctx2", "account_overview.json", {"v": 1})[0] != surface_id
+
+    # An id already announced to the client starts a new surface.
+    assert states.swap("ctx1", "account_overview.json", {"v": 3}, "announced") == ("announced", None)
+    assert states.surface_id("ctx1", "account_overview.json") == "announced"
+
+    states.swap("ctx3", "account_overview.json", {})
+    assert states.surface_id("ctx2", "account_overview.json") is None
+    assert states.stats()["evictions"] == 1
+
+    disabled = SurfaceStates(enabled=False)
+    disabled.swap("ctx1", "account_overview.json", {})
+    assert disabled.swap("ctx1", "account_overview.json", {})[1] is None
+
+
+def _a2ui(body):
+    parts = body["result"]["status"]["message"]["parts"]
+    messages = [part["data"] for part in parts if part["kind"] == "data"]
+    for message in messages:
+        jsonschema.validate(instance=[message], schema=A2UI_SCHEMA)
+    return messages
+
+
+def test_repeat_replies_in_a_conversation_send_only_changes():
+    from mcp_server.store import get_store, set_store
+
+    from agent.agent import app
+
+    client = TestClient(app)
+
+    def send(text):
+        return client.post("/", json={
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "message/send",
+            "params": {"message": {"contextId": "ctx-deltas", "parts": [{"kind": "text", "text": text}]}},
+        }).json()
+
+    first = _a2ui(send("show my transactions"))
+    surface_id = first[0]["surfaceUpdate"]["surfaceId"]
+    # Unchanged data still re-shows the surface.
+    (again,) = _a2ui(send("show my transactions"))
+    assert again["beginRendering"]["surfaceId"] == surface_id
+
+    get_store().append_transaction("acc_current_001", {
+        "id": "tx_delta_test", "date": "2099-01-01", "description": "Delta Test",
+        "amount": "1.00", "currency": "GBP", "type": "debit", "runningBalance": "0.00",
+    })
+    try:
+        updates = _a2ui(send("show my transactions"))
+    finally:
+        set_store(None)
+    # A new transaction shifts every row, so the whole model is cheaper.
+    update, begin = updates
+    assert begin["beginRendering"]["surfaceId"] == surface_id
+    assert update["dataModelUpdate"]["surfaceId"] == surface_id
+    assert "path" not in update["dataModelUpdate"]
+    assert update["dataModelUpdate"]["contents"]["transactions"]["0"]["id"] == "tx_delta_test"
+
+    # Other conversations and other templates still get new surfaces.
+    overview = _a2ui(send("show my accounts"))
+    assert [list(message) for message in overview] == [["surfaceUpdate"], ["dataModelUpdate"], ["beginRendering"]]
+    assert overview[0]["surfaceUpdate"]["surfaceId"] != surface_id
+
+
+
+def test_reshowing_unchanged_data_never_sends_an_empty_message():
+    from agent.agent import app
+
+    client = TestClient(app)
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "message/send",
+        "params": {"message": {"contextId": "ctx1", "parts": [{"kind": "text", "text": "show current account"}]}},
+    }
+    client.post("/", json=payload)
+    parts = client.post("/", json=payload).json()["result"]["status"]["message"]["parts"]
+    assert parts and any("beginRendering" in part.get("data", {}) for part in parts)
+
+
+def test_stream_skips_the_early_surface_the_conversation_already_shows():
+    from agent.agent import app
+
+    client = TestClient(app)
+    payload = {"message": {"contextId": "ctx-stream", "parts": [{"kind": "text", "text": "show my mortgage"}]}}
+
+    def stream():
+        res = client.post("/a2a/message/stream", json=payload)
+        return [json.loads(line)["part"] for line in res.text.splitlines() if line.strip()]
+
+    assert any("surfaceUpdate" in part.get("data", {}) for part in stream())
+    again = stream()
+    assert [part["kind"] for part in again] == ["text", "data"]
+    assert list(again[1]["data"]) == ["beginRendering"]
@@ -44,3 +44,75 @@ def test_transaction_row_button_action_structure(template_name):
         "formattedDate": {"path": "formattedDate"},
         "amountDisplay": {"path": "amountDisplay"},
     }
+
+
+def test_registry_loads_every_template_once():
+    from agent.template_registry import TEMPLATES
+
+    templates_dir = Path(__file__).parent / 'templates'
+    assert TEMPLATES.names() == sorted(p.name for p in templates_dir.glob('*.json'))
+
+
+def test_registry_returns_independent_copies():
+    from agent.template_registry import TEMPLATES
+
+    first = TEMPLATES.get('account_overview.json')
+    first[0]['surfaceUpdate']['surfaceId'] = 'mutated'
+    second = TEMPLATES.get('account_overview.json')
+    assert second[0]['surfaceUpdate']['surfaceId'] == 'main_surface'
+
+
+def test_registry_rejects_invalid_template_at_load(tmp_path):
+    from agent.template_registry import TemplateError, TemplateRegistry
+
+    (tmp_path / 'broken.json').write_text(json.dumps([{"surfaceUpdate": {}}]), encoding='utf-8')
+    with pytest.raises(TemplateError, match='broken.json'):
+        TemplateRegistry(tmp_path)
+
+
+def test_registry_reload_keeps_previous_set_on_error(tmp_path):
+    from agent.template_registry import TemplateError, TemplateRegistry
+
+    valid = [{"beginRendering": {"surfaceId": "s", "root": "root"}}]
+    (tmp_path / 'ok.json').write_text(json.dumps(valid), encoding='utf-8')
+    registry = TemplateRegistry(tmp_path)
+
+    (tmp_path / 'bad.json').write_text('{not json', encoding='utf-8')
+    with pytest.raises(TemplateError):
+        registry.reload()
+    assert registry.names() == ['ok.json']
+    with pytest.raises(TemplateError):
+        registry.get('bad.json')
+
+
+def test_render_shares_components_and_isolates_envelopes():
+    from agent.template_registry import TEMPLATES
+
+    data = {"accounts": {}}
+    first = TEMPLATES.render('account_overview.json', 'surface-1', data)
+    second = TEMPLATES.render('account_overview.json', 'surface-2', {})
+
+    def payload(messages, key):
+        return next(item[key] for item in messages if key in item)
+
+    assert payload(first, 'surfaceUpdate')['components'] is payload(second, 'surfaceUpdate')['components']
+    assert payload(first, 'dataModelUpdate')['contents'] is data
+    assert {payload(first, key)['surfaceId'] for key in ('surfaceUpdate', 'dataModelUpdate', 'beginRendering')} == {'surface-1'}
+    assert payload(second, 'beginRendering')['surfaceId'] == 'surface-2'
+    # The registry's own copy is never stamped.
+    assert payload(TEMPLATES.get('account_overview.json'), 'surfaceUpdate')['surfaceId'] == 'main_surface'
+    jsonschema.validate(instance=first, schema=A2UI_SCHEMA)
+
+
+def test_encode_surface_and_remaining_messages_make_up_the_template():
+    from agent.template_registry import TemplateRegistry, dumps_compact
+
+    registry = TemplateRegistry()
+    data = {"balance": "1.00"}
+    for name in registry.names():
+        full = registry.encode(name, "s1", dumps_compact(data))
+        split = registry.encode_surface(name, "s1") + registry.encode(
+            name, "s1", dumps_compact(data), include_surface=False
+        )
+        assert sorted(split) == sorted(full)
+        assert all(b'"surfaceUpdate"' in m for m in registry.encode_surface(name, "s1"))
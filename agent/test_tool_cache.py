@@ -0,0 +1,203 @@
+"""Tests for the bank tool result cache."""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.tool_cache import ToolResultCache, bypass_tool_cache, get_tool_cache, reset_tool_cache
+
+_ACCOUNTS = [{"id": "acc_1", "balance": "10.00"}, {"id": "acc_2", "balance": "20.00"}]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _fresh_tool_cache():
+    reset_tool_cache()
+    yield
+    reset_tool_cache()
+
+
+def test_results_are_keyed_by_tool_and_arguments():
+    cache = ToolResultCache()
+    cache.put("get_transactions", {"account_id": "acc_1", "limit": 10}, ["tx"])
+
+    assert cache.get("get_transactions", {"limit": 10, "account_id": "acc_1"}) == (True, ["tx"])
+    assert cache.get("get_transactions", {"account_id": "acc_1", "limit": 5}) == (False, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_hits_return_caller_owned_copies():
+    cache = ToolResultCache()
+    cache.put("get_accounts", {}, _ACCOUNTS)
+    _, first = cache.get("get_accounts", {})
+    first[0]["balanceDisplay"] = "£10.00"
+
+    assert cache.get("get_accounts", {})[1] == _ACCOUNTS
+
+
+def test_entries_expire_and_are_evicted():
+    clock = _Clock()
+    cache = ToolResultCache(ttl_seconds=60, max_entries=2, clock=clock)
+    cache.put("get_accounts", {}, _ACCOUNTS)
+    clock.now += 61
+    assert cache.get("get_accounts", {}) == (False, None)
+
+    for account_id in ("acc_1", "acc_2", "acc_3"):
+        cache.put("get_account_detail", {"account_id": account_id}, {"id": account_id})
+    assert cache.get("get_account_detail", {"account_id": "acc_1"}) == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_uncacheable_tools_and_disabled_cache_always_miss():
+    cache = ToolResultCache()
+    cache.put("transfer_money", {}, "done")
+    assert cache.get("transfer_money", {}) == (False, None)
+
+    disabled = ToolResultCache(enabled=False)
+    disabled.put("get_accounts", {}, _ACCOUNTS)
+    assert disabled.get("get_accounts", {}) == (False, None)
+    assert ToolResultCache(ttl_seconds=0).enabled is False
+
+
+def _filled():
+    cache = ToolResultCache()
+    cache.put("get_accounts", {}, _ACCOUNTS)
+    cache.put("get_accounts", {"customer_id": "cust_other"}, [{"id": "acc_9"}])
+    for account_id in ("acc_1", "acc_2", "acc_9"):
+        cache.put("get_account_detail", {"account_id": account_id}, {"id": account_id})
+    return cache
+
+
+def test_account_invalidation_drops_the_account_and_all_listings():
+    cache = _filled()
+    assert cache.invalidate(account_id="acc_1") == 3
+    assert cache.get("get_account_detail", {"account_id": "acc_2"})[0]
+    assert not cache.get("get_account_detail", {"account_id": "acc_1"})[0]
+    assert not cache.get("get_accounts", {})[0]
+
+
+def test_customer_invalidation_drops_that_customers_listing_and_accounts():
+    # Listings made without a customer id (the default customer) count as
+    # matching, so here every entry goes.
+    assert _filled().invalidate(customer_id="cust_other") == 5
+
+    cache = ToolResultCache()
+    cache.put("get_accounts", {"customer_id": "cust_a"}, [{"id": "acc_a"}])
+    cache.put("get_accounts", {"customer_id": "cust_b"}, [{"id": "acc_b"}])
+    cache.put("get_account_detail", {"account_id": "acc_a"}, {})
+    cache.put("get_account_detail", {"account_id": "acc_b"}, {})
+    assert cache.invalidate(customer_id="cust_a") == 2
+    assert cache.get("get_account_detail", {"account_id": "acc_b"})[0]
+    assert cache.invalidate() == 2 and cache.stats()["entries"] == 0
+
+
+def test_bypass_refreshes_instead_of_reading():
+    cache = ToolResultCache()
+    cache.put("get_accounts", {}, _ACCOUNTS)
+    with bypass_tool_cache():
+        assert cache.get("get_accounts", {}) == (False, None)
+    assert cache.get("get_accounts", {}) == (True, _ACCOUNTS)
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_puts_started_before_an_invalidation_are_dropped():
+    cache = ToolResultCache()
+    generation = cache.generation
+    cache.invalidate(account_id="acc_1")
+    cache.put("get_accounts", {}, _ACCOUNTS, generation)
+    assert cache.get("get_accounts", {}) == (False, None)
+    assert cache.stats()["stalePuts"] == 1
+
+    cache.put("get_accounts", {}, _ACCOUNTS, cache.generation)
+    assert cache.get("get_accounts", {}) == (True, _ACCOUNTS)
+
+
+class _RemoteTools:
+    """A non-in-process transport answering from this process's store."""
+
+    name = "http"
+
+    def __init__(self):
+        from mcp_server import server
+
+        self.calls = 0
+        self._call_tool = server.call_tool
+
+    def call(self, name, **kwargs):
+        self.calls += 1
+        return self._call_tool(name, **kwargs)
+
+    async def acall(self, name, **kwargs):
+        return self.call(name, **kwargs)
+
+
+def test_in_process_tools_skip_the_cache():
+    from agent.runtime import DeterministicRuntime
+
+    DeterministicRuntime().run("show my transactions")
+    assert get_tool_cache().stats()["entries"] == 0
+
+
+def test_runtime_reuses_remote_results_until_the_store_changes():
+    from agent.runtime import DeterministicRuntime
+    from mcp_server.store import get_store
+
+    runtime = DeterministicRuntime()
+    tools = _RemoteTools()
+    with patch("agent.runtime.get_bank_tools", return_value=tools):
+        first = runtime.run("show my transactions")
+        assert runtime.run("show my transactions") == first
+        assert tools.calls == 2  # get_accounts + get_transactions, once each
+
+        account_id = "acc_current_001"
+        get_store().append_transaction(account_id, {
+            "id": "tx_cache_test", "date": "2099-01-01", "description": "Cache Test",
+            "amount": "1.00", "currency": "GBP", "type": "debit", "runningBalance": "0.00",
+        })
+        try:
+            refreshed = runtime.run("show my transactions")
+            assert tools.calls == 4
+            assert refreshed.data["transactions"]["0"]["id"] == "tx_cache_test"
+        finally:
+            from mcp_server.store import set_store
+            set_store(None)
+
+
+def test_chat_no_cache_header_and_invalidate_endpoint(monkeypatch):
+    from agent.agent import app
+
+    client = TestClient(app)
+    tools = _RemoteTools()
+    with patch("agent.runtime.get_bank_tools", return_value=tools):
+        client.post("/chat", json={"message": "show my accounts"})
+        client.post("/chat", json={"message": "show my accounts"})
+        assert tools.calls == 1
+        client.post("/chat", json={"message": "show my accounts"}, headers={"Cache-Control": "no-cache"})
+        assert tools.calls == 2
+
+        # Off by default, and only for callers holding the token once on.
+        assert client.post("/cache/invalidate", json={}).status_code == 404
+        monkeypatch.setenv("TOOL_CACHE_INVALIDATE_TOKEN", "s3cret")
+        assert client.post("/cache/invalidate", json={}).status_code == 401
+        wrong = {"Authorization": "Bearer nope"}
+        assert client.post("/cache/invalidate", json={}, headers=wrong).status_code == 401
+        response = client.post("/cache/invalidate", json={}, headers={"Authorization": "Bearer s3cret"})
+        assert response.json() == {"invalidated": 1}
+        client.post("/chat", json={"message": "show my accounts"})
+        assert tools.calls == 3
+    assert client.get("/metrics").json()["toolCache"]["bypassed"] == 1
+
+
+def test_free_text_merchant_lookups_are_not_cached():
+    cache = ToolResultCache()
+    args = {"account_id": "acc_1", "query": "where did I shop at Tesco?"}
+    cache.put("find_merchant_transaction", args, {"id": "tx"})
+    assert cache.get("find_merchant_transaction", args) == (False, None)
+    assert cache.stats()["entries"] == 0
@@ -400,3 +400,61 @@ def test_user_action_account_context_still_returns_account_detail():
 
         assert result.template_name == "account_detail.json"
         assert "transactions" in result.data
+
+
+def test_runtime_transaction_location_finds_merchants_beyond_recent_history():
+    """
+    Edge case: the merchant was last visited long ago
+    GIVEN a transaction older than the latest 20
+    WHEN the user asks where it was
+    THEN the bank's merchant index finds it without listing transactions
+    """
+    from agent.runtime import call_tool
+    from agent.tool_cache import bypass_tool_cache
+    from mcp_server.store import get_store, set_store
+
+    get_store().append_transaction('acc_current_001', {
+        'id': 'tx_old_bookshop', 'date': '2001-01-01', 'description': 'Blackwell Bookshop',
+        'amount': '12.00', 'currency': 'GBP', 'type': 'debit', 'runningBalance': '0.00',
+    })
+    try:
+        with patch('agent.runtime.call_tool', wraps=call_tool) as bank_tool, \
+                patch('agent.runtime.geocode_with_bbox') as mock_geocode, \
+                patch('agent.runtime.get_mcp_apps_config') as mock_cfg, bypass_tool_cache():
+            mock_cfg.return_value = _mock_config()
+            mock_geocode.return_value = _bbox_result(label='Blackwell Bookshop')
+            result = DeterministicRuntime().run('where was my Blackwell bookshop purchase?')
+    finally:
+        set_store(None)
+
+    assert result.template_name == 'transaction_location.json'
+    assert result.data['transaction']['id'] == 'tx_old_bookshop'
+    assert [c.args[0] for c in bank_tool.call_args_list] == ['get_accounts', 'find_merchant_transaction']
+
+
+def test_astream_hints_the_map_only_once_geocoding_succeeds():
+    import anyio
+
+    from agent.runtime import TemplateHint
+
+    async def collect(message):
+        return [event async for event in DeterministicRuntime().astream(message)]
+
+    async def fake_call_tool(name, **kwargs):
+        return {
+            'get_accounts': [{'id': 'acc1', 'type': 'current'}],
+            'find_merchant_transaction': {'id': 'tx1', 'date': '2026-02-20', 'description': 'Tesco Superstore',
+                                          'amount': '29.99'},
+        }.get(name, [])
+
+    for bbox, template in ((None, 'transaction_list.json'), (_bbox_result(), 'transaction_location.json')):
+        async def fake_geocode(query):
+            return bbox
+
+        with patch('agent.runtime.acall_tool', fake_call_tool), \
+                patch('agent.runtime.ageocode_with_bbox', fake_geocode), \
+                patch('agent.runtime.get_mcp_apps_config', return_value=_mock_config()):
+            events = anyio.run(collect, 'where was my Tesco transaction?')
+        hints = [event.template_name for event in events if isinstance(event, TemplateHint)]
+        assert events[-1].template_name == template
+        assert hints == ([template] if bbox else [])
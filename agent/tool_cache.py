@@ -0,0 +1,260 @@
+"""
+Bank tool result cache.
+
+The runtime re-reads the same data constantly: nearly every turn starts with
+``get_accounts``, and overview/detail views are revisited far more often than
+balances change. Results of the read-only bank tools are therefore cached in
+front of the tool transport, keyed by tool name and arguments:
+
+- TTL: results are reused for ``ttl_seconds``.
+- LRU: at most ``max_entries`` results are kept.
+- Per customer: every entry records the customer or account it belongs to,
+  so ``invalidate`` can drop exactly the data that changed. Account listings
+  (which show balances) are dropped along with any of their accounts.
+- Invalidation: remote tool servers' owners call ``POST /cache/invalidate``
+  on the agent (see ``TOOL_CACHE_INVALIDATE_TOKEN``); changes to this
+  process's bank store invalidate it automatically. A result fetched while
+  an invalidation happened is not stored, since it may predate the change.
+- Bypass: inside ``bypass_tool_cache()`` (``Cache-Control: no-cache`` on
+  ``/chat``) tools are always called and the fresh result replaces the
+  cached one.
+
+Results are copied in and out, so callers may decorate them freely. The
+runtime only caches remote transports: an in-process tool call is a cheaper
+dictionary lookup than a cache hit's key and copy.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+# Tools whose results depend only on their arguments and the bank data.
+# find_merchant_transaction is left out: it is keyed by the user's free-text
+# message, so its entries would rarely hit and only evict useful ones.
+CACHEABLE_TOOLS = frozenset({
+    "get_accounts",
+    "get_account_detail",
+    "get_transactions",
+    "get_transactions_page",
+    "get_mortgage_summary",
+    "get_credit_card_statement",
+})
+
+_BYPASS: ContextVar[bool] = ContextVar("_BYPASS", default=False)
+
+
+@contextmanager
+def bypass_tool_cache() -> Iterator[None]:
+    """Skip cached results for tool calls made in this context."""
+    token = _BYPASS.set(True)
+    try:
+        yield
+    finally:
+        _BYPASS.reset(token)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    result: Any
+    expires_at: float
+    # None for listings of the default customer and for account-scoped entries.
+    customer_id: str | None
+    account_id: str | None
+
+
+class ToolResultCache:
+    """LRU/TTL-bounded results of read-only bank tool calls."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 1024,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self.enabled = enabled and ttl_seconds > 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+        # Bumped by every invalidation; see put().
+        self._generation = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """
+        Environment variables:
+        - TOOL_CACHE_ENABLED: set to ``false`` to call the tools every time (default true)
+        - TOOL_CACHE_TTL_SECONDS: lifetime of a cached result (default 60)
+        - TOOL_CACHE_MAX_ENTRIES: results kept in memory (default 1024)
+        """
+        return cls(
+            ttl_seconds=float(os.getenv("TOOL_CACHE_TTL_SECONDS", "60")),
+            max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+            enabled=os.getenv("TOOL_CACHE_ENABLED", "true").lower() not in ("0", "false", "no"),
+        )
+
+    @staticmethod
+    def _key(name: str, kwargs: dict[str, Any]) -> str:
+        return json.dumps([name, kwargs], sort_keys=True, default=str)
+
+    def applies(self, name: str) -> bool:
+        return self.enabled and name in CACHEABLE_TOOLS
+
+    def get(self, name: str, kwargs: dict[str, Any]) -> tuple[bool, Any]:
+        """
+        Look up a tool call.
+
+        Returns ``(True, result)`` on a hit and ``(False, None)`` on a miss,
+        when bypassed, or for tools that are not cached.
+        """
+        if not self.applies(name):
+            return False, None
+        key = self._key(name, kwargs)
+        with self._lock:
+            if _BYPASS.get():
+                self._bypassed += 1
+                return False, None
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                self._entries.pop(key, None)
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            result = entry.result
+        return True, copy.deepcopy(result)
+
+    @property
+    def generation(self) -> int:
+        """Read before calling a tool, and pass to put() with its result."""
+        with self._lock:
+            return self._generation
+
+    def put(self, name: str, kwargs: dict[str, Any], result: Any, generation: int | None = None) -> None:
+        """
+        Store a tool result.
+
+        A ``generation`` older than the cache's means the cache was
+        invalidated while the tool ran, so the result may be stale and is
+        dropped.
+        """
+        if not self.applies(name):
+            return
+        entry = _Entry(
+            result=copy.deepcopy(result),
+            expires_at=self._clock() + self._ttl,
+            customer_id=kwargs.get("customer_id"),
+            account_id=kwargs.get("account_id"),
+        )
+        key = self._key(name, kwargs)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self._stale_puts += 1
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, customer_id: str | None = None, account_id: str | None = None) -> int:
+        """
+        Drop cached results affected by a change; returns how many.
+
+        With an ``account_id`` that account's results and every account
+        listing (they show balances) are dropped. With only a
+        ``customer_id``, that customer's listings and the results of the
+        accounts they list; listings made without a customer id belong to
+        the default customer, whose id the agent does not know, so they are
+        treated as matching. With neither, everything is dropped.
+        """
+        with self._lock:
+            if customer_id is None and account_id is None:
+                doomed = list(self._entries)
+            else:
+                accounts = {account_id} if account_id is not None else set()
+                listings = set()
+                for key, entry in self._entries.items():
+                    if entry.account_id is not None:
+                        continue
+                    if account_id is not None:
+                        listings.add(key)
+                    elif entry.customer_id in (None, customer_id):
+                        listings.add(key)
+                        accounts.update(a.get("id") for a in entry.result if isinstance(a, dict))
+                doomed = [
+                    key for key, entry in self._entries.items()
+                    if key in listings or (entry.account_id is not None and entry.account_id in accounts)
+                ]
+            for key in doomed:
+                del self._entries[key]
+            self._invalidations += 1
+            self._generation += 1
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "maxEntries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "stalePuts": self._stale_puts,
+            }
+
+
+_CACHE: ToolResultCache | None = None
+_UNSUBSCRIBE: Callable[[], None] | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """
+    Return the process-wide tool result cache, creating it on first use.
+
+    The cache subscribes to changes of the in-process bank store, which
+    covers the default transport; other processes' stores cannot notify it.
+    """
+    global _CACHE, _UNSUBSCRIBE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            from mcp_server.store import on_change
+
+            _CACHE = ToolResultCache.from_env()
+            _UNSUBSCRIBE = on_change(_CACHE.invalidate)
+        return _CACHE
+
+
+def reset_tool_cache() -> None:
+    """Drop the process-wide cache; the next get_tool_cache() starts fresh."""
+    global _CACHE, _UNSUBSCRIBE
+    with _CACHE_LOCK:
+        unsubscribe, _CACHE, _UNSUBSCRIBE = _UNSUBSCRIBE, None, None
+    if unsubscribe is not None:
+        unsubscribe()
@@ -0,0 +1,264 @@
+"""
+Column-wise transaction storage.
+
+``ColumnarTransactionLog`` is a drop-in alternative to ``store.TransactionLog``
+for large datasets. Instead of one dict of seven strings per transaction it
+keeps one typed ``array`` per field:
+
+- date as a day ordinal, amount and running balance as integer pence;
+- description and currency as indexes into a ``StringTable`` shared by
+  every log of a store (merchant names repeat constantly);
+- type as a one-byte index into ``TYPES``;
+- id split into a prefix, interned in a second shared table, and its trailing
+  number, so ``tx_acc_current_001_042`` costs a table index and an integer.
+
+That is around 60 bytes per transaction instead of roughly 700. Dicts
+are materialized only for the rows a query returns. Amounts are normalized
+to two decimal places on the way in.
+
+Enable it with ``BANK_STORE_LAYOUT=columnar`` (see ``store.get_store``).
+"""
+from __future__ import annotations
+
+import bisect
+import re
+from array import array
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
+
+# Column name -> array typecode, in storage order.
+COLUMNS = {
+    "day": "i",
+    "id_prefix": "I",
+    "id_number": "q",
+    "id_width": "B",
+    "description": "I",
+    "amount": "q",
+    "currency": "I",
+    "type": "B",
+    "balance": "q",
+}
+# Transaction types, stored as their index here.
+TYPES = ("debit", "credit")
+_TYPE_IDS = {name: index for index, name in enumerate(TYPES)}
+_FIELDS = frozenset({"id", "date", "description", "amount", "currency", "type", "runningBalance"})
+_ID_RE = re.compile(r"^(.*?)(\d{1,18})$")
+_AMOUNT_RE = re.compile(r"^(-?)(\d+)\.(\d\d)$")
+
+
+class StringTable:
+    """Interns strings to small integer ids."""
+
+    def __init__(self) -> None:
+        self._strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, index: int) -> str:
+        return self._strings[index]
+
+    def intern(self, value: str) -> int:
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def id_of(self, value: str) -> int | None:
+        return self._ids.get(value)
+
+    def matching(self, needle: str) -> set[int]:
+        """Ids of the strings containing ``needle`` (case-insensitive)."""
+        needle = needle.casefold()
+        return {i for i, value in enumerate(self._strings) if needle in value.casefold()}
+
+
+def _to_pence(amount: str) -> int:
+    match = _AMOUNT_RE.match(amount)
+    if match:
+        sign, pounds, pence = match.groups()
+        value = int(pounds) * 100 + int(pence)
+        return -value if sign else value
+    pence = Decimal(amount) * 100
+    if pence != pence.to_integral_value():
+        raise ValueError(f"Amount {amount!r} has more than two decimal places")
+    return int(pence)
+
+
+def format_pence(pence: int) -> str:
+    """Format integer pence as a two-decimal amount string."""
+    sign = "-" if pence < 0 else ""
+    pence = abs(pence)
+    return f"{sign}{pence // 100}.{pence % 100:02d}"
+
+
+@lru_cache(maxsize=8192)
+def _iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+class _Keys:
+    """Sequence view of a log's (date, id) keys, for bisecting on a cursor."""
+
+    def __init__(self, log: "ColumnarTransactionLog") -> None:
+        self._log = log
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def __getitem__(self, index: int) -> tuple[str, str]:
+        return _iso(self._log._day[index]), self._log._id(index)
+
+
+class ColumnarTransactionLog:
+    """One account's transactions in typed columns, ordered by (date, id)."""
+
+    __slots__ = ("_strings", "_prefixes", "_day", "_id_prefix", "_id_number", "_id_width",
+                 "_description", "_amount", "_currency", "_type", "_balance")
+
+    def __init__(
+        self,
+        transactions: Iterable[dict[str, Any]] = (),
+        *,
+        strings: StringTable | None = None,
+        prefixes: StringTable | None = None,
+    ) -> None:
+        self._strings = strings if strings is not None else StringTable()
+        self._prefixes = prefixes if prefixes is not None else StringTable()
+        for name, typecode in COLUMNS.items():
+            setattr(self, f"_{name}", array(typecode))
+        for transaction in sorted(transactions, key=lambda tx: (tx["date"], tx["id"])):
+            self.append(transaction)
+
+    @classmethod
+    def from_columns(cls, *, strings: Any, prefixes: Any, **columns: Any) -> "ColumnarTransactionLog":
+        """
+        Wrap existing columns (e.g. memoryviews over a snapshot) without copying.
+
+        ``columns`` are keyed by slot name without the underscore; read-only
+        columns give a read-only log.
+        """
+        log = cls.__new__(cls)
+        log._strings = strings
+        log._prefixes = prefixes
+        for name in COLUMNS:
+            setattr(log, f"_{name}", columns[name])
+        return log
+
+    def columns(self) -> dict[str, Any]:
+        """The log's columns keyed by name, in ``COLUMNS`` order."""
+        return {name: getattr(self, f"_{name}") for name in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._day)
+
+    def _id(self, index: int) -> str:
+        prefix = self._prefixes[self._id_prefix[index]]
+        width = self._id_width[index]
+        return f"{prefix}{self._id_number[index]:0{width}d}" if width else prefix
+
+    def _row(self, index: int) -> dict[str, Any]:
+        strings = self._strings
+        return {
+            "id": self._id(index),
+            "date": _iso(self._day[index]),
+            "description": strings[self._description[index]],
+            "amount": format_pence(self._amount[index]),
+            "currency": strings[self._currency[index]],
+            "type": TYPES[self._type[index]],
+            "runningBalance": format_pence(self._balance[index]),
+        }
+
+    def append(self, transaction: dict[str, Any]) -> None:
+        """Insert a transaction at its position (O(1) when it is the newest)."""
+        unknown = transaction.keys() - _FIELDS
+        if unknown:
+            raise ValueError(f"Columnar layout cannot store fields: {sorted(unknown)}")
+        tx_id = transaction["id"]
+        match = _ID_RE.match(tx_id)
+        prefix, number, width = (match.group(1), int(match.group(2)), len(match.group(2))) if match else (tx_id, 0, 0)
+        tx_type = transaction.get("type", "debit")
+        if tx_type not in _TYPE_IDS:
+            raise ValueError(f"Columnar layout cannot store transaction type: {tx_type!r}")
+        intern = self._strings.intern
+        day = date.fromisoformat(transaction["date"]).toordinal()
+        row = (
+            day,
+            self._prefixes.intern(prefix),
+            number,
+            width,
+            intern(transaction.get("description", "")),
+            _to_pence(transaction.get("amount", "0")),
+            intern(transaction.get("currency", "GBP")),
+            _TYPE_IDS[tx_type],
+            _to_pence(transaction.get("runningBalance", "0")),
+        )
+        columns = (self._day, self._id_prefix, self._id_number, self._id_width, self._description,
+                   self._amount, self._currency, self._type, self._balance)
+
+        if not self._day or day > self._day[-1] or (day == self._day[-1] and tx_id >= self._id(-1)):
+            for column, value in zip(columns, row):
+                column.append(value)
+            return
+        index = bisect.bisect_right(_Keys(self), (transaction["date"], tx_id))
+        for column, value in zip(columns, row):
+            column.insert(index, value)
+
+    def newest(self, limit: int) -> list[dict[str, Any]]:
+        """Return the ``limit`` most recent transactions, newest first."""
+        count = len(self)
+        return [self._row(index) for index in range(count - 1, max(count - max(0, limit), 0) - 1, -1)]
+
+    def descriptions(self) -> Iterator[tuple[str, tuple[str, str]]]:
+        """``(description, (date, id))`` of every transaction, oldest first."""
+        keys = _Keys(self)
+        for index in range(len(self)):
+            yield self._strings[self._description[index]], keys[index]
+
+    def get(self, key: tuple[str, str]) -> dict[str, Any] | None:
+        """Return the transaction with this (date, id) key."""
+        keys = _Keys(self)
+        index = bisect.bisect_left(keys, key)
+        return self._row(index) if index < len(keys) and keys[index] == key else None
+
+    def page(
+        self,
+        limit: int,
+        *,
+        before: tuple[str, str] | None = None,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        merchant: str | None = None,
+        type: str | None = None,
+    ) -> tuple[list[dict[str, Any]], tuple[str, str] | None]:
+        """Same contract as ``store.TransactionLog.page``."""
+        hi = len(self)
+        if to_date is not None:
+            hi = bisect.bisect_right(self._day, date.fromisoformat(to_date).toordinal())
+        if before is not None:
+            hi = min(hi, bisect.bisect_left(_Keys(self), before))
+        lo = bisect.bisect_left(self._day, date.fromisoformat(from_date).toordinal()) if from_date is not None else 0
+        # Filters are resolved to string-table ids once, so the scan compares
+        # integers rather than strings.
+        merchants = self._strings.matching(merchant) if merchant else None
+        type_id = _TYPE_IDS.get(type) if type is not None else None
+        if (type is not None and type_id is None) or merchants == set():
+            return [], None
+
+        limit = max(0, limit)
+        page: list[dict[str, Any]] = []
+        last: int | None = None
+        for index in range(hi - 1, lo - 1, -1):
+            if type_id is not None and self._type[index] != type_id:
+                continue
+            if merchants is not None and self._description[index] not in merchants:
+                continue
+            if len(page) == limit:
+                return page, (_Keys(self)[last] if last is not None else None)
+            page.append(self._row(index))
+            last = index
+        return page, None
@@ -0,0 +1,326 @@
+"""
+Synthetic bank dataset generator for load testing.
+
+Produces customers, accounts and transactions at production-like volumes and
+writes them to a gzip-compressed JSON Lines file that ``store.get_store``
+loads in place of the mock data when ``BANK_DATASET_PATH`` is set.
+
+Output is deterministic: every customer is generated from its own RNG seeded
+with ``(seed, customer index)``, and dates count back from a fixed end date
+(``DEFAULT_END_DATE`` unless given), so the same arguments always produce
+the same file, byte for byte.
+
+File layout (one compact JSON value per line)::
+
+    {"format": "aibank-dataset", "version": 1, ...}    header
+    ["c", id, name]                                     customer
+    ["a", {account fields, "customerId": ...}]          account
+    ["t", account_id, id, date, description, amount, type, runningBalance]
+
+Usage (from the repository root)::
+
+    python -m mcp_server.datagen --customers 100000 --seed 7 --output bank.jsonl.gz
+    BANK_DATASET_PATH=bank.jsonl.gz python -m mcp_server.mcp_server
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import itertools
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Iterator
+
+from .columnar import format_pence
+from .mock_data import ACCOUNTS, CUSTOMER, TRANSACTIONS
+from .store import BankStore
+
+FORMAT = "aibank-dataset"
+VERSION = 1
+# Newest transaction date when none is given; fixed so output is reproducible.
+DEFAULT_END_DATE = date(2025, 6, 30)
+
+_FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+_LAST_NAMES = ["Morgan", "Lee", "Patel", "Smith", "Jones", "Khan", "Evans", "Walsh", "Brown", "Okafor"]
+
+# (merchant, relative frequency, median amount in pence, spread); frequencies
+# are roughly Zipfian and amounts log-normal around a per-merchant median.
+_MERCHANTS = [
+    ("Tesco Superstore", 30, 3500, 0.6),
+    ("Pret A Manger", 22, 750, 0.3),
+    ("Transport for London", 20, 280, 0.4),
+    ("Costa Coffee", 16, 420, 0.3),
+    ("Amazon UK", 14, 2400, 0.9),
+    ("M&S Food", 12, 1800, 0.5),
+    ("Boots", 9, 1200, 0.6),
+    ("Sainsbury's", 9, 4200, 0.5),
+    ("Deliveroo", 7, 2300, 0.4),
+    ("Shell", 6, 5500, 0.3),
+    ("Spotify", 3, 1199, 0.0),
+    ("Netflix", 3, 1099, 0.0),
+    ("Octopus Energy", 2, 9500, 0.2),
+    ("Council Tax", 2, 16500, 0.1),
+    ("Online Purchase", 5, 3000, 0.8),
+]
+_MERCHANT_CUM_WEIGHTS = list(itertools.accumulate(m[1] for m in _MERCHANTS))
+
+
+def _customer_rng(seed: int, index: int) -> random.Random:
+    return random.Random(f"{seed}:{index}")
+
+
+def _account(rng: random.Random, customer_id: str, account_id: str, kind: str, end: date) -> dict[str, Any]:
+    account: dict[str, Any] = {
+        "id": account_id,
+        "customerId": customer_id,
+        "type": kind,
+        "currency": "GBP",
+    }
+    if kind == "current":
+        account.update(
+            name="Everyday Current Account",
+            accountNumber=f"{rng.randrange(10**8):08d}",
+            sortCode="-".join(f"{rng.randrange(100):02d}" for _ in range(3)),
+            overdraftLimit=format_pence(rng.choice([0, 25000, 50000, 100000])),
+        )
+    elif kind == "savings":
+        account.update(
+            name="Rainy Day Saver",
+            accountNumber=f"{rng.randrange(10**8):08d}",
+            interestRate=f"{rng.uniform(1.5, 5.0):.2f}",
+            interestEarned=format_pence(rng.randrange(0, 50000)),
+        )
+    elif kind == "credit":
+        limit = rng.choice([100000, 250000, 500000, 1000000])
+        account.update(
+            name="AIBank Platinum Card",
+            cardNumberMasked=f"**** **** **** {rng.randrange(10**4):04d}",
+            creditLimit=format_pence(limit),
+            paymentDueDate=(end + timedelta(days=rng.randrange(1, 28))).isoformat(),
+        )
+    else:
+        original = rng.randrange(100000, 600000) * 100
+        outstanding = int(original * rng.uniform(0.2, 0.95))
+        account.update(
+            name="Home Mortgage",
+            balance=format_pence(-outstanding),
+            propertyAddress=f"{rng.randrange(1, 200)} Cedar Grove, Bristol, BS{rng.randrange(1, 40)} 4AB",
+            originalAmount=format_pence(original),
+            outstandingBalance=format_pence(outstanding),
+            monthlyPayment=format_pence(outstanding // 180),
+            interestRate=f"{rng.uniform(1.0, 6.0):.2f}",
+            rateType=rng.choice(["fixed", "variable"]),
+            termEndDate=(end + timedelta(days=365 * rng.randrange(5, 30))).isoformat(),
+            nextPaymentDate=(end + timedelta(days=rng.randrange(1, 28))).isoformat(),
+        )
+    return account
+
+
+def _transactions(
+    rng: random.Random, account: dict[str, Any], count: int, end: date, days: int
+) -> Iterator[list[Any]]:
+    """Yield transaction records oldest first, maintaining a running balance."""
+    account_id = account["id"]
+    kind = account["type"]
+    balance = rng.randrange(0, 500000) if kind != "credit" else 0
+    offsets = sorted(rng.randrange(days) for _ in range(count))
+    for n, offset in enumerate(reversed(offsets), start=1):
+        tx_date = end - timedelta(days=offset)
+        if kind == "savings":
+            description = rng.choice(["Transfer from Current Account", "Interest", "Transfer to Current Account"])
+            pence = rng.randrange(1000, 50000)
+            is_debit = description == "Transfer to Current Account"
+        elif kind == "current" and tx_date.day == 25 and rng.random() < 0.9:
+            description, pence, is_debit = "Salary", rng.randrange(180000, 450000), False
+        else:
+            description, _, median, spread = rng.choices(_MERCHANTS, cum_weights=_MERCHANT_CUM_WEIGHTS)[0]
+            pence = max(50, int(rng.lognormvariate(0, spread) * median)) if spread else median
+            # A small share of card activity is refunds.
+            is_debit = rng.random() > 0.03
+        balance += -pence if is_debit else pence
+        yield [
+            "t",
+            account_id,
+            f"tx_{account_id}_{n:06d}",
+            tx_date.isoformat(),
+            description,
+            format_pence(pence),
+            "debit" if is_debit else "credit",
+            format_pence(balance),
+        ]
+    # The account's balance is where its history ends.
+    if kind != "mortgage":
+        account["balance"] = format_pence(balance)
+        if kind == "credit":
+            limit = int(account["creditLimit"].replace(".", ""))
+            account["availableCredit"] = format_pence(limit + balance)
+            account["minimumPayment"] = format_pence(max(0, -balance) // 50)
+
+
+def _demo_records(end: date) -> Iterator[list[Any]]:
+    """The mock data customer, accounts and history, re-dated to end at ``end``."""
+    # The mock data is dated relative to the day it was imported, which is
+    # the date of its newest transaction.
+    newest = max(tx["date"] for txs in TRANSACTIONS.values() for tx in txs)
+    shift = end - date.fromisoformat(newest)
+
+    def moved(value: str) -> str:
+        return (date.fromisoformat(value) + shift).isoformat()
+
+    yield ["c", CUSTOMER["id"], CUSTOMER["name"]]
+    for account in ACCOUNTS:
+        dates = {key: moved(value) for key, value in account.items() if key.endswith("Date")}
+        yield ["a", {**account, **dates, "customerId": CUSTOMER["id"]}]
+    for account_id, txs in TRANSACTIONS.items():
+        for tx in txs:
+            yield ["t", account_id, tx["id"], moved(tx["date"]), tx["description"], tx["amount"], tx["type"],
+                   tx["runningBalance"]]
+
+
+def generate(
+    customers: int,
+    *,
+    seed: int = 0,
+    transactions_per_account: int = 200,
+    days: int = 730,
+    end_date: date = DEFAULT_END_DATE,
+    include_demo: bool = True,
+) -> Iterator[list[Any]]:
+    """
+    Yield dataset records (customers, then each one's accounts and history).
+
+    Generation is streaming, so arbitrarily large datasets use constant
+    memory. ``transactions_per_account`` is the mean for current accounts;
+    credit cards get about half and savings a tenth of that. With
+    ``include_demo`` the mock data customer and accounts come first, so the
+    agent's demo flows keep working against the generated dataset; they
+    are re-dated to end at ``end_date`` like the rest.
+    """
+    end = end_date
+    if include_demo:
+        yield from _demo_records(end)
+
+    for index in range(customers):
+        rng = _customer_rng(seed, index)
+        customer_id = f"cust_gen_{index:08d}"
+        yield ["c", customer_id, f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"]
+        kinds = ["current"]
+        kinds += ["savings"] if rng.random() < 0.6 else []
+        kinds += ["credit"] if rng.random() < 0.45 else []
+        kinds += ["mortgage"] if rng.random() < 0.15 else []
+        for kind in kinds:
+            account = _account(rng, customer_id, f"acc_{kind}_{index:08d}", kind, end)
+            mean = {"current": 1.0, "credit": 0.5, "savings": 0.1}.get(kind, 0.0) * transactions_per_account
+            count = max(0, int(rng.gauss(mean, mean / 4))) if mean else 0
+            # History is generated before the account record so the account
+            # can carry the balance its history ends at.
+            history = list(_transactions(rng, account, count, end, days))
+            yield ["a", account]
+            yield from history
+
+
+def write_dataset(path: str | Path, records: Iterator[list[Any]], **header: Any) -> dict[str, int]:
+    """Write records to ``path`` (gzip JSON Lines); returns record counts."""
+    counts = {"customers": 0, "accounts": 0, "transactions": 0}
+    kinds = {"c": "customers", "a": "accounts", "t": "transactions"}
+    encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    # No name or mtime in the gzip header keeps the file reproducible. Writes
+    # are buffered so zlib compresses large blocks instead of single lines.
+    with open(path, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", compresslevel=6, mtime=0) as gz, \
+            io.BufferedWriter(gz, buffer_size=1 << 20) as out:
+        out.write(encode({"format": FORMAT, "version": VERSION, **header}).encode() + b"\n")
+        for record in records:
+            counts[kinds[record[0]]] += 1
+            out.write((encode(record) + "\n").encode())
+    return counts
+
+
+def load_dataset(path: str | Path, layout: str = "dicts") -> BankStore:
+    """
+    Build a BankStore from a file written by ``write_dataset``.
+
+    Records are streamed straight into the store, so loading needs little
+    more memory than the resulting store (see ``BankStore`` layouts).
+    """
+    store = BankStore(customers=[], accounts=[], transactions={}, layout=layout)
+    # Consecutive transactions of one account are loaded in bulk.
+    batch_account: str | None = None
+    batch: list[dict[str, Any]] = []
+
+    def flush() -> None:
+        if batch:
+            store.load_transactions(batch_account, batch)  # type: ignore[arg-type]
+            batch.clear()
+
+    with gzip.open(path, "rt", encoding="utf-8") as lines:
+        header = json.loads(next(lines, "null"))
+        if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"{path} is not an {FORMAT} v{VERSION} file")
+        for line in lines:
+            record = json.loads(line)
+            kind = record[0]
+            if kind == "t":
+                _, account_id, tx_id, tx_date, description, amount, tx_type, running = record
+                if account_id != batch_account:
+                    flush()
+                    batch_account = account_id
+                batch.append({
+                    "id": tx_id,
+                    "date": tx_date,
+                    "description": description,
+                    "amount": amount,
+                    "currency": "GBP",
+                    "type": tx_type,
+                    "runningBalance": running,
+                })
+                continue
+            flush()
+            if kind == "a":
+                store.add_account(record[1])
+            elif kind == "c":
+                store.add_customer({"id": record[1], "name": record[2]})
+    flush()
+    return store
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic AIBank dataset for load testing.")
+    parser.add_argument("--customers", type=int, default=10000, help="number of generated customers")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed; same arguments give the same file")
+    parser.add_argument("--transactions-per-account", type=int, default=200,
+                        help="mean transactions per current account")
+    parser.add_argument("--days", type=int, default=730, help="days of history to spread transactions over")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=DEFAULT_END_DATE,
+                        help=f"date of the newest transactions (YYYY-MM-DD, default {DEFAULT_END_DATE})")
+    parser.add_argument("--no-demo", action="store_true", help="omit the mock demo customer and accounts")
+    parser.add_argument("--output", required=True, help="output file (.jsonl.gz)")
+    args = parser.parse_args(argv)
+
+    end = args.end_date
+    started = time.perf_counter()
+    records = generate(
+        args.customers,
+        seed=args.seed,
+        transactions_per_account=args.transactions_per_account,
+        days=args.days,
+        end_date=end,
+        include_demo=not args.no_demo,
+    )
+    counts = write_dataset(args.output, records, seed=args.seed, endDate=end.isoformat())
+    elapsed = time.perf_counter() - started
+    size = Path(args.output).stat().st_size
+    print(
+        f"wrote {counts['customers']} customers, {counts['accounts']} accounts, "
+        f"{counts['transactions']} transactions to {args.output} ({size / 1e6:.1f} MB) in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
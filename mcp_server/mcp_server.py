@@ -1,6 +1,10 @@
 """MCP Server implementation for banking tools - Task 2.7"""
 from __future__ import annotations
 
+import json
+import os
+from typing import Any, Callable
+
 import anyio
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -10,8 +14,11 @@ from .server import (
     get_accounts,
     get_account_detail,
     get_transactions,
+    get_transactions_page,
+    find_merchant_transaction,
     get_mortgage_summary,
     get_credit_card_statement,
+    call_tools,
     ToolError,
 )
 
@@ -19,6 +26,80 @@ from .server import (
 # Create MCP server instance
 app = Server("aibank-mcp-server")
 
+OUTPUT_FORMATS = ("compact", "pretty", "orjson")
+
+
+def _json_encoder(output_format: str) -> Callable[[Any], str]:
+    if output_format == "compact":
+        return lambda result: json.dumps(result, separators=(",", ":"))
+    if output_format == "pretty":
+        return lambda result: json.dumps(result, indent=2)
+    if output_format == "orjson":
+        # Optional dependency, only needed when selected.
+        import orjson
+
+        return lambda result: orjson.dumps(result).decode()
+    raise ValueError(f"Unknown MCP output format: {output_format!r} (expected one of {OUTPUT_FORMATS})")
+
+
+_encode: Callable[[Any], str] = _json_encoder("compact")
+_structured = False
+
+
+def configure_output(output_format: str | None = None, structured: bool | None = None) -> None:
+    """
+    Set how tool results are encoded.
+
+    Environment variables (read at startup, overridden by arguments):
+    - MCP_OUTPUT_FORMAT: ``compact`` (default) JSON without whitespace,
+      ``pretty`` indented JSON, or ``orjson`` (compact, needs ``orjson``)
+    - MCP_STRUCTURED_OUTPUT: ``true`` to also return results as MCP
+      ``structuredContent`` (lists are wrapped as ``{"result": [...]}``)
+    """
+    global _encode, _structured
+    if output_format is None:
+        output_format = os.getenv("MCP_OUTPUT_FORMAT", "compact").lower()
+    if structured is None:
+        structured = os.getenv("MCP_STRUCTURED_OUTPUT", "").lower() in ("1", "true", "yes")
+    _encode = _json_encoder(output_format)
+    _structured = structured
+
+
+configure_output()
+
+
+# Input properties shared by get_transactions and get_transactions_page.
+_TRANSACTION_PROPERTIES: dict[str, Any] = {
+    "account_id": {
+        "type": "string",
+        "description": "The unique identifier of the account",
+    },
+    "limit": {
+        "type": "integer",
+        "description": "Maximum number of transactions to return (default: 20)",
+        "default": 20,
+    },
+    "from_date": {
+        "type": "string",
+        "format": "date",
+        "description": "Earliest transaction date to include (YYYY-MM-DD)",
+    },
+    "to_date": {
+        "type": "string",
+        "format": "date",
+        "description": "Latest transaction date to include (YYYY-MM-DD)",
+    },
+    "merchant": {
+        "type": "string",
+        "description": "Only transactions whose description contains this text (case-insensitive)",
+    },
+    "type": {
+        "type": "string",
+        "enum": ["debit", "credit"],
+        "description": "Only debits or only credits",
+    },
+}
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -29,7 +110,12 @@ async def list_tools() -> list[Tool]:
             description="Get a list of all customer accounts",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Only return accounts owned by this customer",
+                    }
+                },
                 "required": [],
             },
         ),
@@ -49,7 +135,31 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="get_transactions",
-            description="Get transaction history for an account",
+            description="Get transaction history for an account (use get_transactions_page to page through it)",
+            inputSchema={
+                "type": "object",
+                "properties": _TRANSACTION_PROPERTIES,
+                "required": ["account_id"],
+            },
+        ),
+        Tool(
+            name="get_transactions_page",
+            description="Get one page of transaction history with a cursor for the next page",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **_TRANSACTION_PROPERTIES,
+                    "cursor": {
+                        "type": "string",
+                        "description": "nextCursor from the previous page; repeat the other filters with it",
+                    },
+                },
+                "required": ["account_id"],
+            },
+        ),
+        Tool(
+            name="find_merchant_transaction",
+            description="Find the most recent transaction at a merchant named in a question",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -57,13 +167,12 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "The unique identifier of the account",
                     },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Maximum number of transactions to return (default: 20)",
-                        "default": 20,
+                    "query": {
+                        "type": "string",
+                        "description": "Text naming the merchant, e.g. 'where did I shop at Tesco?'",
                     },
                 },
-                "required": ["account_id"],
+                "required": ["account_id", "query"],
             },
         ),
         Tool(
@@ -94,30 +203,72 @@ async def list_tools() -> list[Tool]:
                 "required": ["account_id"],
             },
         ),
+        Tool(
+            name="batch",
+            description=(
+                "Run several of the other tools in one call; results are returned in order, "
+                "each as {ok, result} or {ok, error}"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "calls": {
+                        "type": "array",
+                        "description": "Tool calls to run, in order",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "tool": {"type": "string", "description": "Name of the tool to call"},
+                                "args": {"type": "object", "description": "Arguments for the tool"},
+                            },
+                            "required": ["tool"],
+                        },
+                    }
+                },
+                "required": ["calls"],
+            },
+        ),
     ]
 
 
+_TRANSACTION_FILTERS = ("cursor", "from_date", "to_date", "merchant", "type")
+
+
+def _transaction_arguments(arguments: dict) -> dict:
+    return {
+        "account_id": arguments["account_id"],
+        "limit": arguments.get("limit", 20),
+        **{key: arguments[key] for key in _TRANSACTION_FILTERS if arguments.get(key) is not None},
+    }
+
+
 @app.call_tool()
-async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+async def call_tool(name: str, arguments: dict) -> list[TextContent] | tuple[list[TextContent], dict[str, Any]]:
     """Handle tool calls"""
     try:
         if name == "get_accounts":
-            result = get_accounts()
+            result = get_accounts(arguments.get("customer_id"))
         elif name == "get_account_detail":
             result = get_account_detail(arguments["account_id"])
         elif name == "get_transactions":
-            result = get_transactions(
-                arguments["account_id"], arguments.get("limit", 20)
-            )
+            result = get_transactions(**_transaction_arguments(arguments))
+        elif name == "get_transactions_page":
+            result = get_transactions_page(**_transaction_arguments(arguments))
+        elif name == "find_merchant_transaction":
+            result = find_merchant_transaction(arguments["account_id"], arguments["query"])
         elif name == "get_mortgage_summary":
             result = get_mortgage_summary(arguments["account_id"])
         elif name == "get_credit_card_statement":
             result = get_credit_card_statement(arguments["account_id"])
+        elif name == "batch":
+            result = call_tools(arguments["calls"])
         else:
             raise ToolError(f"Unknown tool: {name}")
 
-        import json
-        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        content = [TextContent(type="text", text=_encode(result))]
+        if _structured:
+            return content, result if isinstance(result, dict) else {"result": result}
+        return content
     except ToolError as e:
         return [TextContent(type="text", text=f"Error: {str(e)}")]
     except Exception as e:
@@ -130,5 +281,45 @@ async def main():
         await app.run(read_stream, write_stream, app.create_initialization_options())
 
 
+def http_app():
+    """
+    ASGI app serving the tools over stateless streamable HTTP at ``/mcp``.
+
+    Stateless means no session handshake: every POST is a self-contained
+    JSON-RPC call answered with a plain JSON body, so any replica behind a
+    load balancer can serve it.
+    """
+    import contextlib
+
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    manager = StreamableHTTPSessionManager(app=app, json_response=True, stateless=True)
+
+    class _Endpoint:
+        async def __call__(self, scope, receive, send):
+            await manager.handle_request(scope, receive, send)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with manager.run():
+            yield
+
+    return Starlette(routes=[Route("/mcp", endpoint=_Endpoint(), methods=["GET", "POST", "DELETE"])], lifespan=lifespan)
+
+
 if __name__ == "__main__":
-    anyio.run(main)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the AIBank MCP server.")
+    parser.add_argument("--http", action="store_true", help="serve streamable HTTP instead of stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3002)
+    args = parser.parse_args()
+    if args.http:
+        import uvicorn
+
+        uvicorn.run(http_app(), host=args.host, port=args.port)
+    else:
+        anyio.run(main)
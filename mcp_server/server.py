@@ -1,22 +1,45 @@
 from __future__ import annotations
 
-from typing import Any
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Callable, Iterable, TextIO
 
-from .mock_data import ACCOUNTS, CUSTOMER, TRANSACTIONS
+from .store import get_store
 
 
 class ToolError(ValueError):
     pass
 
 
+# Lookups made during call_tools, keyed by (kind, account id), so a batch
+# resolves each account (and its customer) once however many calls name it.
+_BATCH_LOOKUPS: ContextVar[dict[tuple[str, str], Any] | None] = ContextVar("_BATCH_LOOKUPS", default=None)
+
+
+def _lookup(kind: str, account_id: str, load: Callable[[str], Any]) -> Any:
+    cache = _BATCH_LOOKUPS.get()
+    if cache is None:
+        return load(account_id)
+    key = (kind, account_id)
+    if key not in cache:
+        cache[key] = load(account_id)
+    return cache[key]
+
+
 def _find_account(account_id: str) -> dict[str, Any]:
-    for account in ACCOUNTS:
-        if account["id"] == account_id:
-            return account
-    raise ToolError("Account not found")
+    account = _lookup("account", account_id, get_store().account)
+    if account is None:
+        raise ToolError("Account not found")
+    return account
 
 
-def get_accounts() -> list[dict[str, Any]]:
+def get_accounts(customer_id: str | None = None) -> list[dict[str, Any]]:
+    store = get_store()
+    # Without a customer the signed-in (first) customer's accounts are listed.
     return [
         {
             "id": a["id"],
@@ -25,20 +48,95 @@ def get_accounts() -> list[dict[str, Any]]:
             "balance": a["balance"],
             "currency": a["currency"],
         }
-        for a in ACCOUNTS
+        for a in store.accounts(customer_id or store.default_customer_id)
     ]
 
 
 def get_account_detail(account_id: str) -> dict[str, Any]:
     account = _find_account(account_id)
-    return {"customer": CUSTOMER, **account}
+    return {"customer": _lookup("customer", account_id, get_store().customer_of), **account}
+
+
+def _encode_cursor(key: tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        tx_date, tx_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ToolError("Invalid cursor") from None
+    if not isinstance(tx_date, str) or not isinstance(tx_id, str):
+        raise ToolError("Invalid cursor")
+    return tx_date, tx_id
+
+
+def _check_date(value: str | None, name: str) -> str | None:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ToolError(f"Invalid {name}: expected YYYY-MM-DD") from None
+
+
+def get_transactions_page(
+    account_id: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    from_date: str | None = None,
+    to_date: str | None = None,
+    merchant: str | None = None,
+    type: str | None = None,
+) -> dict[str, Any]:
+    """
+    One page of transaction history, newest first.
+
+    ``nextCursor`` is an opaque token for the following page (None on the
+    last page); the other filters must be repeated with it.
+    """
+    _find_account(account_id)
+    if type is not None and type not in {"debit", "credit"}:
+        raise ToolError("Invalid type: expected 'debit' or 'credit'")
+    transactions, next_key = get_store().transactions_page(
+        account_id,
+        int(limit),
+        before=_decode_cursor(cursor) if cursor else None,
+        from_date=_check_date(from_date, "from_date"),
+        to_date=_check_date(to_date, "to_date"),
+        merchant=merchant or None,
+        type=type,
+    )
+    return {
+        "transactions": transactions,
+        "nextCursor": _encode_cursor(next_key) if next_key is not None else None,
+    }
+
+
+def get_transactions(
+    account_id: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    from_date: str | None = None,
+    to_date: str | None = None,
+    merchant: str | None = None,
+    type: str | None = None,
+) -> list[dict[str, Any]]:
+    if cursor is None and from_date is None and to_date is None and not merchant and type is None:
+        _find_account(account_id)
+        return get_store().transactions(account_id, int(limit))
+    return get_transactions_page(account_id, limit, cursor, from_date, to_date, merchant, type)["transactions"]
 
 
-def get_transactions(account_id: str, limit: int = 20) -> list[dict[str, Any]]:
+def find_merchant_transaction(account_id: str, query: str) -> dict[str, Any] | None:
+    """
+    The most recent transaction whose description shares a word (of four or
+    more letters, any case) with ``query``, searched over the whole history;
+    None when no merchant matches.
+    """
     _find_account(account_id)
-    transactions = TRANSACTIONS.get(account_id, [])
-    transactions = sorted(transactions, key=lambda tx: tx["date"], reverse=True)
-    return transactions[: max(0, int(limit))]
+    return get_store().latest_by_merchant(account_id, str(query))
 
 
 def get_mortgage_summary(account_id: str) -> dict[str, Any]:
@@ -78,6 +176,8 @@ TOOLS = {
     "get_accounts": get_accounts,
     "get_account_detail": get_account_detail,
     "get_transactions": get_transactions,
+    "get_transactions_page": get_transactions_page,
+    "find_merchant_transaction": find_merchant_transaction,
     "get_mortgage_summary": get_mortgage_summary,
     "get_credit_card_statement": get_credit_card_statement,
 }
@@ -89,19 +189,84 @@ def call_tool(name: str, **kwargs: Any) -> Any:
     return TOOLS[name](**kwargs)
 
 
+def call_tools(calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Run several tool calls in one round trip.
+
+    Each call is ``{"tool": name, "args": {...}}``; results come back in the
+    same order as ``{"ok": True, "result": ...}`` or ``{"ok": False, "error":
+    message}``, so one failing call does not fail the batch. Account and
+    customer lookups are shared across the batch.
+    """
+    token = _BATCH_LOOKUPS.set({})
+    try:
+        results: list[dict[str, Any]] = []
+        for call in calls:
+            try:
+                if not isinstance(call, dict) or not isinstance(call.get("tool"), str):
+                    raise ToolError("Batch entries need a 'tool' name")
+                args = call.get("args") or {}
+                if not isinstance(args, dict):
+                    raise ToolError("Batch entry 'args' must be an object")
+                results.append({"ok": True, "result": call_tool(call["tool"], **args)})
+            except Exception as exc:
+                results.append({"ok": False, "error": str(exc)})
+        return results
+    finally:
+        _BATCH_LOOKUPS.reset(token)
+
+
+def _reply(payload: Any) -> Any:
+    if isinstance(payload, list):
+        return call_tools(payload)
+    reply = {"id": payload["id"]} if "id" in payload else {}
+    try:
+        reply.update(ok=True, result=call_tool(payload["tool"], **payload.get("args", {})))
+    except Exception as exc:
+        reply.update(ok=False, error=str(exc))
+    return reply
+
+
+def serve_lines(lines: Iterable[str], out: TextIO, max_workers: int = 8) -> None:
+    """
+    Answer newline-delimited JSON tool calls from ``lines`` on ``out``.
+
+    Input lines are ``{"tool": "get_accounts", "args": {...}}``, or a JSON
+    array of such calls answered with one array of results (see
+    ``call_tools``). A call carrying an ``"id"`` runs on a thread pool and its
+    reply echoes the id, so callers can pipeline many calls over one pipe and
+    match replies as they complete, in any order. Calls without an id are
+    answered in turn, as before.
+    """
+    write_lock = threading.Lock()
+
+    def write(reply: Any) -> None:
+        text = json.dumps(reply)
+        with write_lock:
+            out.write(text + "\n")
+            out.flush()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bank-tool") as pool:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+                if not isinstance(payload, (dict, list)):
+                    raise ToolError("Expected a JSON object or array")
+            except ValueError as exc:
+                write({"ok": False, "error": str(exc)})
+                continue
+            if isinstance(payload, dict) and "id" in payload:
+                pool.submit(lambda payload=payload: write(_reply(payload)))
+            else:
+                write(_reply(payload))
+
+
 if __name__ == "__main__":
-    import json
+    import os
     import sys
 
     # Minimal stdio loop compatible with simple local agent integration.
-    # Input lines: {"tool": "get_accounts", "args": {...}}
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            payload = json.loads(line)
-            result = call_tool(payload["tool"], **payload.get("args", {}))
-            print(json.dumps({"ok": True, "result": result}), flush=True)
-        except Exception as exc:
-            print(json.dumps({"ok": False, "error": str(exc)}), flush=True)
+    serve_lines(sys.stdin, sys.stdout, max_workers=int(os.getenv("BANK_STDIO_WORKERS", "8")))
@@ -0,0 +1,345 @@
+"""
+Memory-mapped, read-only snapshot of the bank dataset.
+
+A snapshot is a single file that ``SnapshotStore`` ``mmap``s and queries in
+place. Nothing is parsed up front beyond a small header and the merchant
+string table, so cold start does not grow with the dataset, and every worker
+process mapping the same file shares one copy in the OS page cache.
+
+Layout::
+
+    b"AIBSNAP\\0"                 magic
+    u32 version, u32 n            little-endian
+    n bytes of JSON header        counts, default customer, section table
+    sections, each 8-byte aligned
+
+Every section is a flat array (``array`` typecode in the section table):
+
+- string tables as ``*_offsets`` (u64, n+1 entries) + ``*_data`` (UTF-8):
+  ``values`` (merchants and currencies), ``prefixes`` (transaction id
+  prefixes) and ``blobs`` (ids and JSON of customers and accounts);
+- customers and accounts as fixed-width columns sorted by id, so lookups
+  are binary searches over the mapped ids;
+- transactions in the ``columnar.COLUMNS`` format, each account's rows
+  contiguous and ordered by (date, id), queried through
+  ``ColumnarTransactionLog`` views.
+
+Usage (from the repository root)::
+
+    python -m mcp_server.snapshot --output bank.snap                       # mock data
+    python -m mcp_server.snapshot --dataset bank.jsonl.gz --output bank.snap
+    BANK_SNAPSHOT_PATH=bank.snap python -m mcp_server.mcp_server
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import mmap
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+from .columnar import COLUMNS, ColumnarTransactionLog, StringTable
+from .store import BankStore, MerchantIndex, index_merchant, latest_indexed
+
+MAGIC = b"AIBSNAP\0"
+VERSION = 2
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+class MappedStrings:
+    """Read-only string table over mapped offset/data sections."""
+
+    def __init__(self, offsets: memoryview, data: memoryview) -> None:
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+
+class _Column:
+    """Sequence view mapping row numbers to strings, for bisecting on ids."""
+
+    def __init__(self, strings: MappedStrings, rows: memoryview) -> None:
+        self._strings = strings
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index: int) -> str:
+        return self._strings[self._rows[index]]
+
+
+def _string_sections(name: str, strings: Iterable[str]) -> dict[str, array]:
+    offsets = array("Q", [0])
+    data = bytearray()
+    for value in strings:
+        data += value.encode("utf-8")
+        offsets.append(len(data))
+    return {f"{name}_offsets": offsets, f"{name}_data": array("B", data)}
+
+
+def _layout(header_size: int, sections: dict[str, array]) -> dict[str, list[Any]]:
+    position = _PREFIX.size + header_size
+    table: dict[str, list[Any]] = {}
+    for name, values in sections.items():
+        position += -position % _ALIGN
+        size = len(values) * values.itemsize
+        table[name] = [position, size, values.typecode]
+        position += size
+    return table
+
+
+def _write_sections(out: BinaryIO, header: dict[str, Any], sections: dict[str, array]) -> None:
+    # Section offsets depend on the header's size, which depends on the
+    # offsets; re-layout until the two agree (a couple of rounds at most).
+    table: dict[str, list[Any]] = {}
+    while True:
+        blob = json.dumps({**header, "sections": table}, separators=(",", ":")).encode()
+        laid_out = _layout(len(blob), sections)
+        if laid_out == table:
+            break
+        table = laid_out
+    out.write(_PREFIX.pack(MAGIC, VERSION, len(blob)))
+    out.write(blob)
+    position = _PREFIX.size + len(blob)
+    for name, values in sections.items():
+        offset, size, _ = table[name]
+        out.write(b"\0" * (offset - position))
+        values.tofile(out)
+        position = offset + size
+
+
+def write_snapshot(store: BankStore, path: str | Path) -> dict[str, int]:
+    """Write ``store`` as a snapshot file; returns record counts."""
+    if sys.byteorder != "little":
+        raise RuntimeError("Snapshots are little-endian")
+    customers = store.customers()
+    customers_sorted = sorted(range(len(customers)), key=lambda i: customers[i]["id"])
+    customer_row = {customers[i]["id"]: row for row, i in enumerate(customers_sorted)}
+
+    accounts = store.accounts()
+    accounts_sorted = sorted(range(len(accounts)), key=lambda i: accounts[i]["id"])
+    account_row = {accounts[i]["id"]: row for row, i in enumerate(accounts_sorted)}
+
+    blobs: list[str] = []
+    values, prefixes = StringTable(), StringTable()
+    columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+    customer_id, customer_json = array("I"), array("I")
+    customer_accounts_start, customer_accounts_count = array("I"), array("I")
+    customer_account_rows = array("I")
+    for i in customers_sorted:
+        customer = customers[i]
+        customer_id.append(len(blobs))
+        blobs.append(customer["id"])
+        customer_json.append(len(blobs))
+        blobs.append(json.dumps(customer, separators=(",", ":")))
+        owned = store.accounts(customer["id"])
+        customer_accounts_start.append(len(customer_account_rows))
+        customer_accounts_count.append(len(owned))
+        customer_account_rows.extend(account_row[a["id"]] for a in owned)
+
+    account_id, account_json, account_customer = array("I"), array("I"), array("I")
+    account_tx_start, account_tx_count = array("Q"), array("Q")
+    for i in accounts_sorted:
+        account = accounts[i]
+        account_id.append(len(blobs))
+        blobs.append(account["id"])
+        account_json.append(len(blobs))
+        blobs.append(json.dumps(account, separators=(",", ":")))
+        account_customer.append(customer_row[store.customer_of(account["id"])["id"]])
+        history = store.transactions(account["id"], sys.maxsize)
+        history.reverse()
+        log = ColumnarTransactionLog(history, strings=values, prefixes=prefixes)
+        account_tx_start.append(len(columns["day"]))
+        account_tx_count.append(len(log))
+        for name, column in log.columns().items():
+            columns[name].extend(column)
+
+    sections: dict[str, array] = {
+        **_string_sections("values", (values[i] for i in range(len(values)))),
+        **_string_sections("prefixes", (prefixes[i] for i in range(len(prefixes)))),
+        **_string_sections("blobs", blobs),
+        "customer_id": customer_id,
+        "customer_json": customer_json,
+        "customer_accounts_start": customer_accounts_start,
+        "customer_accounts_count": customer_accounts_count,
+        "customer_account_rows": customer_account_rows,
+        "account_id": account_id,
+        "account_json": account_json,
+        "account_customer": account_customer,
+        "account_tx_start": account_tx_start,
+        "account_tx_count": account_tx_count,
+        "account_order": array("I", (account_row[a["id"]] for a in accounts)),
+        **{f"tx_{name}": column for name, column in columns.items()},
+    }
+    counts = {"customers": len(customers), "accounts": len(accounts), "transactions": len(columns["day"])}
+    header = {"defaultCustomer": store.default_customer_id, "counts": counts}
+    with open(path, "wb") as out:
+        _write_sections(out, header, sections)
+    return counts
+
+
+class SnapshotStore:
+    """
+    Read-only store over a mapped snapshot file.
+
+    Offers the query methods of ``BankStore``; account and customer records
+    are decoded from the mapping on each lookup and transactions through
+    zero-copy ``ColumnarTransactionLog`` views. Merchant indexes are not
+    stored in the file; each is built on an account's first merchant lookup
+    and the most recently used ones are kept.
+    """
+
+    layout = "snapshot"
+    max_merchant_indexes = 1024
+
+    def __init__(self, buffer: Any) -> None:
+        view = memoryview(buffer)
+        magic, version, header_size = _PREFIX.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an AIBank snapshot (v{VERSION})")
+        header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_size]))
+        self._buffer = buffer
+        self._sections = {
+            name: view[offset:offset + size].cast(typecode)
+            for name, (offset, size, typecode) in header["sections"].items()
+        }
+        self.counts: dict[str, int] = header["counts"]
+        self.default_customer_id: str | None = header["defaultCustomer"]
+        # The merchant/currency table is small and needed for filtering by id;
+        # prefixes and blobs stay mapped.
+        values = self._strings("values")
+        self._values = StringTable()
+        for i in range(len(values)):
+            self._values.intern(values[i])
+        self._prefixes = self._strings("prefixes")
+        self._blobs = self._strings("blobs")
+        self._customer_ids = _Column(self._blobs, self._sections["customer_id"])
+        self._account_ids = _Column(self._blobs, self._sections["account_id"])
+        self._lock = threading.Lock()
+        self._merchants: OrderedDict[str, MerchantIndex] = OrderedDict()
+
+    @classmethod
+    def open(cls, path: str | Path) -> "SnapshotStore":
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file object is closed.
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _strings(self, name: str) -> MappedStrings:
+        return MappedStrings(self._sections[f"{name}_offsets"], self._sections[f"{name}_data"])
+
+    def _find(self, ids: _Column, key: str) -> int | None:
+        row = bisect.bisect_left(ids, key)
+        return row if row < len(ids) and ids[row] == key else None
+
+    def _account_at(self, row: int) -> dict[str, Any]:
+        return json.loads(self._blobs[self._sections["account_json"][row]])
+
+    def _customer_at(self, row: int) -> dict[str, Any]:
+        return json.loads(self._blobs[self._sections["customer_json"][row]])
+
+    def customers(self) -> list[dict[str, Any]]:
+        return [self._customer_at(row) for row in range(len(self._customer_ids))]
+
+    def account(self, account_id: str) -> dict[str, Any] | None:
+        row = self._find(self._account_ids, account_id)
+        return self._account_at(row) if row is not None else None
+
+    def customer_of(self, account_id: str) -> dict[str, Any] | None:
+        row = self._find(self._account_ids, account_id)
+        return self._customer_at(self._sections["account_customer"][row]) if row is not None else None
+
+    def accounts(self, customer_id: str | None = None) -> list[dict[str, Any]]:
+        """All accounts, or one customer's accounts, in their original order."""
+        if customer_id is None:
+            return [self._account_at(row) for row in self._sections["account_order"]]
+        row = self._find(self._customer_ids, customer_id)
+        if row is None:
+            return []
+        start = self._sections["customer_accounts_start"][row]
+        count = self._sections["customer_accounts_count"][row]
+        rows = self._sections["customer_account_rows"][start:start + count]
+        return [self._account_at(account_row) for account_row in rows]
+
+    def _log(self, account_id: str) -> ColumnarTransactionLog | None:
+        row = self._find(self._account_ids, account_id)
+        if row is None:
+            return None
+        start = self._sections["account_tx_start"][row]
+        stop = start + self._sections["account_tx_count"][row]
+        return ColumnarTransactionLog.from_columns(
+            strings=self._values,
+            prefixes=self._prefixes,
+            **{name: self._sections[f"tx_{name}"][start:stop] for name in COLUMNS},
+        )
+
+    def transactions(self, account_id: str, limit: int) -> list[dict[str, Any]]:
+        log = self._log(account_id)
+        return log.newest(limit) if log is not None else []
+
+    def transactions_page(
+        self, account_id: str, limit: int, **filters: Any
+    ) -> tuple[list[dict[str, Any]], tuple[str, str] | None]:
+        log = self._log(account_id)
+        return log.page(limit, **filters) if log is not None else ([], None)
+
+    def latest_by_merchant(self, account_id: str, query: str) -> dict[str, Any] | None:
+        log = self._log(account_id)
+        if log is None:
+            return None
+        with self._lock:
+            index = self._merchants.get(account_id)
+            if index is not None:
+                self._merchants.move_to_end(account_id)
+        if index is None:
+            index = {}
+            for description, key in log.descriptions():
+                index_merchant(index, description, key)
+            with self._lock:
+                self._merchants[account_id] = index
+                while len(self._merchants) > self.max_merchant_indexes:
+                    self._merchants.popitem(last=False)
+        key = latest_indexed(index, query)
+        return log.get(key) if key is not None else None
+
+    def append_transaction(self, account_id: str, transaction: dict[str, Any]) -> None:
+        raise TypeError("Snapshot stores are read-only")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a memory-mappable AIBank snapshot.")
+    parser.add_argument("--dataset", help="dataset from mcp_server.datagen (default: the mock data)")
+    parser.add_argument("--output", required=True, help="snapshot file to write")
+    args = parser.parse_args(argv)
+
+    if args.dataset:
+        from .datagen import load_dataset
+
+        store = load_dataset(args.dataset, layout="columnar")
+    else:
+        store = BankStore.from_mock_data()
+    counts = write_snapshot(store, args.output)
+    size = Path(args.output).stat().st_size
+    print(
+        f"wrote {counts['customers']} customers, {counts['accounts']} accounts, "
+        f"{counts['transactions']} transactions to {args.output} ({size / 1e6:.1f} MB)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,370 @@
+"""
+Indexed in-memory bank data store.
+
+The tool functions in ``server.py`` read through this layer instead of
+scanning the mock data lists:
+
+- accounts are indexed by id and by owning customer (dict lookups);
+- each account's transactions are kept in date order as they are added, so
+  the newest ``k`` are an O(k) slice rather than a sort per call, and
+  cursor/date-range pages are binary searches into that order;
+- new transactions are inserted in place (``append_transaction``), keeping
+  the order without re-sorting;
+- each account has an inverted index from merchant tokens (description
+  words, see ``merchant_tokens``) to its most recent transaction with that
+  token, updated as transactions are added, so finding the last purchase at
+  a merchant is a few dict lookups however long the history
+  (``latest_by_merchant``).
+
+Transactions are handed out as shallow copies so callers cannot corrupt the
+store by decorating them for display. For large datasets the logs can be
+column-wise instead (``layout="columnar"``, see ``columnar.py``).
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import re
+import threading
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Union
+
+from .columnar import ColumnarTransactionLog, StringTable
+
+if TYPE_CHECKING:
+    from .snapshot import SnapshotStore
+
+LAYOUTS = ("dicts", "columnar")
+
+ChangeListener = Callable[[str | None, str | None], None]
+_LISTENERS: list[ChangeListener] = []
+_LISTENERS_LOCK = threading.Lock()
+
+
+def on_change(listener: ChangeListener) -> Callable[[], None]:
+    """
+    Call ``listener(customer_id, account_id)`` after bank data changes.
+
+    ``(None, None)`` means anything may have changed (the store was
+    replaced). Returns a function that unregisters the listener.
+    """
+    with _LISTENERS_LOCK:
+        _LISTENERS.append(listener)
+
+    def remove() -> None:
+        with _LISTENERS_LOCK:
+            if listener in _LISTENERS:
+                _LISTENERS.remove(listener)
+
+    return remove
+
+
+def _notify(customer_id: str | None, account_id: str | None) -> None:
+    with _LISTENERS_LOCK:
+        listeners = list(_LISTENERS)
+    for listener in listeners:
+        listener(customer_id, account_id)
+
+
+TransactionKey = tuple[str, str]
+
+
+def _key(transaction: dict[str, Any]) -> TransactionKey:
+    return transaction["date"], transaction["id"]
+
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def merchant_tokens(text: str) -> frozenset[str]:
+    """Normalized words of a description or query that can name a merchant."""
+    # Short words ("the", "at", "uk") would match nearly everything.
+    return frozenset(word for word in _WORD.findall(text.casefold()) if len(word) > 3)
+
+
+MerchantIndex = dict[str, TransactionKey]
+
+
+def index_merchant(index: MerchantIndex, description: str, key: TransactionKey) -> None:
+    """Record a transaction in an account's merchant index if it is the newest for its tokens."""
+    for token in merchant_tokens(description):
+        if index.get(token, key) <= key:
+            index[token] = key
+
+
+def latest_indexed(index: MerchantIndex, query: str) -> TransactionKey | None:
+    """Key of the newest indexed transaction sharing a merchant token with ``query``."""
+    keys = [index[token] for token in merchant_tokens(query) if token in index]
+    return max(keys) if keys else None
+
+
+class TransactionLog:
+    """
+    One account's transactions, ordered oldest to newest by (date, id).
+
+    The (date, id) pair is unique and totally ordered, which makes it usable
+    as a keyset pagination cursor.
+    """
+
+    def __init__(self, transactions: Iterable[dict[str, Any]] = ()) -> None:
+        self._transactions = sorted(transactions, key=_key)
+        self._keys = [_key(tx) for tx in self._transactions]
+        self._dates = [key[0] for key in self._keys]
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def append(self, transaction: dict[str, Any]) -> None:
+        """Insert a transaction at its position (O(1) when it is the newest)."""
+        key = _key(transaction)
+        if not self._keys or key >= self._keys[-1]:
+            self._transactions.append(transaction)
+            self._keys.append(key)
+            self._dates.append(key[0])
+            return
+        index = bisect.bisect_right(self._keys, key)
+        self._transactions.insert(index, transaction)
+        self._keys.insert(index, key)
+        self._dates.insert(index, key[0])
+
+    def newest(self, limit: int) -> list[dict[str, Any]]:
+        """Return copies of the ``limit`` most recent transactions, newest first."""
+        return [dict(tx) for tx in islice(reversed(self._transactions), max(0, limit))]
+
+    def descriptions(self) -> Iterator[tuple[str, TransactionKey]]:
+        """``(description, (date, id))`` of every transaction, oldest first."""
+        for transaction, key in zip(self._transactions, self._keys):
+            yield transaction.get("description", ""), key
+
+    def get(self, key: TransactionKey) -> dict[str, Any] | None:
+        """Return a copy of the transaction with this (date, id) key."""
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return dict(self._transactions[index])
+        return None
+
+    def page(
+        self,
+        limit: int,
+        *,
+        before: TransactionKey | None = None,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        merchant: str | None = None,
+        type: str | None = None,
+    ) -> tuple[list[dict[str, Any]], TransactionKey | None]:
+        """
+        Return up to ``limit`` matching transactions, newest first.
+
+        ``before`` is the key of the last transaction of the previous page;
+        dates are inclusive ISO dates. The cursor and date bounds are binary
+        searches, so an unfiltered page costs O(log n + limit); the merchant
+        (case-insensitive substring) and type filters are applied while
+        scanning. The second value is the key to pass as ``before`` for the
+        next page, or None when there are no more matches.
+        """
+        hi = len(self._transactions)
+        if to_date is not None:
+            hi = bisect.bisect_right(self._dates, to_date)
+        if before is not None:
+            hi = min(hi, bisect.bisect_left(self._keys, before))
+        lo = bisect.bisect_left(self._dates, from_date) if from_date is not None else 0
+        needle = merchant.casefold() if merchant else None
+
+        limit = max(0, limit)
+        page: list[dict[str, Any]] = []
+        last: TransactionKey | None = None
+        for index in range(hi - 1, lo - 1, -1):
+            tx = self._transactions[index]
+            if type is not None and tx.get("type") != type:
+                continue
+            if needle is not None and needle not in str(tx.get("description", "")).casefold():
+                continue
+            if len(page) == limit:
+                # Another match exists, so the page is not the last one.
+                return page, last
+            page.append(dict(tx))
+            last = self._keys[index]
+        return page, None
+
+
+class BankStore:
+    """Accounts, customers and transactions with hash indexes."""
+
+    def __init__(
+        self,
+        *,
+        customers: Iterable[dict[str, Any]],
+        accounts: Iterable[dict[str, Any]],
+        transactions: dict[str, Iterable[dict[str, Any]]],
+        layout: str = "dicts",
+    ) -> None:
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown store layout: {layout!r}")
+        self.layout = layout
+        # Shared by all columnar logs, so each merchant name is stored once.
+        self._strings = StringTable()
+        self._prefixes = StringTable()
+        self._lock = threading.Lock()
+        self._customers: dict[str, dict[str, Any]] = {}
+        self._accounts: dict[str, dict[str, Any]] = {}
+        self._owner: dict[str, str] = {}
+        self._by_customer: dict[str, list[str]] = {}
+        self._transactions: dict[str, TransactionLog | ColumnarTransactionLog] = {}
+        self._merchants: dict[str, MerchantIndex] = {}
+        # The first customer is the signed-in one for single-customer callers.
+        self.default_customer_id: str | None = None
+        for customer in customers:
+            self.add_customer(customer)
+        for account in accounts:
+            self.add_account(account)
+        for account_id, txs in transactions.items():
+            log = self._transactions[account_id] = self._new_log(txs)
+            index = self._merchants[account_id] = {}
+            # Read straight from the log so columnar rows are never built as dicts.
+            for description, key in log.descriptions():
+                index_merchant(index, description, key)
+
+    @classmethod
+    def from_mock_data(cls, layout: str = "dicts") -> "BankStore":
+        # Imported here so snapshot-backed processes never build the mock data.
+        from .mock_data import ACCOUNTS, CUSTOMER, TRANSACTIONS
+
+        return cls(customers=[CUSTOMER], accounts=ACCOUNTS, transactions=TRANSACTIONS, layout=layout)
+
+    def _new_log(self, transactions: Iterable[dict[str, Any]] = ()) -> TransactionLog | ColumnarTransactionLog:
+        if self.layout == "columnar":
+            return ColumnarTransactionLog(transactions, strings=self._strings, prefixes=self._prefixes)
+        return TransactionLog(transactions)
+
+    def add_customer(self, customer: dict[str, Any]) -> None:
+        with self._lock:
+            self._customers[customer["id"]] = customer
+            self._by_customer.setdefault(customer["id"], [])
+            if self.default_customer_id is None:
+                self.default_customer_id = customer["id"]
+
+    def add_account(self, account: dict[str, Any]) -> None:
+        # Single-customer data sets (like the mock data) omit customerId.
+        customer_id = account.get("customerId", self.default_customer_id)
+        if customer_id not in self._customers:
+            raise KeyError(customer_id)
+        with self._lock:
+            self._accounts[account["id"]] = account
+            self._owner[account["id"]] = customer_id
+            self._by_customer[customer_id].append(account["id"])
+
+    def customers(self) -> list[dict[str, Any]]:
+        return list(self._customers.values())
+
+    def account(self, account_id: str) -> dict[str, Any] | None:
+        return self._accounts.get(account_id)
+
+    def customer_of(self, account_id: str) -> dict[str, Any] | None:
+        owner = self._owner.get(account_id)
+        return self._customers.get(owner) if owner is not None else None
+
+    def accounts(self, customer_id: str | None = None) -> list[dict[str, Any]]:
+        """All accounts, or one customer's accounts, in insertion order."""
+        if customer_id is None:
+            return list(self._accounts.values())
+        return [self._accounts[account_id] for account_id in self._by_customer.get(customer_id, [])]
+
+    def transactions(self, account_id: str, limit: int) -> list[dict[str, Any]]:
+        """The newest ``limit`` transactions of an account, newest first."""
+        log = self._transactions.get(account_id)
+        if log is None:
+            return []
+        with self._lock:
+            return log.newest(limit)
+
+    def transactions_page(
+        self, account_id: str, limit: int, **filters: Any
+    ) -> tuple[list[dict[str, Any]], TransactionKey | None]:
+        """One page of an account's transactions; see ``TransactionLog.page``."""
+        log = self._transactions.get(account_id)
+        if log is None:
+            return [], None
+        with self._lock:
+            return log.page(limit, **filters)
+
+    def latest_by_merchant(self, account_id: str, query: str) -> dict[str, Any] | None:
+        """
+        The account's most recent transaction whose description shares a
+        merchant token with ``query`` (e.g. "where did I shop at Tesco?").
+        """
+        with self._lock:
+            key = latest_indexed(self._merchants.get(account_id, {}), query)
+            return self._transactions[account_id].get(key) if key is not None else None
+
+    def load_transactions(self, account_id: str, transactions: Iterable[dict[str, Any]]) -> None:
+        """
+        Bulk-add transactions while building a store (e.g. from a dataset).
+
+        Like append_transaction for each of them, but without change
+        notifications: nothing can have cached data from a store being built.
+        """
+        if account_id not in self._accounts:
+            raise KeyError(account_id)
+        with self._lock:
+            log = self._transactions.get(account_id)
+            if log is None:
+                log = self._transactions[account_id] = self._new_log()
+            index = self._merchants.setdefault(account_id, {})
+            for transaction in transactions:
+                log.append(dict(transaction))
+                index_merchant(index, transaction.get("description", ""), _key(transaction))
+
+    def append_transaction(self, account_id: str, transaction: dict[str, Any]) -> None:
+        """Record a new transaction, keeping the account's date order."""
+        self.load_transactions(account_id, [transaction])
+        _notify(self._owner[account_id], account_id)
+
+
+AnyStore = Union[BankStore, "SnapshotStore"]
+
+_STORE: AnyStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> AnyStore:
+    """
+    Return the process-wide store, built on first use.
+
+    Environment variables:
+    - BANK_SNAPSHOT_PATH: read-only snapshot written by ``mcp_server.snapshot``
+      to memory-map and query in place (takes precedence over the others)
+    - BANK_DATASET_PATH: dataset written by ``mcp_server.datagen`` to serve
+      instead of the mock data (unset = mock data)
+    - BANK_STORE_LAYOUT: ``dicts`` (default) or ``columnar`` transaction storage
+
+    The result is a BankStore or, for a snapshot, a read-only SnapshotStore
+    with the same query methods.
+    """
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            snapshot = os.getenv("BANK_SNAPSHOT_PATH")
+            path = os.getenv("BANK_DATASET_PATH")
+            layout = os.getenv("BANK_STORE_LAYOUT", "dicts")
+            if snapshot:
+                from .snapshot import SnapshotStore
+
+                _STORE = SnapshotStore.open(snapshot)
+            elif path:
+                from .datagen import load_dataset
+
+                _STORE = load_dataset(path, layout=layout)
+            else:
+                _STORE = BankStore.from_mock_data(layout=layout)
+        return _STORE
+
+
+def set_store(store: AnyStore | None) -> None:
+    """Replace the process-wide store; None rebuilds it on next use."""
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
+    _notify(None, None)
@@ -0,0 +1,104 @@
+import random
+import tracemalloc
+
+import pytest
+
+from mcp_server.columnar import ColumnarTransactionLog, StringTable, format_pence
+from mcp_server.mock_data import TRANSACTIONS
+from mcp_server.server import get_transactions, get_transactions_page
+from mcp_server.store import BankStore, TransactionLog, set_store
+
+
+def _tx(n, day, description="Tesco Superstore", tx_type="debit"):
+    return {
+        "id": f"tx_acc_{n:05d}",
+        "date": f"2025-{1 + day // 28:02d}-{1 + day % 28:02d}",
+        "description": description,
+        "amount": f"{n % 50 + 1}.{n % 100:02d}",
+        "currency": "GBP",
+        "type": tx_type,
+        "runningBalance": f"-{n}.05",
+    }
+
+
+def _random_rows(count, seed=1):
+    rng = random.Random(seed)
+    merchants = ["Tesco Superstore", "Boots", "Pret A Manger", "Salary"]
+    return [_tx(n, rng.randrange(300), rng.choice(merchants), rng.choice(["debit", "credit"]))
+            for n in range(count)]
+
+
+def test_columnar_log_matches_dict_log():
+    rows = _random_rows(400)
+    dicts, columns = TransactionLog(rows[:300]), ColumnarTransactionLog(rows[:300])
+    for row in rows[300:]:
+        dicts.append(row)
+        columns.append(row)
+
+    assert columns.newest(25) == dicts.newest(25)
+    for filters in ({}, {"merchant": "tesco"}, {"type": "credit"},
+                    {"from_date": "2025-03-01", "to_date": "2025-05-10", "merchant": "boots"}):
+        before_d = before_c = None
+        while True:
+            page_d, before_d = dicts.page(17, before=before_d, **filters)
+            page_c, before_c = columns.page(17, before=before_c, **filters)
+            assert page_c == page_d
+            assert before_c == before_d
+            if before_d is None:
+                break
+
+
+def test_mock_data_round_trips_exactly():
+    for account_id, txs in TRANSACTIONS.items():
+        expected = sorted(txs, key=lambda tx: (tx["date"], tx["id"]), reverse=True)
+        assert ColumnarTransactionLog(txs).newest(100) == expected
+
+
+def test_unknown_filters_match_nothing_without_growing_the_table():
+    strings = StringTable()
+    log = ColumnarTransactionLog(_random_rows(20), strings=strings)
+    size = len(strings)
+    assert log.page(10, type="refund") == ([], None)
+    assert log.page(10, merchant="no such shop") == ([], None)
+    assert len(strings) == size
+    assert log.columns()["type"].itemsize == 1
+
+
+def test_rejects_fields_and_amounts_it_cannot_represent():
+    with pytest.raises(ValueError):
+        ColumnarTransactionLog([_tx(1, 1) | {"category": "groceries"}])
+    with pytest.raises(ValueError):
+        ColumnarTransactionLog([_tx(1, 1) | {"amount": "1.005"}])
+    with pytest.raises(ValueError):
+        ColumnarTransactionLog([_tx(1, 1, tx_type="refund")])
+    assert format_pence(-5) == "-0.05"
+
+
+def test_columnar_uses_an_order_of_magnitude_less_memory():
+    def measure(make_log):
+        tracemalloc.start()
+        log = make_log()
+        for row in (_tx(n, n % 300, ("Tesco Superstore", "Boots")[n % 2]) for n in range(5_000)):
+            log.append(row)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    assert measure(ColumnarTransactionLog) * 8 < measure(TransactionLog)
+
+
+def test_server_tools_on_columnar_store():
+    set_store(BankStore.from_mock_data(layout="columnar"))
+    try:
+        txs = get_transactions("acc_current_001", limit=5)
+        assert len(txs) == 5 and txs[0]["date"] >= txs[-1]["date"]
+        page = get_transactions_page("acc_current_001", limit=15)
+        rest = get_transactions_page("acc_current_001", limit=15, cursor=page["nextCursor"])
+        assert len(page["transactions"]) + len(rest["transactions"]) == 20
+    finally:
+        set_store(None)
+
+
+def test_unknown_layout_is_rejected():
+    with pytest.raises(ValueError):
+        BankStore.from_mock_data(layout="parquet")
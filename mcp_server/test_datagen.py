@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+
+from mcp_server.datagen import DEFAULT_END_DATE, generate, load_dataset, main, write_dataset
+from mcp_server.mock_data import TRANSACTIONS
+from mcp_server.server import get_account_detail, get_accounts, get_transactions
+from mcp_server.store import on_change, set_store
+
+END = date(2025, 6, 30)
+
+
+def _write(path, customers=20, seed=3, **kwargs):
+    return write_dataset(path, generate(customers, seed=seed, end_date=END, **kwargs), seed=seed)
+
+
+def test_same_seed_produces_identical_file(tmp_path):
+    _write(tmp_path / "a.jsonl.gz")
+    _write(tmp_path / "b.jsonl.gz")
+    _write(tmp_path / "c.jsonl.gz", seed=4)
+
+    a = (tmp_path / "a.jsonl.gz").read_bytes()
+    assert a == (tmp_path / "b.jsonl.gz").read_bytes()
+    assert a != (tmp_path / "c.jsonl.gz").read_bytes()
+
+
+def test_dataset_round_trips_into_store(tmp_path):
+    path = tmp_path / "bank.jsonl.gz"
+    counts = _write(path, customers=30, transactions_per_account=40)
+    store = load_dataset(path)
+
+    assert counts["customers"] == 31
+    assert len(store.accounts()) == counts["accounts"]
+    generated = store.accounts("cust_gen_00000007")
+    assert generated and all(a["customerId"] == "cust_gen_00000007" for a in generated)
+
+    current = next(a for a in generated if a["type"] == "current")
+    history = store.transactions(current["id"], 10_000)
+    assert history
+    assert all(tx["date"] <= END.isoformat() for tx in history)
+    # The account balance is where its running balance ends.
+    assert history[0]["runningBalance"] == current["balance"]
+
+
+def test_demo_customer_is_included_first(tmp_path):
+    path = tmp_path / "bank.jsonl.gz"
+    _write(path, customers=2)
+    store = load_dataset(path)
+
+    assert store.default_customer_id == "cust_demo_001"
+    assert {a["id"] for a in store.accounts("cust_demo_001")} >= {"acc_current_001", "acc_mortgage_001"}
+
+
+def test_load_rejects_foreign_files(tmp_path):
+    import gzip
+
+    path = tmp_path / "other.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        f.write('{"format": "something-else"}\n')
+    with pytest.raises(ValueError):
+        load_dataset(path)
+
+
+def test_server_serves_dataset_from_env(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "bank.jsonl.gz"
+    assert main(["--customers", "5", "--seed", "1", "--end-date", "2025-06-30", "--output", str(path)]) == 0
+    assert "wrote 6 customers" in capsys.readouterr().err  # includes the demo customer
+
+    monkeypatch.setenv("BANK_DATASET_PATH", str(path))
+    set_store(None)
+    try:
+        assert {a["id"] for a in get_accounts()} == {
+            "acc_current_001", "acc_savings_001", "acc_credit_001", "acc_mortgage_001",
+        }
+        accounts = get_accounts(customer_id="cust_gen_00000002")
+        assert get_account_detail(accounts[0]["id"])["customer"]["id"] == "cust_gen_00000002"
+        assert len(get_transactions("acc_current_001", limit=5)) == 5
+    finally:
+        set_store(None)
+
+
+def test_default_end_date_is_fixed_and_demo_is_redated_to_it():
+    records = list(generate(1, seed=1, transactions_per_account=5))
+    assert records == list(generate(1, seed=1, transactions_per_account=5, end_date=DEFAULT_END_DATE))
+    demo_dates = [record[3] for record in records if record[0] == "t" and record[1] in TRANSACTIONS]
+    assert max(demo_dates) == DEFAULT_END_DATE.isoformat()
+
+
+def test_loading_does_not_send_change_notifications(tmp_path):
+    path = tmp_path / "bank.jsonl.gz"
+    _write(path, customers=3, transactions_per_account=10)
+    changes = []
+    unsubscribe = on_change(lambda customer_id, account_id: changes.append(account_id))
+    try:
+        store = load_dataset(path)
+    finally:
+        unsubscribe()
+    assert changes == []
+    assert store.transactions("acc_current_001", 1)
@@ -23,8 +23,71 @@ def test_mcp_server_tool_discovery():
         'get_accounts',
         'get_account_detail', 
         'get_transactions',
+        'get_transactions_page',
+        'find_merchant_transaction',
         'get_mortgage_summary',
         'get_credit_card_statement'
     }
     
     assert set(TOOLS.keys()) == expected_tools
+
+
+def _call(name, arguments):
+    import anyio
+
+    from mcp_server import mcp_server
+
+    return anyio.run(mcp_server.call_tool, name, arguments)
+
+
+def test_only_the_page_tool_takes_a_cursor():
+    import anyio
+
+    from mcp_server import mcp_server
+
+    schemas = {tool.name: tool.inputSchema["properties"] for tool in anyio.run(mcp_server.list_tools)}
+    page, plain = schemas["get_transactions_page"], schemas["get_transactions"]
+    assert "cursor" in page and "cursor" not in plain
+    assert {name: value for name, value in page.items() if name != "cursor"} == plain
+
+def test_tool_results_are_compact_json_by_default():
+    from mcp_server.server import get_transactions
+
+    [content] = _call('get_transactions', {'account_id': 'acc_current_001'})
+    assert '\n' not in content.text and '": ' not in content.text
+    assert json.loads(content.text) == get_transactions('acc_current_001')
+
+
+def test_output_format_and_structured_content_are_configurable():
+    import pytest
+
+    from mcp_server import mcp_server
+    from mcp_server.server import get_account_detail, get_accounts
+
+    try:
+        mcp_server.configure_output('pretty', structured=True)
+        content, structured = _call('get_accounts', {})
+        assert content[0].text == json.dumps(get_accounts(), indent=2)
+        assert structured == {'result': get_accounts()}
+
+        _, structured = _call('get_account_detail', {'account_id': 'acc_current_001'})
+        assert structured == get_account_detail('acc_current_001')
+
+        pytest.importorskip('orjson')
+        mcp_server.configure_output('orjson', structured=False)
+        [content] = _call('get_accounts', {})
+        assert content.text == json.dumps(get_accounts(), separators=(',', ':'))
+    finally:
+        mcp_server.configure_output('compact', structured=False)
+
+    with pytest.raises(ValueError):
+        mcp_server.configure_output('yaml')
+
+
+def test_find_merchant_transaction_is_served_over_mcp():
+    from mcp_server.server import find_merchant_transaction
+
+    query = 'where did I shop at Tesco?'
+    [content] = _call('find_merchant_transaction', {'account_id': 'acc_current_001', 'query': query})
+    assert not content.text.startswith('Error')
+    assert json.loads(content.text) == find_merchant_transaction('acc_current_001', query)
@@ -311,3 +311,165 @@ def test_all_tools_handle_invalid_params():
         raise AssertionError('Expected error for None account_id')
     except (ToolError, TypeError, AttributeError):
         pass  # Expected
+
+
+# Pagination and filtering
+def test_get_transactions_page_cursor_covers_history_once():
+    from mcp_server.server import get_transactions_page
+
+    ids, cursor = [], None
+    while True:
+        page = get_transactions_page('acc_current_001', limit=6, cursor=cursor)
+        ids += [tx['id'] for tx in page['transactions']]
+        cursor = page['nextCursor']
+        if cursor is None:
+            break
+    assert ids == [tx['id'] for tx in get_transactions('acc_current_001', limit=100)]
+    assert len(ids) == len(set(ids)) == 20
+
+
+def test_get_transactions_filters():
+    txs = get_transactions('acc_current_001', limit=100, merchant='tesco', type='debit')
+    assert txs
+    assert all('Tesco' in tx['description'] and tx['type'] == 'debit' for tx in txs)
+
+    newest = get_transactions('acc_current_001', limit=1)[0]['date']
+    assert all(tx['date'] == newest for tx in get_transactions('acc_current_001', from_date=newest))
+
+
+def test_get_transactions_rejects_bad_arguments():
+    from mcp_server.server import get_transactions_page
+
+    for kwargs in ({'cursor': 'not-a-cursor'}, {'from_date': '31/01/2025'}, {'type': 'refund'}):
+        try:
+            get_transactions_page('acc_current_001', **kwargs)
+        except ToolError:
+            pass
+        else:
+            raise AssertionError(f'Expected ToolError for {kwargs}')
+
+
+def test_call_tools_returns_results_in_order_and_isolates_errors():
+    from mcp_server.server import call_tools
+
+    results = call_tools([
+        {'tool': 'get_account_detail', 'args': {'account_id': 'acc_current_001'}},
+        {'tool': 'get_mortgage_summary', 'args': {'account_id': 'acc_current_001'}},
+        {'tool': 'get_transactions', 'args': {'account_id': 'acc_current_001', 'limit': 3}},
+        {'tool': 'no_such_tool'},
+        {'args': {}},
+    ])
+    assert [r['ok'] for r in results] == [True, False, True, False, False]
+    assert results[0]['result'] == get_account_detail('acc_current_001')
+    assert 'not a mortgage' in results[1]['error']
+    assert results[2]['result'] == get_transactions('acc_current_001', limit=3)
+    assert 'Unknown tool' in results[3]['error']
+
+
+def test_call_tools_shares_account_lookups():
+    from unittest.mock import patch
+
+    from mcp_server.server import call_tools
+    from mcp_server.store import get_store
+
+    store = get_store()
+    calls = [
+        {'tool': 'get_account_detail', 'args': {'account_id': 'acc_credit_001'}},
+        {'tool': 'get_transactions', 'args': {'account_id': 'acc_credit_001', 'limit': 5}},
+        {'tool': 'get_credit_card_statement', 'args': {'account_id': 'acc_credit_001'}},
+    ]
+    with patch.object(store, 'account', wraps=store.account) as account:
+        assert all(r['ok'] for r in call_tools(calls))
+    account.assert_called_once_with('acc_credit_001')
+
+    # Outside a batch every call looks the account up again.
+    with patch.object(store, 'account', wraps=store.account) as account:
+        get_account_detail('acc_credit_001')
+        get_account_detail('acc_credit_001')
+    assert account.call_count == 2
+
+
+def test_mcp_batch_tool():
+    import anyio
+    import json
+
+    from mcp_server import mcp_server
+
+    arguments = {'calls': [{'tool': 'get_accounts'}, {'tool': 'get_account_detail', 'args': {'account_id': 'missing'}}]}
+    [content] = anyio.run(mcp_server.call_tool, 'batch', arguments)
+    results = json.loads(content.text)
+    assert results[0] == {'ok': True, 'result': get_accounts()}
+    assert results[1] == {'ok': False, 'error': 'Account not found'}
+
+
+def _serve(lines, **kwargs):
+    import io
+    import json
+
+    from mcp_server.server import serve_lines
+
+    out = io.StringIO()
+    serve_lines(lines, out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_stdio_lines_without_ids_are_answered_in_order():
+    replies = _serve([
+        '{"tool": "get_accounts"}',
+        '',
+        'not json',
+        '{"tool": "get_account_detail", "args": {"account_id": "missing"}}',
+        '[{"tool": "get_accounts"}]',
+    ])
+    assert replies[0] == {'ok': True, 'result': get_accounts()}
+    assert replies[1]['ok'] is False
+    assert replies[2] == {'ok': False, 'error': 'Account not found'}
+    assert replies[3] == [{'ok': True, 'result': get_accounts()}]
+
+
+def test_stdio_calls_with_ids_are_pipelined_and_complete_out_of_order():
+    import threading
+    from unittest.mock import patch
+
+    from mcp_server.server import TOOLS
+
+    fast_done = threading.Event()
+
+    def slow():
+        assert fast_done.wait(5), 'fast call did not run concurrently'
+        return 'slow'
+
+    def fast():
+        fast_done.set()
+        return 'fast'
+
+    with patch.dict(TOOLS, {'slow': slow, 'fast': fast}):
+        replies = _serve([
+            '{"id": 1, "tool": "slow"}',
+            '{"id": "b", "tool": "fast"}',
+            '{"id": 3, "tool": "get_account_detail", "args": {"account_id": "missing"}}',
+        ], max_workers=4)
+
+    by_id = {reply['id']: reply for reply in replies}
+    assert by_id[1] == {'id': 1, 'ok': True, 'result': 'slow'}
+    assert by_id['b'] == {'id': 'b', 'ok': True, 'result': 'fast'}
+    assert by_id[3] == {'id': 3, 'ok': False, 'error': 'Account not found'}
+    assert replies.index(by_id['b']) < replies.index(by_id[1])
+
+
+def test_find_merchant_transaction_searches_the_whole_history():
+    from mcp_server.server import call_tool
+
+    history = sorted(TRANSACTIONS["acc_current_001"], key=lambda tx: tx["date"], reverse=True)
+    oldest = history[-1]
+    word = next(w for w in oldest["description"].split() if len(w) > 3)
+    found = call_tool("find_merchant_transaction", account_id="acc_current_001", query=f"where was {word.upper()}?")
+    expected = next(tx for tx in history if word.lower() in tx["description"].lower().split())
+    assert found == expected
+    assert call_tool("find_merchant_transaction", account_id="acc_current_001", query="nowhere special") is None
+    try:
+        call_tool("find_merchant_transaction", account_id="missing", query="tesco")
+    except ToolError as exc:
+        assert "Account not found" in str(exc)
+    else:
+        raise AssertionError("expected ToolError")
@@ -0,0 +1,85 @@
+import sys
+from datetime import date
+
+import pytest
+
+from mcp_server.datagen import generate, load_dataset, write_dataset
+from mcp_server.server import get_account_detail, get_accounts, get_transactions_page
+from mcp_server.snapshot import SnapshotStore, main, write_snapshot
+from mcp_server.store import BankStore, set_store
+
+
+@pytest.fixture
+def generated(tmp_path):
+    dataset = tmp_path / "bank.jsonl.gz"
+    write_dataset(dataset, generate(15, seed=5, end_date=date(2025, 6, 30), transactions_per_account=30))
+    store = load_dataset(dataset)
+    path = tmp_path / "bank.snap"
+    write_snapshot(store, path)
+    return store, SnapshotStore.open(path)
+
+
+def test_snapshot_answers_like_the_store(generated):
+    store, snapshot = generated
+
+    assert snapshot.default_customer_id == store.default_customer_id
+    assert snapshot.customers() == store.customers()
+    assert snapshot.accounts() == store.accounts()
+    for customer in store.customers():
+        assert snapshot.accounts(customer["id"]) == store.accounts(customer["id"])
+    for account in store.accounts():
+        account_id = account["id"]
+        assert snapshot.account(account_id) == account
+        assert snapshot.customer_of(account_id) == store.customer_of(account_id)
+        assert snapshot.transactions(account_id, 7) == store.transactions(account_id, 7)
+        assert snapshot.transactions(account_id, sys.maxsize) == store.transactions(account_id, sys.maxsize)
+
+
+def test_snapshot_pages_like_the_store(generated):
+    store, snapshot = generated
+    account_id = "acc_current_00000003"
+    for filters in ({}, {"merchant": "tesco"}, {"type": "credit", "from_date": "2025-01-01"}):
+        expected, got = store.transactions_page(account_id, 5, **filters), snapshot.transactions_page(account_id, 5, **filters)
+        assert got == expected
+        assert snapshot.transactions_page(account_id, 5, before=got[1], **filters) == \
+            store.transactions_page(account_id, 5, before=expected[1], **filters)
+
+
+def test_unknown_ids_and_writes(generated):
+    _, snapshot = generated
+    assert snapshot.account("acc_missing") is None
+    assert snapshot.accounts("cust_missing") == []
+    assert snapshot.transactions("acc_missing", 5) == []
+    with pytest.raises(TypeError):
+        snapshot.append_transaction("acc_current_001", {})
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.snap"
+    path.write_bytes(b"PK\x03\x04" + b"\0" * 64)
+    with pytest.raises(ValueError):
+        SnapshotStore.open(path)
+
+
+def test_server_serves_snapshot_from_env(tmp_path, monkeypatch):
+    path = tmp_path / "mock.snap"
+    assert main(["--output", str(path)]) == 0
+
+    monkeypatch.setenv("BANK_SNAPSHOT_PATH", str(path))
+    set_store(None)
+    try:
+        assert [a["id"] for a in get_accounts()] == [a["id"] for a in BankStore.from_mock_data().accounts()]
+        assert get_account_detail("acc_mortgage_001")["customer"]["id"] == "cust_demo_001"
+        page = get_transactions_page("acc_current_001", limit=12)
+        assert len(page["transactions"]) == 12 and page["nextCursor"]
+    finally:
+        set_store(None)
+
+
+def test_snapshot_finds_merchants_like_the_store(generated):
+    store, snapshot = generated
+    for account in store.accounts()[:10]:
+        for tx in store.transactions(account["id"], 5):
+            query = f"where did I buy {tx['description']}?"
+            assert snapshot.latest_by_merchant(account["id"], query) == store.latest_by_merchant(account["id"], query)
+    assert snapshot.latest_by_merchant("missing", "tesco") is None
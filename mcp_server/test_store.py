@@ -0,0 +1,133 @@
+from mcp_server.columnar import ColumnarTransactionLog
+from mcp_server.mock_data import ACCOUNTS, CUSTOMER, TRANSACTIONS
+from mcp_server.server import get_accounts, get_transactions
+from mcp_server.store import BankStore, TransactionLog, get_store, set_store
+
+
+def _tx(tx_id, day):
+    return {"id": tx_id, "date": f"2025-01-{day:02d}", "description": "Tesco", "amount": "1.00", "type": "debit"}
+
+
+def test_transaction_log_returns_newest_first():
+    log = TransactionLog([_tx("a", 3), _tx("b", 1), _tx("c", 2)])
+    assert [tx["id"] for tx in log.newest(2)] == ["a", "c"]
+    assert [tx["id"] for tx in log.newest(10)] == ["a", "c", "b"]
+    assert log.newest(0) == []
+
+
+def test_transaction_log_append_keeps_date_order():
+    log = TransactionLog([_tx("a", 1), _tx("c", 5)])
+    log.append(_tx("d", 9))
+    log.append(_tx("b", 3))
+    assert [tx["id"] for tx in log.newest(10)] == ["d", "c", "b", "a"]
+
+
+def test_store_matches_sorted_mock_data():
+    store = BankStore.from_mock_data()
+    for account_id, txs in TRANSACTIONS.items():
+        expected = sorted(txs, key=lambda tx: tx["date"], reverse=True)[:7]
+        assert store.transactions(account_id, 7) == expected
+
+
+def test_store_indexes_accounts_by_customer():
+    other = {"id": "cust_demo_002", "name": "Sam Lee"}
+    extra = {"id": "acc_current_002", "type": "current", "name": "Joint", "balance": "1.00",
+             "currency": "GBP", "customerId": other["id"]}
+    store = BankStore(customers=[CUSTOMER, other], accounts=[*ACCOUNTS, extra], transactions={})
+
+    assert [a["id"] for a in store.accounts(other["id"])] == ["acc_current_002"]
+    assert len(store.accounts(CUSTOMER["id"])) == len(ACCOUNTS)
+    assert store.customer_of("acc_current_002") == other
+    assert store.account("missing") is None
+
+
+def test_returned_transactions_do_not_alias_the_store():
+    store = BankStore.from_mock_data()
+    store.transactions("acc_current_001", 1)[0]["description"] = "changed"
+    assert store.transactions("acc_current_001", 1)[0]["description"] != "changed"
+
+
+def test_appended_transaction_is_visible_through_tools():
+    set_store(BankStore.from_mock_data())
+    try:
+        get_store().append_transaction("acc_current_001", _tx("tx_new", 1) | {"date": "2999-01-01"})
+        assert get_transactions("acc_current_001", limit=1)[0]["id"] == "tx_new"
+        assert len(TRANSACTIONS["acc_current_001"]) == 20
+        assert get_accounts(customer_id="cust_unknown") == []
+    finally:
+        set_store(None)
+
+
+def _log(n=10):
+    txs = [_tx(f"tx_{day:03d}", day) | {"type": "credit" if day % 3 == 0 else "debit",
+                                        "description": "Tesco" if day % 2 else "Boots"}
+           for day in range(1, n + 1)]
+    return TransactionLog(txs)
+
+
+def test_page_walks_history_with_cursor():
+    log = _log()
+    seen, before = [], None
+    while True:
+        page, before = log.page(3, before=before)
+        seen += [tx["id"] for tx in page]
+        if before is None:
+            break
+    assert seen == [f"tx_{day:03d}" for day in range(10, 0, -1)]
+
+
+def test_page_filters_by_date_merchant_and_type():
+    log = _log()
+    page, _ = log.page(10, from_date="2025-01-03", to_date="2025-01-07")
+    assert [tx["id"] for tx in page] == ["tx_007", "tx_006", "tx_005", "tx_004", "tx_003"]
+
+    page, _ = log.page(10, merchant="BOOTS", type="credit")
+    assert [tx["id"] for tx in page] == ["tx_006"]
+
+
+def test_filtered_page_cursor_points_at_last_returned_match():
+    log = _log()
+    first, before = log.page(2, merchant="tesco")
+    assert [tx["id"] for tx in first] == ["tx_009", "tx_007"]
+    second, _ = log.page(2, before=before, merchant="tesco")
+    assert [tx["id"] for tx in second] == ["tx_005", "tx_003"]
+
+
+def test_same_day_transactions_are_ordered_by_id():
+    log = TransactionLog([_tx("b", 1), _tx("a", 1), _tx("c", 1)])
+    page, before = log.page(2)
+    assert [tx["id"] for tx in page] == ["c", "b"]
+    assert [tx["id"] for tx in log.page(2, before=before)[0]] == ["a"]
+
+
+def test_merchant_index_finds_the_latest_transaction_in_both_layouts():
+    history = [
+        {**_tx("t1", 1), "description": "TESCO Superstore"},
+        {**_tx("t2", 5), "description": "Costa Coffee"},
+        {**_tx("t3", 3), "description": "Tesco Express"},
+    ]
+    for layout in ("dicts", "columnar"):
+        store = BankStore(customers=[CUSTOMER], accounts=ACCOUNTS, transactions={"acc_current_001": history},
+                          layout=layout)
+        assert store.latest_by_merchant("acc_current_001", "where did I shop at tesco?")["id"] == "t3"
+        assert store.latest_by_merchant("acc_current_001", "at the shop") is None
+        assert store.latest_by_merchant("acc_savings_001", "tesco") is None
+
+        # Older transactions do not displace the newest; newer ones do.
+        store.append_transaction("acc_current_001", {**_tx("t0", 2), "description": "Tesco Metro"})
+        assert store.latest_by_merchant("acc_current_001", "Tesco")["id"] == "t3"
+        store.append_transaction("acc_current_001", {**_tx("t4", 9), "description": "Tesco Metro"})
+        assert store.latest_by_merchant("acc_current_001", "Tesco")["id"] == "t4"
+        assert store.latest_by_merchant("acc_current_001", "costa or tesco?")["id"] == "t4"
+
+
+def test_building_the_merchant_index_does_not_materialize_columnar_rows(monkeypatch):
+    def no_rows(self, index):
+        raise AssertionError("row materialized while indexing")
+
+    monkeypatch.setattr(ColumnarTransactionLog, "_row", no_rows)
+    history = [{**_tx("t1", 1), "description": "Tesco Superstore"}, {**_tx("t2", 5), "description": "Costa"}]
+    store = BankStore(customers=[CUSTOMER], accounts=ACCOUNTS, transactions={"acc_current_001": history},
+                      layout="columnar")
+    assert store._merchants["acc_current_001"] == {"tesco": ("2025-01-01", "t1"), "superstore": ("2025-01-01", "t1"),
+                                                   "costa": ("2025-01-05", "t2")}